@@ -0,0 +1,70 @@
+"""Проекции и сериализация ответов API.
+
+Запросы строятся через values(): из базы читаются только поля
+ответа, модели не создаются, а строки превращаются в JSON-объекты
+простым переименованием ключей.
+"""
+import json
+
+from django.conf import settings
+
+from posts.feeds import comments_count
+
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'thumbnails': 'thumbnails',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'pub_date': 'pub_date',
+}
+GROUP_FIELDS = ('slug', 'title', 'description')
+
+
+def post_rows(posts):
+    """Посты ленты в виде словарей с нужными ответу полями."""
+    return posts.annotate(comments_count=comments_count()).values(
+        *POST_FIELDS.values()
+    )
+
+
+def comment_rows(comments):
+    return comments.values(*COMMENT_FIELDS.values())
+
+
+def _dates(item, *fields):
+    for field in fields:
+        if item[field] is not None:
+            item[field] = item[field].isoformat()
+    return item
+
+
+def post(row):
+    item = {name: row[column] for name, column in POST_FIELDS.items()}
+    if item['image']:
+        item['image'] = settings.MEDIA_URL + item['image']
+    else:
+        item['image'] = None
+    item['thumbnails'] = (
+        json.loads(item['thumbnails']) if item['thumbnails'] else None
+    )
+    return _dates(item, 'pub_date', 'updated')
+
+
+def comment(row):
+    item = {name: row[column] for name, column in COMMENT_FIELDS.items()}
+    return _dates(item, 'pub_date')
+
+
+def dumps(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
@@ -0,0 +1,22 @@
+from django.urls import include, path
+
+from . import views
+
+
+app_name = 'api'
+
+v1 = [
+    path('posts/', views.index, name='index'),
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
+    path('groups/<slug:slug>/posts/', views.group_posts,
+         name='group_posts'),
+    path('profiles/<str:username>/posts/', views.profile_posts,
+         name='profile_posts'),
+    path('follow/', views.follow_posts, name='follow_posts'),
+]
+
+urlpatterns = [
+    path('v1/', include((v1, 'v1'))),
+]
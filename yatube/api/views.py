@@ -0,0 +1,150 @@
+from collections import namedtuple
+from functools import partial, wraps
+from http import HTTPStatus
+
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from core.caching import cache_page_versioned
+from yatube.settings import API_MAX_LIMIT, CACHE_TIMEOUT, LIMIT_POSTS
+from posts.models import Comment, Group, Post, User
+from posts.paginator import (
+    FORWARD, CursorPaginator, InvalidCursor, TimelinePaginator,
+    decode_cursor, encode_cursor,
+)
+from . import serializers
+
+CursorKey = namedtuple('CursorKey', 'pub_date pk')
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def json_response(payload, status=HTTPStatus.OK):
+    return HttpResponse(
+        serializers.dumps(payload),
+        content_type='application/json',
+        status=status,
+    )
+
+
+def api_view(view):
+    """Только GET, ошибки API - JSON с полем detail."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return json_response(view(request, *args, **kwargs))
+        except ApiError as error:
+            return json_response({'detail': error.detail}, error.status)
+    return wrapper
+
+
+def get_row(queryset, **lookup):
+    row = queryset.filter(**lookup).first()
+    if row is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено.')
+    return row
+
+
+def page(request, rows, serialize, paginator_class=CursorPaginator):
+    """Страница по курсору: {'results': [...], 'next': адрес или None}.
+
+    Курсоры те же, что у HTML-лент: keyset по (pub_date, id) без
+    OFFSET и без COUNT(*).
+    """
+    try:
+        limit = min(int(request.GET.get('limit', LIMIT_POSTS)), API_MAX_LIMIT)
+        if limit < 1:
+            raise ValueError(limit)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'Неверный limit.')
+
+    cursor = request.GET.get('cursor')
+    number, pub_date, pk = 1, None, None
+    if cursor:
+        try:
+            _, number, pub_date, pk = decode_cursor(cursor)
+        except InvalidCursor:
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Неверный курсор.')
+
+    found = paginator_class(rows, limit).forward_rows(pub_date, pk)
+    results = found[:limit]
+    next_url = None
+    if len(found) > limit:
+        last = results[-1]
+        query = request.GET.copy()
+        query['cursor'] = encode_cursor(
+            FORWARD, number + 1, CursorKey(last['pub_date'], last['id'])
+        )
+        next_url = request.build_absolute_uri(
+            f'{request.path}?{query.urlencode()}'
+        )
+    return {
+        'results': [serialize(row) for row in results],
+        'next': next_url,
+    }
+
+
+def post_page(request, posts, paginator_class=CursorPaginator):
+    return page(
+        request, serializers.post_rows(posts), serializers.post,
+        paginator_class,
+    )
+
+
+@cache_page_versioned(
+    'posts', 'groups', 'comments', timeout=CACHE_TIMEOUT
+)
+@api_view
+def index(request):
+    return post_page(request, Post.objects.all())
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_row(
+        Group.objects.values('id', *serializers.GROUP_FIELDS), slug=slug
+    )
+    payload = post_page(request, Post.objects.filter(group_id=group['id']))
+    payload['group'] = {
+        field: group[field] for field in serializers.GROUP_FIELDS
+    }
+    return payload
+
+
+@api_view
+def profile_posts(request, username):
+    author = get_row(User.objects.values('id'), username=username)
+    return post_page(request, Post.objects.filter(author_id=author['id']))
+
+
+@api_view
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        raise ApiError(HTTPStatus.UNAUTHORIZED, 'Нужна авторизация.')
+    return post_page(
+        request, Post.objects.all(),
+        partial(TimelinePaginator, request.user),
+    )
+
+
+@api_view
+def post_detail(request, post_id):
+    return serializers.post(
+        get_row(serializers.post_rows(Post.objects.all()), pk=post_id)
+    )
+
+
+@api_view
+def post_comments(request, post_id):
+    get_row(Post.objects.values('id'), pk=post_id)
+    return page(
+        request,
+        serializers.comment_rows(Comment.objects.filter(post_id=post_id)),
+        serializers.comment,
+    )
@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'attempts', 'run_at', 'duration',
+        'progress',
+    )
+    # В аргументах бывают адреса и ссылки из писем.
+    exclude = ('arguments',)
+    search_fields = ('name',)
+    list_filter = ('status', 'name')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        if 'core.middleware.RequestStatsMiddleware' in settings.MIDDLEWARE:
+            from . import metrics
+            metrics.instrument()
@@ -0,0 +1,220 @@
+"""ASGI-приложение поверх WSGI-обработчика Django.
+
+В Django 2.2 нет ни ASGIHandler, ни асинхронных view, а ORM
+нельзя вызывать из цикла событий. Поэтому здесь асинхронно только
+то, где медленный клиент держал бы поток синхронного сервера:
+чтение тела запроса и отправка ответа. Сам view (запросы к базе и
+рендеринг шаблона) выполняется в ограниченном пуле потоков и не
+блокирует цикл событий, а пока клиент читает ответ, поток уже
+обрабатывает следующий запрос. Исключение - потоковые ответы: их
+части читаются в том же потоке, что и view (см. respond).
+"""
+import asyncio
+import contextvars
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+
+from yatube.settings import ASGI_STREAM_BUFFER, ASGI_THREADS
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def build_environ(scope, body):
+    """WSGI environ из ASGI scope и уже прочитанного тела."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI передаёт путь байтами UTF-8, упакованными в latin-1.
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = environ[name] + separator + value
+        environ[name] = value
+    return environ
+
+
+class WSGIResponse:
+    """Статус и заголовки от start_response в виде сообщения ASGI."""
+
+    def __init__(self):
+        self.start = None
+
+    def start_response(self, status, headers, exc_info=None):
+        self.start = {
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ],
+        }
+
+
+def respond(application, environ, emit):
+    """Вызывает WSGI-приложение и передаёт сообщения ответа в emit.
+
+    Всё, от view до последней части потокового ответа и его закрытия,
+    выполняется одним заданием пула: курсоры .iterator() и соединения
+    с базой принадлежат потоку, а request_finished закрывает
+    соединения того потока, где работал view. Обычный ответ отдаётся
+    целиком, и поток сразу свободен; потоковый держит поток, пока
+    клиент не прочитает его.
+    """
+    response = WSGIResponse()
+    result = application(environ, response.start_response)
+    try:
+        if not getattr(result, 'streaming', False):
+            body = b''.join(result)
+            emit(response.start)
+            emit({'type': 'http.response.body', 'body': body})
+            return
+        emit(response.start)
+        for chunk in result:
+            emit({
+                'type': 'http.response.body',
+                'body': chunk,
+                'more_body': True,
+            })
+        emit({'type': 'http.response.body'})
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+
+
+class Channel:
+    """Сообщения ответа из потока пула в цикл событий.
+
+    Очередь ограничена ASGI_STREAM_BUFFER: поток, читающий потоковый
+    ответ, ждёт, пока клиент заберёт прежние части, и не копит
+    ответ в памяти.
+    """
+
+    def __init__(self, loop, size=ASGI_STREAM_BUFFER):
+        self.loop = loop
+        self.queue = asyncio.Queue(size)
+        self.cancelled = threading.Event()
+
+    def put(self, message):
+        """Вызывается из потока пула."""
+        if self.cancelled.is_set():
+            raise ClientDisconnected
+        asyncio.run_coroutine_threadsafe(
+            self.queue.put(message), self.loop
+        ).result()
+
+    async def get(self, job):
+        """Следующее сообщение; ошибка задания, если оно упало."""
+        get = asyncio.ensure_future(self.queue.get())
+        await asyncio.wait({get, job}, return_when=asyncio.FIRST_COMPLETED)
+        if get.done():
+            return get.result()
+        get.cancel()
+        job.result()
+        raise RuntimeError('Ответ закончился без последнего сообщения')
+
+    async def close(self, job):
+        """Останавливает задание и ждёт, пока оно закроет ответ."""
+        self.cancelled.set()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        await asyncio.wait({job})
+        if not job.cancelled():
+            # Ошибку уже подняла get(), ClientDisconnected ожидаем.
+            job.exception()
+
+
+class ASGIHandler:
+    def __init__(self, wsgi_application, threads=ASGI_THREADS):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            threads, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        try:
+            body = await self.read_body(receive)
+        except ClientDisconnected:
+            return
+        loop = asyncio.get_running_loop()
+        channel = Channel(loop)
+        # Задание выполняется в своём контексте: contextvars запроса
+        # (metrics) не смешиваются с запросами, которые раньше
+        # выполнял тот же поток.
+        context = contextvars.copy_context()
+        with body:
+            job = loop.run_in_executor(
+                self.executor, context.run, respond,
+                self.wsgi_application, build_environ(scope, body),
+                channel.put,
+            )
+            try:
+                while True:
+                    message = await channel.get(job)
+                    await send(message)
+                    if (
+                        message['type'] == 'http.response.body'
+                        and not message.get('more_body', False)
+                    ):
+                        break
+            finally:
+                await channel.close(job)
+
+    async def read_body(self, receive):
+        """Тело запроса; большое уходит из памяти во временный файл."""
+        body = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                raise ClientDisconnected
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
@@ -0,0 +1,288 @@
+"""Замеры задержки страниц под нагрузкой.
+
+Каждый маршрут выполняется заданное число раз при нескольких уровнях
+параллельности. У каждого потока свой тестовый клиент и своё
+соединение с базой, поэтому число и время SQL-запросов считаются
+для каждого запроса отдельно. Итог сохраняется в JSON и сравнивается
+с базовым прогоном того же формата.
+
+run_wsgi и run_asgi сравнивают серверные модели на GET-маршрутах:
+запрос проходит WSGI-приложение или core.asgi.ASGIHandler целиком,
+а медленный клиент читает ответ client_delay секунд. WSGI-поток всё
+это время занят, ASGI ждёт клиента в цикле событий.
+"""
+import asyncio
+import io
+import math
+import threading
+import time
+from collections import namedtuple
+from functools import partial
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+Route = namedtuple('Route', 'name method url data', defaults=(None,))
+
+PERCENTILES = {'p50': 50, 'p95': 95, 'p99': 99}
+# По этим метрикам прогон сравнивается с базовым.
+COMPARED = ('p50', 'p95', 'p99', 'queries')
+
+
+def percentile(values, percent):
+    """Перцентиль с линейной интерполяцией между соседними значениями."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * percent / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def measure(client, route):
+    """Выполняет запрос: (секунды, число SQL-запросов, секунды в SQL)."""
+    request = getattr(client, route.method.lower())
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = request(route.url, route.data or {})
+        elapsed = time.perf_counter() - started
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f'{route.name}: {route.method} {route.url} '
+            f'вернул {response.status_code}'
+        )
+    sql_time = sum(float(query['time']) for query in queries)
+    return elapsed, len(queries), sql_time
+
+
+def summarize_timings(timings, elapsed):
+    summary = {
+        name: round(percentile(timings, percent) * 1000, 3)
+        for name, percent in PERCENTILES.items()
+    }
+    summary.update(
+        requests=len(timings),
+        throughput=round(len(timings) / elapsed, 2) if elapsed else 0.0,
+    )
+    return summary
+
+
+def summarize(samples, elapsed):
+    summary = summarize_timings([sample[0] for sample in samples], elapsed)
+    summary.update(
+        queries=round(sum(s[1] for s in samples) / len(samples), 2),
+        sql_ms=round(sum(s[2] for s in samples) / len(samples) * 1000, 3),
+    )
+    return summary
+
+
+def in_threads(threads, requests, make_sampler):
+    """Выполняет requests замеров в threads потоках.
+
+    make_sampler вызывается в каждом потоке и возвращает функцию
+    одного замера. Результат - (замеры, секунды на всё).
+    """
+    numbers = iter(range(requests))
+    lock = threading.Lock()
+    samples, errors = [], []
+
+    def worker():
+        try:
+            sample = make_sampler()
+            while True:
+                with lock:
+                    if next(numbers, None) is None:
+                        return
+                result = sample()
+                with lock:
+                    samples.append(result)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            if threads > 1:
+                connection.close()
+
+    started = time.perf_counter()
+    if threads == 1:
+        worker()
+    else:
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+    return samples, elapsed
+
+
+def run_route(route, make_client, concurrency, requests):
+    """Гоняет маршрут requests раз в concurrency потоков."""
+    # Клиенты логинятся заранее: одновременная запись сессий из
+    # десятков потоков упирается в блокировку SQLite.
+    clients = [make_client() for _ in range(concurrency)]
+    samples, elapsed = in_threads(
+        concurrency, requests,
+        lambda: partial(measure, clients.pop(), route),
+    )
+    return summarize(samples, elapsed)
+
+
+def _check_status(route, status):
+    if status >= 400:
+        raise RuntimeError(f'{route.name}: GET {route.url} вернул {status}')
+
+
+def wsgi_environ(route, headers):
+    url = urlsplit(route.url)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'REMOTE_ADDR': '127.0.0.1',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers.items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+def run_wsgi(application, route, concurrency, requests, threads,
+             headers, client_delay=0.0):
+    """Синхронный сервер: поток держит запрос, пока клиент читает.
+
+    Одновременно обслуживается не больше threads клиентов, остальные
+    ждут свободный поток, как в очереди соединений.
+    """
+    environ = wsgi_environ(route, headers)
+
+    def request():
+        started = time.perf_counter()
+        statuses = []
+        result = application(
+            dict(environ, **{'wsgi.input': io.BytesIO()}),
+            lambda status, headers, exc_info=None: statuses.append(status),
+        )
+        try:
+            for _ in result:
+                pass
+            time.sleep(client_delay)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        _check_status(route, int(statuses[0].split()[0]))
+        return time.perf_counter() - started
+
+    timings, elapsed = in_threads(
+        min(concurrency, threads), requests, lambda: request
+    )
+    return summarize_timings(timings, elapsed)
+
+
+def asgi_scope(route, headers):
+    url = urlsplit(route.url)
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': url.path,
+        'query_string': url.query.encode(),
+        'root_path': '',
+        'headers': [
+            (name.lower().encode(), value.encode())
+            for name, value in headers.items()
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+
+
+def run_asgi(application, route, concurrency, requests, headers,
+             client_delay=0.0):
+    """ASGI-сервер: concurrency клиентов в одном цикле событий."""
+    scope = asgi_scope(route, headers)
+
+    async def request():
+        started = time.perf_counter()
+        statuses = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+            elif not message.get('more_body'):
+                await asyncio.sleep(client_delay)
+
+        await application(dict(scope), receive, send)
+        _check_status(route, statuses[0])
+        return time.perf_counter() - started
+
+    async def client(numbers, timings):
+        for _ in numbers:
+            timings.append(await request())
+
+    async def main():
+        numbers, timings = iter(range(requests)), []
+        await asyncio.gather(*(
+            client(numbers, timings) for _ in range(concurrency)
+        ))
+        return timings
+
+    started = time.perf_counter()
+    timings = asyncio.run(main())
+    return summarize_timings(timings, time.perf_counter() - started)
+
+
+def run(routes, make_client, levels, requests, warmup=1):
+    """Результаты в виде {маршрут: {параллельность: сводка}}."""
+    results = {}
+    for route in routes:
+        client = make_client()
+        for _ in range(warmup):
+            measure(client, route)
+        results[route.name] = {
+            str(concurrency): run_route(
+                route, make_client, concurrency, requests
+            )
+            for concurrency in levels
+        }
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    """Метрики, выросшие относительно базы больше чем на threshold.
+
+    Сравниваются только маршруты и уровни, которые есть в обоих
+    прогонах. Возвращает список строк с описанием регрессий.
+    """
+    regressions = []
+    for name, levels in results.items():
+        for level, summary in levels.items():
+            base = baseline.get(name, {}).get(level)
+            if base is None:
+                continue
+            for metric in COMPARED:
+                old, new = base.get(metric), summary.get(metric)
+                if not old or new is None:
+                    continue
+                growth = new / old - 1
+                if growth > threshold:
+                    regressions.append(
+                        f'{name} x{level} {metric}: {old} -> {new} '
+                        f'(+{growth:.0%})'
+                    )
+    return regressions
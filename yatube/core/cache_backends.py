@@ -0,0 +1,349 @@
+"""Общий кэш для нескольких процессов.
+
+RespCache хранит значения в Redis или в manage.py cache_server.
+TieredCache ставит перед общим кэшем (L2, любой бэкенд из CACHES)
+маленький LRU в памяти процесса (L1) с коротким сроком жизни:
+частые ключи вроде версий страниц читаются без сетевого обращения.
+Изменения ключей рассылаются через L2 (PUBLISH), и остальные
+процессы сразу выбрасывают их из своего L1. Если L2 рассылку не
+поддерживает (например, FileBasedCache), устаревание L1 ограничено
+L1_TIMEOUT.
+"""
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .resp import Client
+
+MISSING = object()
+
+
+class RespCache(BaseCache):
+    """Бэкенд Django для серверов с протоколом Redis.
+
+    Целые числа хранятся как есть, чтобы incr выполнялся на сервере
+    (INCRBY в транзакции WATCH/MULTI/EXEC), остальные значения -
+    в pickle.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.client = Client(
+            server or 'redis://127.0.0.1:6379/0',
+            timeout=options.get('SOCKET_TIMEOUT', 5),
+        )
+
+    def _encode(self, value):
+        if type(value) is int:
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _decode(self, data):
+        try:
+            return int(data)
+        except ValueError:
+            return pickle.loads(data)
+
+    def _set_command(self, key, value, timeout, *flags):
+        """SET с PX или None, если ключ должен сразу истечь."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        command = ['SET', key, self._encode(value), *flags]
+        if timeout is None:
+            return command
+        milliseconds = int(timeout * 1000)
+        if milliseconds <= 0:
+            return None
+        return command + ['PX', milliseconds]
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        data = self.client.execute('GET', key)
+        return default if data is None else self._decode(data)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        made = [self.make_key(key, version=version) for key in keys]
+        values = self.client.execute('MGET', *made)
+        return {
+            key: self._decode(data)
+            for key, data in zip(keys, values) if data is not None
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        command = self._set_command(key, value, timeout)
+        if command is None:
+            self.client.execute('DEL', key)
+        else:
+            self.client.execute(*command)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        command = self._set_command(key, value, timeout, 'NX')
+        if command is None:
+            return False
+        return self.client.execute(*command) is not None
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        commands = []
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            commands.append(
+                self._set_command(key, value, timeout) or ['DEL', key]
+            )
+        if commands:
+            self.client.pipeline(commands)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            if not self.client.execute('EXISTS', key):
+                return False
+            self.client.execute('PERSIST', key)
+            return True
+        return bool(
+            self.client.execute('PEXPIRE', key, max(int(timeout * 1000), 1))
+        )
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        return bool(self.client.execute('DEL', key))
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        if keys:
+            self.client.execute('DEL', *keys)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        return bool(self.client.execute('EXISTS', key))
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        value = self.client.incr_existing(key, delta)
+        # Как у остальных бэкендов Django: нет ключа - ValueError.
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        return value
+
+    def clear(self):
+        self.client.execute('FLUSHDB')
+
+    def publish(self, channel, message):
+        self.client.execute('PUBLISH', channel, message)
+
+    def subscribe(self, channel, callback, stop):
+        self.client.listen(channel, callback, stop)
+
+
+class LRU:
+    """Словарь с вытеснением давно не читанных и сроком жизни записей.
+
+    Значения лежат в pickle, как в LocMemCache: каждый get получает
+    свою копию, и потоки не делят один объект ответа.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return default
+            data, expires = item
+            if expires <= time.monotonic():
+                del self.data[key]
+                return default
+            self.data.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.data[key] = (data, time.monotonic() + timeout)
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_entries:
+                self.data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self.lock:
+            for key in keys:
+                self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+class Tier:
+    """L1 одного процесса и его подписка на рассылку изменений."""
+
+    def __init__(self, max_entries):
+        self.lru = LRU(max_entries)
+        self.origin = uuid.uuid4().hex
+        self.stop = threading.Event()
+
+    def invalidate(self, message):
+        origin, keys = json.loads(message)
+        # Свои изменения L1 уже учёл.
+        if origin == self.origin:
+            return
+        if keys is None:
+            self.lru.clear()
+        else:
+            self.lru.delete_many(keys)
+
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    """L1 в памяти процесса перед общим L2.
+
+    OPTIONS: L2 - алиас общего кэша в CACHES, L1_TIMEOUT - сколько
+    секунд L1 хранит значение, L1_MAX_ENTRIES - размер L1, CHANNEL -
+    канал рассылки изменений, общий для всех процессов.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.channel = options.get('CHANNEL', 'cache_invalidate')
+        self.tier = self._tier(name, options.get('L1_MAX_ENTRIES', 1000))
+
+    def _tier(self, name, max_entries):
+        # Django создаёт бэкенды в каждом потоке, а L1 общий на процесс.
+        # pid в ключе: после fork у процесса свой L1 и своя подписка.
+        key = (name, os.getpid())
+        with _tiers_lock:
+            if key not in _tiers:
+                tier = _tiers[key] = Tier(max_entries)
+                if hasattr(self.l2, 'subscribe'):
+                    threading.Thread(
+                        target=self.l2.subscribe,
+                        args=(self.channel, tier.invalidate, tier.stop),
+                        name='cache-invalidate',
+                        daemon=True,
+                    ).start()
+            return _tiers[key]
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def _l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.l1_timeout
+        return min(self.l1_timeout, timeout)
+
+    def _broadcast(self, keys):
+        l2 = self.l2
+        if hasattr(l2, 'publish'):
+            l2.publish(self.channel, json.dumps([self.tier.origin, keys]))
+
+    def get(self, key, default=None, version=None):
+        l1_key = self.make_key(key, version=version)
+        value = self.tier.lru.get(l1_key, MISSING)
+        if value is not MISSING:
+            return value
+        value = self.l2.get(key, MISSING, version=version)
+        if value is MISSING:
+            return default
+        self.tier.lru.set(l1_key, value, self.l1_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            value = self.tier.lru.get(self.make_key(key, version), MISSING)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = self.l2.get_many(missing, version=version)
+            for key, value in fetched.items():
+                self.tier.lru.set(
+                    self.make_key(key, version), value, self.l1_timeout
+                )
+            found.update(fetched)
+        return found
+
+    def _stored(self, keys, version, values, timeout):
+        """Обновить L1 и разослать ключи остальным процессам."""
+        l1_keys = [self.make_key(key, version=version) for key in keys]
+        l1_timeout = self._l1_timeout(timeout)
+        for l1_key, value in zip(l1_keys, values):
+            if value is MISSING or l1_timeout <= 0:
+                self.tier.lru.delete_many([l1_key])
+            else:
+                self.tier.lru.set(l1_key, value, l1_timeout)
+        self._broadcast(l1_keys)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version=version)
+        self._stored([key], version, [value], timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.l2.add(key, value, timeout, version=version):
+            return False
+        self._stored([key], version, [value], timeout)
+        return True
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version=version)
+        self._stored(list(data), version, list(data.values()), timeout)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        result = self.l2.delete(key, version=version)
+        self._stored([key], version, [MISSING], None)
+        return result
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.l2.delete_many(keys, version=version)
+        self._stored(keys, version, [MISSING] * len(keys), None)
+
+    def has_key(self, key, version=None):
+        l1_key = self.make_key(key, version=version)
+        if self.tier.lru.get(l1_key, MISSING) is not MISSING:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version=version)
+        self._stored([key], version, [value], None)
+        return value
+
+    def clear(self):
+        self.l2.clear()
+        self.tier.lru.clear()
+        self._broadcast(None)
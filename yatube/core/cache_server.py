@@ -0,0 +1,295 @@
+"""Локальный сервер кэша на протоколе Redis.
+
+Замена Redis для разработки и тестов: хранит значения в памяти
+процесса и понимает только команды, которые использует RespCache
+(GET, SET с EX/PX/NX, MGET, DEL, EXISTS, INCRBY, PEXPIRE, PERSIST,
+FLUSHDB, PUBLISH, SUBSCRIBE и транзакции WATCH/MULTI/EXEC).
+Запускается manage.py cache_server.
+"""
+import socketserver
+import threading
+import time
+from collections import defaultdict
+
+from .resp import RespError, read_reply
+
+
+class Ok:
+    """Простая строка +OK."""
+
+
+class Queued:
+    """Простая строка +QUEUED: команда отложена до EXEC."""
+
+
+class NoReply:
+    """Ответ уже отправлен обработчиком команды."""
+
+
+def encode_reply(value):
+    if value is Ok:
+        return b'+OK\r\n'
+    if value is Queued:
+        return b'+QUEUED\r\n'
+    if isinstance(value, RespError):
+        return b'-ERR %s\r\n' % str(value).encode()
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    return b'*%d\r\n' % len(value) + b''.join(map(encode_reply, value))
+
+
+class Store:
+    """Словарь ключ -> (значение, момент истечения или None, версия).
+
+    Версия - номер записи, последней изменившей ключ: по ней EXEC
+    узнаёт, что ключ из WATCH изменили, удалили или он истёк.
+    """
+
+    # Истёкшие ключи удаляются при чтении и раз в PURGE_EVERY записей.
+    PURGE_EVERY = 10000
+
+    def __init__(self):
+        self.data = {}
+        # EXEC выполняет команды под той же блокировкой.
+        self.lock = threading.RLock()
+        self.writes = 0
+
+    def _purge(self):
+        now = time.monotonic()
+        expired = [
+            key for key, (_, expires, _) in self.data.items()
+            if expires is not None and expires <= now
+        ]
+        for key in expired:
+            del self.data[key]
+
+    def _put(self, key, value, expires):
+        self.writes += 1
+        self.data[key] = (value, expires, self.writes)
+
+    def _live(self, key):
+        item = self.data.get(key)
+        if item is None:
+            return None
+        expires = item[1]
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return item
+
+    def _version(self, key):
+        item = self._live(key)
+        return item and item[2]
+
+    def watch(self, *keys):
+        """Версии ключей для WATCH: None у отсутствующих."""
+        with self.lock:
+            return {key: self._version(key) for key in keys}
+
+    def transaction(self, watched, calls):
+        """Выполняет calls атомарно; None, если ключи из WATCH менялись."""
+        with self.lock:
+            for key, version in watched.items():
+                if self._version(key) != version:
+                    return None
+            return [call() for call in calls]
+
+    def get(self, key):
+        with self.lock:
+            item = self._live(key)
+            return item and item[0]
+
+    def mget(self, *keys):
+        with self.lock:
+            return [(self._live(key) or (None,))[0] for key in keys]
+
+    def set(self, key, value, *options):
+        options = [option.upper() for option in options]
+        expires = None
+        for unit, scale in ((b'EX', 1), (b'PX', 1000)):
+            if unit in options:
+                ttl = int(options[options.index(unit) + 1]) / scale
+                expires = time.monotonic() + ttl
+        with self.lock:
+            if b'NX' in options and self._live(key) is not None:
+                return None
+            self._put(key, value, expires)
+            if not self.writes % self.PURGE_EVERY:
+                self._purge()
+            return Ok
+
+    def delete(self, *keys):
+        with self.lock:
+            deleted = [key for key in keys if self._live(key) is not None]
+            for key in deleted:
+                del self.data[key]
+            return len(deleted)
+
+    def exists(self, *keys):
+        with self.lock:
+            return sum(self._live(key) is not None for key in keys)
+
+    def incrby(self, key, delta):
+        with self.lock:
+            value, expires, _ = self._live(key) or (b'0', None, None)
+            try:
+                value = int(value) + int(delta)
+            except ValueError:
+                return RespError('value is not an integer')
+            self._put(key, str(value).encode(), expires)
+            return value
+
+    def pexpire(self, key, milliseconds):
+        with self.lock:
+            item = self._live(key)
+            if item is None:
+                return 0
+            expires = time.monotonic() + int(milliseconds) / 1000
+            self._put(key, item[0], expires)
+            return 1
+
+    def persist(self, key):
+        with self.lock:
+            item = self._live(key)
+            if item is None or item[1] is None:
+                return 0
+            self._put(key, item[0], None)
+            return 1
+
+    def flushdb(self):
+        with self.lock:
+            self.data.clear()
+        return Ok
+
+
+class CacheServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, Handler)
+        self.store = Store()
+        self.subscribers = defaultdict(set)
+        self.subscribers_lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self.subscribers_lock:
+            handlers = list(self.subscribers[channel])
+        data = encode_reply([b'message', channel, message])
+        for handler in handlers:
+            handler.write(data)
+        return len(handlers)
+
+
+class Handler(socketserver.StreamRequestHandler):
+    COMMANDS = {
+        b'GET': 'get', b'MGET': 'mget', b'SET': 'set', b'DEL': 'delete',
+        b'EXISTS': 'exists', b'INCRBY': 'incrby', b'PEXPIRE': 'pexpire',
+        b'PERSIST': 'persist', b'FLUSHDB': 'flushdb',
+    }
+
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.channels = set()
+        # Состояние транзакции соединения: версии ключей из WATCH
+        # и команды после MULTI (None - транзакции нет).
+        self.watched = {}
+        self.queued = None
+
+    def write(self, data):
+        with self.write_lock:
+            try:
+                self.wfile.write(data)
+            except OSError:
+                pass
+
+    def handle(self):
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (OSError, ValueError):
+                return
+            if not isinstance(command, list) or not command:
+                return
+            reply = self.execute(command)
+            if reply is not NoReply:
+                self.write(encode_reply(reply))
+
+    def execute(self, command):
+        name, args = command[0].upper(), command[1:]
+        if name in (b'WATCH', b'MULTI', b'EXEC', b'DISCARD'):
+            return self.transaction(name, args)
+        if self.queued is not None:
+            self.queued.append(command)
+            return Queued
+        return self.run(command)
+
+    def transaction(self, name, args):
+        store = self.server.store
+        if name == b'MULTI':
+            if self.queued is not None:
+                return RespError('MULTI calls can not be nested')
+            self.queued = []
+            return Ok
+        if name in (b'EXEC', b'DISCARD') and self.queued is None:
+            return RespError(f'{name.decode()} without MULTI')
+        if name == b'WATCH':
+            if self.queued is not None:
+                return RespError('WATCH inside MULTI is not allowed')
+            self.watched.update(store.watch(*args))
+            return Ok
+        queued, watched = self.queued, self.watched
+        self.queued, self.watched = None, {}
+        if name == b'EXEC':
+            return store.transaction(watched, [
+                lambda command=command: self.run(command)
+                for command in queued
+            ])
+        return Ok
+
+    def run(self, command):
+        name, args = command[0].upper(), command[1:]
+        label = name.decode(errors='replace')
+        store = self.server.store
+        try:
+            if name in self.COMMANDS:
+                return getattr(store, self.COMMANDS[name])(*args)
+            if name == b'INCR':
+                return store.incrby(args[0], 1)
+            if name == b'UNWATCH':
+                self.watched = {}
+                return Ok
+            if name in (b'PING', b'SELECT'):
+                return Ok
+            if name == b'PUBLISH':
+                return self.server.publish(*args)
+            if name == b'SUBSCRIBE':
+                return self.subscribe(args)
+        except TypeError:
+            return RespError(f'wrong number of arguments for {label}')
+        return RespError(f'unknown command {label}')
+
+    def subscribe(self, channels):
+        # Подтверждение уходит раньше первого сообщения канала.
+        for channel in channels:
+            self.channels.add(channel)
+            self.write(encode_reply(
+                [b'subscribe', channel, len(self.channels)]
+            ))
+        with self.server.subscribers_lock:
+            for channel in channels:
+                self.server.subscribers[channel].add(self)
+        return NoReply
+
+    def finish(self):
+        with self.server.subscribers_lock:
+            for channel in self.channels:
+                self.server.subscribers[channel].discard(self)
+        super().finish()
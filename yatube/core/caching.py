@@ -0,0 +1,202 @@
+"""Версионированный кэш страниц.
+
+Закэшированная страница хранит номера версий пространств
+(например, `posts` и `groups`), из которых она собрана. Сигналы
+моделей увеличивают версию, и страница из старых данных перестаёт
+считаться свежей. Поэтому страница может жить в кэше, пока данные
+не изменятся, а не по таймеру.
+
+Устаревшую или истекающую страницу пересобирает один запрос: он
+берёт аренду ключа (cache.add), остальные в это время получают
+старую копию, а если её нет - ждут новую. Незадолго до истечения
+страница пересобирается заранее с вероятностью, растущей к сроку
+(XFetch), чтобы популярный ключ не истёк под нагрузкой.
+"""
+import hashlib
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+
+from yatube.settings import (
+    CACHE_LOCK_TIMEOUT, CACHE_STALE_TIMEOUT, CACHE_XFETCH_BETA,
+)
+
+VERSION_KEY = 'cache_version:{}'
+PAGE_KEY = 'page:{view}:{viewer}:{csrf}:{url}'
+LOCK_KEY = 'lock:{}'
+# Как часто ждущий запрос проверяет, готова ли страница.
+WAIT_INTERVAL = 0.05
+
+
+def _initial_version():
+    # Если ключ версии вытеснен из кэша, счёт начинается заново.
+    # Отметка времени гарантирует, что новая версия не совпадёт
+    # ни с одной из тех, под которыми уже лежат старые страницы.
+    return int(time.time() * 1000)
+
+
+def get_versions(*namespaces):
+    """Текущие версии пространств одним обращением к кэшу."""
+    keys = [VERSION_KEY.format(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(namespace):
+    """Сделать устаревшими все страницы, зависящие от пространства."""
+    key = VERSION_KEY.format(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+class Entry:
+    """Страница в кэше с версиями данных и сроком годности."""
+
+    def __init__(self, value, versions, timeout, delta):
+        self.value = value
+        self.versions = versions
+        self.expires = None if timeout is None else time.time() + timeout
+        # Сколько секунд заняла сборка: чем дольше, тем раньше
+        # начинается досрочное обновление.
+        self.delta = delta
+
+    def is_fresh(self, versions):
+        if self.versions != versions:
+            return False
+        if self.expires is None:
+            return True
+        # XFetch: -log(random()) почти всегда мал, но изредка велик,
+        # и один из запросов обновляет страницу до срока.
+        early = self.delta * CACHE_XFETCH_BETA * -math.log(
+            1 - random.random()
+        )
+        return time.time() + early < self.expires
+
+
+def _acquire(key):
+    """Аренда пересборки ключа: токен или None, если её держат."""
+    token = uuid.uuid4().hex
+    if cache.add(LOCK_KEY.format(key), token, CACHE_LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def _release(key, token):
+    lock_key = LOCK_KEY.format(key)
+    # Аренда могла истечь и достаться другому запросу.
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _wait(key, versions):
+    """Ждёт страницу, которую собирает другой запрос."""
+    deadline = time.monotonic() + CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry.versions == versions:
+            return entry.value
+        if not cache.has_key(LOCK_KEY.format(key)):
+            return None
+    return None
+
+
+def get_or_rebuild(key, versions, build, timeout=None):
+    """Значение из кэша; пересобирает его не больше одного запроса.
+
+    build() возвращает пару (значение, можно ли его кэшировать).
+    """
+    entry = cache.get(key)
+    if entry is not None and entry.is_fresh(versions):
+        return entry.value
+
+    token = _acquire(key)
+    if token is None:
+        if entry is not None:
+            return entry.value
+        value = _wait(key, versions)
+        if value is not None:
+            return value
+        # Сборщик не справился или результат не кэшируется.
+        return build()[0]
+
+    try:
+        started = time.monotonic()
+        value, cacheable = build()
+        if cacheable:
+            delta = time.monotonic() - started
+            # Старая копия живёт в кэше ещё CACHE_STALE_TIMEOUT после
+            # срока, чтобы было что отдать, пока идёт пересборка.
+            cache.set(
+                key,
+                Entry(value, versions, timeout, delta),
+                None if timeout is None else timeout + CACHE_STALE_TIMEOUT,
+            )
+        return value
+    finally:
+        _release(key, token)
+
+
+def _digest(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def cache_page_versioned(*namespaces, timeout=None):
+    """Кэширует GET-ответы view до смены версии пространств.
+
+    Анонимные посетители делят одну копию страницы, авторизованные
+    получают свою, потому что в шапке выводится имя пользователя.
+    В формах страницы есть CSRF-токен, а вход в систему меняет секрет
+    CSRF, поэтому копия авторизованного привязана и к секрету. Страница
+    с токеном, у которой секрета в ключе нет (аноним или новый секрет,
+    созданный при сборке), не кэшируется.
+    """
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__name__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            user = request.user
+            secret = None
+            if user.is_authenticated:
+                secret = request.META.get('CSRF_COOKIE')
+            key = PAGE_KEY.format(
+                view=view_name,
+                viewer=user.pk if user.is_authenticated else 'anon',
+                csrf=_digest(secret or ''),
+                url=_digest(request.build_absolute_uri()),
+            )
+
+            def build():
+                response = view(request, *args, **kwargs)
+                csrf_safe = not request.META.get('CSRF_COOKIE_USED') or (
+                    secret is not None
+                    and request.META.get('CSRF_COOKIE') == secret
+                )
+                return response, (
+                    response.status_code == 200
+                    and not response.streaming
+                    and not response.cookies
+                    and csrf_safe
+                )
+
+            return get_or_rebuild(
+                key, get_versions(*namespaces), build, timeout
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,222 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from core import benchmark
+from core.asgi import ASGIHandler
+from core.benchmark import Route
+from yatube.settings import ASGI_THREADS
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BENCHMARK_USER = 'benchmark'
+SERVERS = ('client', 'wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон страниц posts и API через тестовый клиент: '
+        'p50/p95/p99, пропускная способность, число и время SQL. '
+        'С --baseline завершается ошибкой, если какой-то маршрут '
+        'стал медленнее базового прогона больше чем на --threshold. '
+        '--server wsgi asgi сравнивает на GET-маршрутах синхронный '
+        'сервер с пулом потоков и yatube.asgi при медленных клиентах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 4, 16],
+            help='Уровни параллельности.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Запросов к маршруту на каждом уровне.',
+        )
+        parser.add_argument(
+            '--routes', nargs='+',
+            help='Гонять только перечисленные маршруты.',
+        )
+        parser.add_argument(
+            '--server', nargs='+', choices=SERVERS, default=['client'],
+            help='client - тестовый клиент с подсчётом SQL; wsgi и asgi - '
+                 'запрос целиком через WSGI- или ASGI-приложение.',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=ASGI_THREADS,
+            help='Потоков WSGI-сервера и пула view у ASGI.',
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.0,
+            help='Сколько секунд медленный клиент читает ответ.',
+        )
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--output', help='Куда сохранить JSON.')
+        parser.add_argument('--baseline', help='JSON базового прогона.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост метрики, 0.2 = +20%%.',
+        )
+
+    def handle(self, *args, **options):
+        if not Post.objects.exists():
+            raise CommandError(
+                'Нет постов: сначала выполните manage.py generate_data.'
+            )
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)['routes']
+
+        user = self.benchmark_user()
+        routes = self.routes(user)
+        if options['routes']:
+            unknown = set(options['routes']) - {r.name for r in routes}
+            if unknown:
+                raise CommandError(f'Нет маршрутов: {", ".join(unknown)}')
+            routes = [r for r in routes if r.name in options['routes']]
+
+        def make_client():
+            client = Client(HTTP_HOST=options['host'])
+            client.force_login(user)
+            return client
+
+        try:
+            results = self.measure(routes, make_client, options)
+        finally:
+            # Посты и комментарии, созданные прогоном, не оставляем.
+            Post.objects.filter(author=user).delete()
+            Comment.objects.filter(author=user).delete()
+
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'options': {
+                        key: options[key]
+                        for key in (
+                            'concurrency', 'requests', 'host', 'server',
+                            'threads', 'client_delay',
+                        )
+                    },
+                    'routes': results,
+                }, file, ensure_ascii=False, indent=2)
+
+        if baseline is not None:
+            regressions = benchmark.find_regressions(
+                results, baseline, options['threshold']
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
+
+    def measure(self, routes, make_client, options):
+        results = {}
+        if 'client' in options['server']:
+            results.update(benchmark.run(
+                routes, make_client,
+                options['concurrency'], options['requests'],
+            ))
+        for server in ('wsgi', 'asgi'):
+            if server in options['server']:
+                results.update(self.run_server(
+                    server, routes, make_client(), options
+                ))
+        return results
+
+    def run_server(self, server, routes, client, options):
+        """Прогон GET-маршрутов через WSGI- или ASGI-приложение."""
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME]
+        headers = {
+            'Host': options['host'],
+            'Cookie': f'{cookie.key}={cookie.value}',
+        }
+        wsgi = WSGIHandler()
+        asgi = ASGIHandler(wsgi, threads=options['threads'])
+        results = {}
+        for route in routes:
+            if route.method != 'GET':
+                continue
+            levels = {}
+            for concurrency in options['concurrency']:
+                if server == 'wsgi':
+                    levels[str(concurrency)] = benchmark.run_wsgi(
+                        wsgi, route, concurrency, options['requests'],
+                        options['threads'], headers, options['client_delay'],
+                    )
+                else:
+                    levels[str(concurrency)] = benchmark.run_asgi(
+                        asgi, route, concurrency, options['requests'],
+                        headers, options['client_delay'],
+                    )
+            results[f'{route.name}:{server}'] = levels
+        asgi.executor.shutdown()
+        return results
+
+    def benchmark_user(self):
+        """Пользователь прогона, подписанный на самого активного автора."""
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USER)
+        author = User.objects.exclude(pk=user.pk).annotate(
+            posts_count=Count('posts')
+        ).order_by('-posts_count').first()
+        if author is not None:
+            Follow.objects.get_or_create(user=user, author=author)
+        return user
+
+    def routes(self, user):
+        post = Post.objects.select_related('author').order_by('-pk').first()
+        group = Group.objects.order_by('pk').first()
+        routes = [
+            Route('index', 'GET', reverse('posts:index')),
+            Route('profile', 'GET', reverse(
+                'posts:profile', args=[post.author.username]
+            )),
+            Route('follow', 'GET', reverse('posts:follow_index')),
+            Route('post_detail', 'GET', reverse(
+                'posts:post_detail', args=[post.pk]
+            )),
+            Route('post_create', 'POST', reverse('posts:post_create'), {
+                'text': 'Пост нагрузочного прогона',
+            }),
+            Route('add_comment', 'POST', reverse(
+                'posts:add_comment', args=[post.pk]
+            ), {'text': 'Комментарий нагрузочного прогона'}),
+        ]
+        if group is not None:
+            routes.insert(1, Route('group', 'GET', reverse(
+                'posts:group_posts', args=[group.slug]
+            )))
+        routes += [
+            Route('api_index', 'GET', reverse('api:v1:index')),
+            Route('api_follow', 'GET', reverse('api:v1:follow_posts')),
+            Route('api_post_detail', 'GET', reverse(
+                'api:v1:post_detail', args=[post.pk]
+            )),
+        ]
+        return routes
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"маршрут":<21} {"потоков":>7} {"p50":>8} {"p95":>8} '
+            f'{"p99":>8} {"rps":>8} {"sql":>6} {"sql ms":>8}'
+        )
+        for name, levels in results.items():
+            for level, s in levels.items():
+                # В прогонах wsgi и asgi SQL не считается.
+                sql = (
+                    f'{s["queries"]:>6.1f} {s["sql_ms"]:>8.2f}'
+                    if 'queries' in s else f'{"-":>6} {"-":>8}'
+                )
+                self.stdout.write(
+                    f'{name:<21} {level:>7} {s["p50"]:>8.2f} '
+                    f'{s["p95"]:>8.2f} {s["p99"]:>8.2f} '
+                    f'{s["throughput"]:>8.1f} {sql}'
+                )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.cache_server import CacheServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает локальный сервер кэша на протоколе Redis: общий L2 '
+        'для нескольких процессов без установленного Redis.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=6379)
+
+    def handle(self, *args, **options):
+        server = CacheServer((options['host'], options['port']))
+        host, port = server.server_address
+        self.stdout.write(f'Сервер кэша слушает {host}:{port}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import tasks
+from yatube.settings import TASK_POLL_INTERVAL, TASK_WORKERS
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди core_task в пуле потоков. '
+        'С --once выходит, когда готовых задач не осталось, с --stats '
+        'печатает число задач и время выполнения по именам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=TASK_WORKERS)
+        parser.add_argument(
+            '--poll-interval', type=float, default=TASK_POLL_INTERVAL
+        )
+        parser.add_argument('--once', action='store_true')
+        parser.add_argument('--stats', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(
+                tasks.stats(), ensure_ascii=False, indent=2
+            ))
+            return
+        worker = tasks.Worker(options['threads'], options['poll_interval'])
+        self.stdout.write(f'Воркер запущен, потоков: {worker.threads}')
+        try:
+            worker.work(once=options['once'])
+        except KeyboardInterrupt:
+            # Пул дожидается уже начатых задач.
+            worker.stop.set()
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {worker.done}, с ошибкой: {worker.failed}.'
+        ))
@@ -0,0 +1,155 @@
+"""Отдача загруженных файлов из MEDIA_ROOT.
+
+В отличие от django.views.static.serve поддерживает условные
+запросы (If-None-Match, If-Modified-Since), диапазоны байт (Range,
+If-Range) и долгий кэш: файлы с хэшем содержимого в имени
+(`name.0123456789ab.ext`) помечаются immutable. С MEDIA_SENDFILE
+Django только проверяет запрос и заголовки, а сам файл отдаёт
+веб-сервер по X-Sendfile (Apache, lighttpd) или X-Accel-Redirect
+(nginx), не занимая воркер приложения.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def etag_for(stat_result):
+    return quote_etag(f'{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}')
+
+
+def not_modified(request, etag, mtime):
+    """Есть ли у клиента актуальная копия."""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or f'W/{etag}' in tags
+    since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+    )
+    return since is not None and int(mtime) <= since
+
+
+def requested_range(request, size, etag, mtime):
+    """(начало, конец включительно) или None, если отдаём весь файл.
+
+    Поддерживается один диапазон: несколько диапазонов сервер вправе
+    проигнорировать и ответить целым файлом.
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or not any(match.groups()):
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and (
+        parse_http_date_safe(if_range) != int(mtime)
+    ):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # bytes=-N: последние N байт.
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def offloaded(path, name):
+    """Пустой ответ, тело которого отдаст веб-сервер."""
+    response = HttpResponse()
+    if settings.MEDIA_SENDFILE == 'x-sendfile':
+        response['X-Sendfile'] = path
+    else:
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + name
+    return response
+
+
+def file_response(request, path, size, etag, mtime):
+    """Весь файл или запрошенный диапазон байт."""
+    try:
+        byte_range = requested_range(request, size, etag, mtime)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        return FileResponse(open(path, 'rb'))
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        read_range(path, start, length), status=206
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = length
+    return response
+
+
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except OSError:
+        raise Http404('Файл не найден')
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404('Файл не найден')
+
+    size, mtime = stat_result.st_size, stat_result.st_mtime
+    etag = etag_for(stat_result)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': (
+            IMMUTABLE if HASHED_NAME.search(path)
+            else f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+        ),
+    }
+
+    if not_modified(request, etag, mtime):
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_SENDFILE:
+        response = offloaded(full_path, path)
+    else:
+        response = file_response(request, full_path, size, etag, mtime)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    if response.status_code not in (304, 416):
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        if encoding:
+            response['Content-Encoding'] = encoding
+    for header, value in headers.items():
+        response[header] = value
+    return response
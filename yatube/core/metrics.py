@@ -0,0 +1,247 @@
+"""Гистограммы времени ответа по view внутри процесса.
+
+Middleware кладёт сюда для каждого запроса полное время, время
+отрисовки шаблонов, число и время SQL-запросов, попадания и промахи
+кэша. Гистограммы с фиксированными корзинами: запись - это поиск
+корзины и пара сложений под блокировкой, память не растёт с числом
+запросов. Перцентили оцениваются по верхней границе корзины.
+
+Счётчики текущего запроса лежат в contextvar, а не в thread-local:
+если view выполняется в другом потоке, чем middleware (ASGI-сервер
+переносит контекст в поток вместе с вызовом), они не теряются.
+"""
+import threading
+from contextvars import ContextVar
+from bisect import bisect_left
+from collections import defaultdict
+from functools import wraps
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.base import Template
+
+# Корзины времени в миллисекундах: от 0.1 мс до минуты, шаг 25%.
+TIME_BUCKETS = tuple(round(0.1 * 1.25 ** power, 3) for power in range(60))
+COUNT_BUCKETS = (
+    0, 1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 30, 50, 100, 200, 500, 1000,
+)
+METRICS = {
+    'wall_ms': TIME_BUCKETS,
+    'template_ms': TIME_BUCKETS,
+    'sql_ms': TIME_BUCKETS,
+    'sql_queries': COUNT_BUCKETS,
+    'cache_hits': COUNT_BUCKETS,
+    'cache_misses': COUNT_BUCKETS,
+}
+
+_current = ContextVar('request_stats', default=None)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # Последняя корзина - для значений больше верхней границы.
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        if not self.count:
+            return 0.0
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.max)
+                return self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'mean': round(self.total / self.count, 3) if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': round(self.max, 3),
+        }
+
+
+class Registry:
+    """Гистограммы метрик по именам view."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(self._new_view)
+
+    @staticmethod
+    def _new_view():
+        return {
+            metric: Histogram(bounds) for metric, bounds in METRICS.items()
+        }
+
+    def record(self, view_name, values):
+        with self._lock:
+            histograms = self._views[view_name]
+            for metric, value in values.items():
+                histograms[metric].add(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view_name: {
+                    'requests': histograms['wall_ms'].count,
+                    **{
+                        metric: histogram.summary()
+                        for metric, histogram in histograms.items()
+                    },
+                }
+                for view_name, histograms in self._views.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = Registry()
+
+
+class RequestStats:
+    """Счётчики одного запроса, собираются в контексте запроса."""
+
+    def __init__(self):
+        self.template_ms = 0.0
+        self.sql_ms = 0.0
+        self.sql_queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_depth = 0
+        # BaseCache.get_many читает ключи через get, а TieredCache -
+        # через L2: считается только внешнее обращение.
+        self.in_cache_call = False
+
+    def values(self, wall_ms):
+        return {
+            'wall_ms': wall_ms,
+            'template_ms': self.template_ms,
+            'sql_ms': self.sql_ms,
+            'sql_queries': self.sql_queries,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def current():
+    """Счётчики текущего запроса или None вне запроса."""
+    return _current.get()
+
+
+def start():
+    stats = RequestStats()
+    _current.set(stats)
+    return stats
+
+
+def finish():
+    _current.set(None)
+
+
+def sql_timer(stats):
+    """execute_wrapper, который добавляет запросы в stats."""
+    def wrapper(execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats.sql_ms += (perf_counter() - started) * 1000
+            stats.sql_queries += 1
+    return wrapper
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        stats = current()
+        if stats is None:
+            return render(self, *args, **kwargs)
+        # Вложенные шаблоны ({% include %}) уже входят во время внешнего.
+        stats.template_depth += 1
+        started = perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_ms += (perf_counter() - started) * 1000
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _counted_get(get):
+    missing = object()
+
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        stats = current()
+        if stats is None or stats.in_cache_call:
+            return get(self, key, default, version=version)
+        stats.in_cache_call = True
+        try:
+            value = get(self, key, missing, version=version)
+        finally:
+            stats.in_cache_call = False
+        if value is missing:
+            stats.cache_misses += 1
+            return default
+        stats.cache_hits += 1
+        return value
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        keys = list(keys)
+        stats = current()
+        if stats is None or stats.in_cache_call:
+            return get_many(self, keys, version=version)
+        stats.in_cache_call = True
+        try:
+            found = get_many(self, keys, version=version)
+        finally:
+            stats.in_cache_call = False
+        stats.cache_hits += len(found)
+        stats.cache_misses += len(keys) - len(found)
+        return found
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _patch(cls, name, decorator):
+    method = getattr(cls, name)
+    if not getattr(method, 'instrumented', False):
+        setattr(cls, name, decorator(method))
+
+
+def instrument():
+    """Оборачивает отрисовку шаблонов и чтение кэшей.
+
+    Вызывается из CoreConfig.ready(). Вне запроса обёртки только
+    проверяют contextvar и вызывают исходный метод.
+    """
+    _patch(Template, 'render', _timed_render)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        _patch(backend, 'get', _counted_get)
+        _patch(backend, 'get_many', _counted_get_many)
@@ -0,0 +1,36 @@
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.db import connections
+
+from . import metrics
+
+
+class RequestStatsMiddleware:
+    """Собирает время, SQL и кэш каждого запроса в metrics.registry.
+
+    Метрики группируются по имени view из resolver_match, запросы,
+    которые не нашли маршрут, попадают под именем `unresolved`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.start()
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.sql_timer(stats))
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish()
+        wall_ms = (perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        metrics.registry.record(view_name, stats.values(wall_ms))
+        return response
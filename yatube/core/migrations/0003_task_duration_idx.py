@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-18 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_task_progress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['name', 'status', 'duration'], name='task_duration_idx'),
+        ),
+    ]
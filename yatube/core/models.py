@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -10,3 +11,63 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = (True, )
+
+
+class Task(models.Model):
+    """Задача фоновой очереди, её выполняет manage.py run_worker."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    arguments = models.TextField(
+        'Аргументы',
+        default='[[], {}]',
+        help_text='Позиционные и именованные аргументы в JSON'
+    )
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Попыток всего', default=1)
+    run_at = models.DateTimeField('Запустить не раньше', default=timezone.now)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    started = models.DateTimeField('Начало', null=True, blank=True)
+    finished = models.DateTimeField('Окончание', null=True, blank=True)
+    duration = models.FloatField(
+        'Длительность, мс',
+        null=True,
+        blank=True
+    )
+    error = models.TextField('Ошибка', blank=True)
+    progress = models.TextField(
+        'Ход выполнения',
+        blank=True,
+        help_text='Последний отчёт задачи о ходе работы в JSON'
+    )
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='task_queue_idx'
+            ),
+            models.Index(
+                fields=['name', 'status', 'duration'],
+                name='task_duration_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
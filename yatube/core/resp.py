@@ -0,0 +1,177 @@
+"""Протокол RESP (Redis Serialization Protocol), версия 2.
+
+Клиент без внешних зависимостей: им RespCache ходит в Redis или
+в manage.py cache_server, который говорит на том же протоколе.
+"""
+import socket
+import threading
+from urllib.parse import urlsplit
+
+
+class RespError(Exception):
+    """Ошибка, которую вернул сервер."""
+
+
+def encode_command(*args):
+    """Команда - массив bulk-строк."""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+def read_reply(file):
+    """Один ответ из файла сокета; ошибка сервера - исключение."""
+    line = file.readline()
+    if not line:
+        raise ConnectionError('Сервер закрыл соединение')
+    prefix, rest = line[:1], line[1:-2]
+    if prefix == b'+':
+        return rest.decode()
+    if prefix == b'-':
+        return RespError(rest.decode())
+    if prefix == b':':
+        return int(rest)
+    if prefix == b'$':
+        length = int(rest)
+        if length < 0:
+            return None
+        data = file.read(length + 2)
+        return data[:-2]
+    if prefix == b'*':
+        length = int(rest)
+        if length < 0:
+            return None
+        return [read_reply(file) for _ in range(length)]
+    raise RespError(f'Неизвестный ответ: {line!r}')
+
+
+def parse_url(url):
+    """(host, port, db) из redis://host:port/db."""
+    parts = urlsplit(url)
+    db = parts.path.strip('/')
+    return parts.hostname or '127.0.0.1', parts.port or 6379, int(db or 0)
+
+
+class Connection:
+    def __init__(self, host, port, db=0, timeout=None):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile('rb')
+        if db:
+            self.execute('SELECT', db)
+
+    def send(self, *commands):
+        self.sock.sendall(b''.join(
+            encode_command(*command) for command in commands
+        ))
+
+    def read(self):
+        reply = read_reply(self.file)
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def execute(self, *args):
+        self.send(args)
+        return self.read()
+
+    def pipeline(self, commands):
+        """Несколько команд за один обмен с сервером."""
+        self.send(*commands)
+        # Ответы читаются все, даже после ошибки: иначе следующий
+        # вызов получил бы чужие ответы.
+        replies = [read_reply(self.file) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def incr_existing(self, key, delta):
+        """INCRBY только для существующего ключа; None, если его нет.
+
+        Без WATCH ключ мог бы истечь между EXISTS и INCRBY, и INCRBY
+        создал бы его заново без срока жизни. С WATCH EXEC в таком
+        случае не выполняется, и проверка повторяется.
+        """
+        while True:
+            self.execute('WATCH', key)
+            if not self.execute('EXISTS', key):
+                self.execute('UNWATCH')
+                return None
+            *_, replies = self.pipeline(
+                [('MULTI',), ('INCRBY', key, delta), ('EXEC',)]
+            )
+            if replies is not None:
+                if isinstance(replies[0], RespError):
+                    raise replies[0]
+                return replies[0]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+class Client:
+    """Соединение на поток; оборванное переоткрывается один раз."""
+
+    def __init__(self, url, timeout=None):
+        self.host, self.port, self.db = parse_url(url)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def connect(self):
+        return Connection(self.host, self.port, self.db, self.timeout)
+
+    def _call(self, method, *args):
+        connection = getattr(self._local, 'connection', None)
+        # Переоткрываем только старое соединение: его мог закрыть
+        # перезапущенный сервер. Ошибка на новом - настоящая.
+        retry = connection is not None
+        while True:
+            if connection is None:
+                connection = self._local.connection = self.connect()
+            try:
+                return getattr(connection, method)(*args)
+            except OSError:
+                connection.close()
+                connection = self._local.connection = None
+                if not retry:
+                    raise
+                retry = False
+
+    def execute(self, *args):
+        return self._call('execute', *args)
+
+    def pipeline(self, commands):
+        return self._call('pipeline', commands)
+
+    def incr_existing(self, key, delta):
+        return self._call('incr_existing', key, delta)
+
+    def listen(self, channel, callback, stop):
+        """Подписка на канал; callback(data) на каждое сообщение.
+
+        Блокирует поток до stop.set(), после обрыва переподключается.
+        """
+        while not stop.is_set():
+            try:
+                # Без таймаута: подписчик может подолгу ждать сообщений.
+                connection = Connection(self.host, self.port, self.db)
+            except OSError:
+                stop.wait(1)
+                continue
+            try:
+                connection.execute('SUBSCRIBE', channel)
+                while not stop.is_set():
+                    kind, _, data = connection.read()
+                    if kind == b'message':
+                        callback(data)
+            except (OSError, ValueError):
+                stop.wait(1)
+            finally:
+                connection.close()
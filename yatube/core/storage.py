@@ -0,0 +1,20 @@
+from django.conf import settings
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Имена с хэшем содержимого плюс сжатые gzip и brotli копии.
+
+    Всё готовится один раз в collectstatic. С DEBUG, а также пока
+    статика не собрана вовсе (тесты, разработка), {% static %} отдаёт
+    исходные имена. Файл, которого нет в собранном манифесте, без DEBUG
+    - ошибка: иначе его адрес тихо ушёл бы без хэша и сжатия.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if settings.DEBUG or not self.hashed_files:
+                return name
+            raise
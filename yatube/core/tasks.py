@@ -0,0 +1,269 @@
+"""Фоновые задачи в таблице core_task.
+
+Функция, помеченная @task, ставится в очередь вызовом
+func.delay(*args, **kwargs): в базе появляется строка Task, а view
+сразу отвечает. Строка пишется в той же транзакции, что и данные
+запроса, поэтому задача не увидит незафиксированных изменений и не
+потеряется при откате. Задачи выполняет manage.py run_worker в пуле
+потоков; воркеров можно запустить несколько, задачу забирает тот,
+чей UPDATE сменил её состояние первым. Упавшая задача повторяется
+с растущей паузой, пока не кончатся попытки.
+
+Аргументы задач хранятся в JSON, поэтому передавать нужно
+идентификаторы и строки, а не объекты моделей. Долгая задача может
+сообщать о ходе работы через report_progress(). Задачи с секретами
+в аргументах помечаются @task(sensitive=True): их выполненные строки
+удаляются сразу, а у окончательно упавших стираются аргументы.
+"""
+import json
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from math import ceil
+from time import perf_counter
+
+from django.db import connection
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from yatube.settings import (
+    TASK_KEEP_FINISHED, TASK_MAX_ATTEMPTS, TASK_POLL_INTERVAL,
+    TASK_RETRY_DELAY, TASK_STALE_AFTER, TASK_WORKERS,
+)
+from . import metrics
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+_current = threading.local()
+
+
+def task(func=None, *, name=None, max_attempts=TASK_MAX_ATTEMPTS,
+         sensitive=False):
+    """Регистрирует функцию как задачу и добавляет ей delay()."""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = func
+        func.task_name = task_name
+        func.sensitive = sensitive
+        func.delay = lambda *args, **kwargs: enqueue(
+            task_name, args, kwargs, max_attempts
+        )
+        return func
+
+    return decorator(func) if func else decorator
+
+
+def enqueue(name, args=(), kwargs=None, max_attempts=TASK_MAX_ATTEMPTS):
+    return Task.objects.create(
+        name=name,
+        arguments=json.dumps([list(args), kwargs or {}]),
+        max_attempts=max_attempts,
+    )
+
+
+def claim(limit):
+    """Забирает до limit готовых к запуску задач."""
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now
+    ).values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in candidates:
+        # Задачу мог забрать другой воркер между SELECT и UPDATE.
+        if Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING, started=now, attempts=F('attempts') + 1
+        ):
+            claimed.append(pk)
+    return claimed
+
+
+def is_sensitive(name):
+    return getattr(registry.get(name), 'sensitive', False)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=TASK_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _call(task):
+    """Выполняет задачу, считая её SQL как у запросов в metrics."""
+    func = registry.get(task.name)
+    if func is None:
+        raise LookupError(f'Задача {task.name} не зарегистрирована')
+    args, kwargs = json.loads(task.arguments)
+    stats = metrics.start()
+    _current.task_id = task.pk
+    try:
+        with connection.execute_wrapper(metrics.sql_timer(stats)):
+            func(*args, **kwargs)
+    finally:
+        _current.task_id = None
+        metrics.finish()
+    return stats
+
+
+def report_progress(**progress):
+    """Записывает ход выполнения текущей задачи в Task.progress.
+
+    Вне задачи (например, при вызове функции напрямую) ничего не
+    делает.
+    """
+    task_id = getattr(_current, 'task_id', None)
+    if task_id is not None:
+        Task.objects.filter(pk=task_id).update(
+            progress=json.dumps(progress, ensure_ascii=False)
+        )
+
+
+def run(pk):
+    """Выполняет забранную задачу и записывает исход."""
+    task = Task.objects.get(pk=pk)
+    started = perf_counter()
+    try:
+        stats = _call(task)
+    except Exception:
+        logger.exception('Задача %s (%s) упала', task.name, pk)
+        finished = timezone.now()
+        update = {
+            'error': traceback.format_exc(),
+            'duration': (perf_counter() - started) * 1000,
+        }
+        if task.attempts < task.max_attempts:
+            update.update(
+                status=Task.QUEUED,
+                run_at=finished + retry_delay(task.attempts),
+            )
+        else:
+            update.update(status=Task.FAILED, finished=finished)
+            if is_sensitive(task.name):
+                update.update(arguments='[[], {}]')
+        Task.objects.filter(pk=pk).update(**update)
+        return False
+    wall_ms = (perf_counter() - started) * 1000
+    if is_sensitive(task.name):
+        Task.objects.filter(pk=pk).delete()
+    else:
+        Task.objects.filter(pk=pk).update(
+            status=Task.DONE, finished=timezone.now(), duration=wall_ms,
+            error='',
+        )
+    metrics.registry.record(f'task:{task.name}', stats.values(wall_ms))
+    return True
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, чей воркер, видимо, умер.
+
+    Задача, у которой кончились попытки, считается упавшей: иначе
+    задача, роняющая воркер, повторялась бы без конца.
+    """
+    now = timezone.now()
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        started__lt=now - timedelta(seconds=TASK_STALE_AFTER),
+    )
+    error = 'Воркер не завершил задачу'
+    exhausted = stale.filter(attempts__gte=F('max_attempts'))
+    # Аргументы секретных задач стираются, как в run().
+    exhausted.filter(
+        name__in=[name for name in registry if is_sensitive(name)]
+    ).update(arguments='[[], {}]')
+    exhausted.update(status=Task.FAILED, finished=now, error=error)
+    return stale.update(status=Task.QUEUED, run_at=now, error=error)
+
+
+def purge():
+    """Удаляет давно выполненные задачи и выполненные секретные."""
+    sensitive = [name for name in registry if is_sensitive(name)]
+    deleted, _ = Task.objects.filter(
+        Q(finished__lt=timezone.now() - timedelta(
+            seconds=TASK_KEEP_FINISHED
+        )) | Q(name__in=sensitive),
+        status=Task.DONE,
+    ).delete()
+    return deleted
+
+
+def stats():
+    """Число задач по состояниям и время выполненных по именам.
+
+    Всё считается в базе: среднее и максимум - агрегатами, перцентили -
+    выборкой одной строки по индексу (name, status, duration).
+    """
+    result = {}
+    counts = Task.objects.order_by().values('name', 'status').annotate(
+        count=Count('pk')
+    )
+    for row in counts:
+        result.setdefault(row['name'], {})[row['status']] = row['count']
+    done = Task.objects.filter(status=Task.DONE, duration__isnull=False)
+    summaries = done.order_by().values('name').annotate(
+        count=Count('pk'), mean=Avg('duration'), max=Max('duration')
+    )
+    for row in summaries:
+        durations = done.filter(name=row['name']).order_by(
+            'duration'
+        ).values_list('duration', flat=True)
+        summary = {'mean': round(row['mean'], 3)}
+        for percent in (50, 95, 99):
+            rank = ceil(row['count'] * percent / 100) - 1
+            summary[f'p{percent}'] = durations[rank]
+        summary['max'] = round(row['max'], 3)
+        result[row['name']]['wall_ms'] = summary
+    return result
+
+
+class Worker:
+    """Забирает задачи из очереди и выполняет их в пуле потоков."""
+
+    def __init__(self, threads=TASK_WORKERS,
+                 poll_interval=TASK_POLL_INTERVAL):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.stop = threading.Event()
+        self.running = 0
+        self.lock = threading.Lock()
+        self.done = self.failed = 0
+
+    def _run(self, pk):
+        ok = False
+        try:
+            ok = run(pk)
+        except Exception:
+            # Например, база занята: задачу вернёт requeue_stale.
+            logger.exception('Не удалось записать исход задачи %s', pk)
+        finally:
+            # У каждого потока пула своё соединение с базой.
+            connection.close()
+        with self.lock:
+            self.running -= 1
+            self.done += ok
+            self.failed += not ok
+
+    def work(self, once=False):
+        """Выполняет задачи до stop или, с once, пока есть готовые."""
+        autodiscover_modules('tasks')
+        requeue_stale()
+        purge()
+        with ThreadPoolExecutor(
+            self.threads, thread_name_prefix='task-worker'
+        ) as pool:
+            while not self.stop.is_set():
+                with self.lock:
+                    free = self.threads - self.running
+                claimed = claim(free) if free else []
+                with self.lock:
+                    self.running += len(claimed)
+                for pk in claimed:
+                    pool.submit(self._run, pk)
+                if claimed:
+                    continue
+                if once and not self.running:
+                    break
+                self.stop.wait(self.poll_interval)
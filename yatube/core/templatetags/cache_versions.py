@@ -0,0 +1,17 @@
+from django import template
+
+from core.caching import get_versions
+from yatube.settings import CACHE_TIMEOUT
+
+register = template.Library()
+
+
+@register.simple_tag
+def cache_timeout():
+    return CACHE_TIMEOUT
+
+
+@register.simple_tag
+def version(namespace, pk):
+    """Версия данных одного объекта, например автора поста."""
+    return get_versions(f'{namespace}:{pk}')[0]
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = 'core'
+
+urlpatterns = [
+    path('stats/', views.request_stats, name='request_stats'),
+]
@@ -1,7 +1,12 @@
 from http import HTTPStatus
 
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import tasks
+from .metrics import registry
+
 
 def page_not_found(request, exception):
     return render(request,
@@ -26,3 +31,22 @@ def server_error(request):
                   'core/500.html',
                   {'path': request.path},
                   status=HTTPStatus.INTERNAL_SERVER_ERROR)
+
+
+@staff_member_required
+def request_stats(request):
+    """Гистограммы RequestStatsMiddleware этого процесса.
+
+    View отсортированы по суммарному времени ответов: сверху те,
+    что обходятся дороже всего. Рядом - сводка очереди задач.
+    """
+    views = registry.snapshot()
+    ordered = sorted(
+        views.items(),
+        key=lambda item: item[1]['wall_ms']['mean'] * item[1]['requests'],
+        reverse=True,
+    )
+    return JsonResponse(
+        {'views': dict(ordered), 'tasks': tasks.stats()},
+        json_dumps_params={'ensure_ascii': False}
+    )
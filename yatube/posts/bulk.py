@@ -0,0 +1,49 @@
+"""Помощники массовой записи."""
+from django.db import connection
+from django.db.models import AutoField, Max
+
+
+def insert(model, objs, ignore_conflicts=False):
+    """bulk_create, который сохраняет даты объектов как есть.
+
+    Строки вставляются в режиме raw, как у loaddata: pre_save полей не
+    вызывается, поэтому auto_now и auto_now_add не подменяют даты, а
+    сами поля модели (общие для всех потоков) не меняются. Пачки -
+    по пределу параметров запроса базы, как у bulk_create.
+    """
+    objs = list(objs)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not isinstance(field, AutoField)
+    ]
+    batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+    for start in range(0, len(objs), batch_size):
+        model._base_manager._insert(
+            objs[start:start + batch_size], fields=fields, raw=True,
+            ignore_conflicts=ignore_conflicts,
+        )
+    return len(objs)
+
+
+def created_ids(model, create):
+    """Создаёт строки и возвращает их первичные ключи по порядку.
+
+    bulk_create на SQLite не проставляет pk созданным объектам,
+    поэтому они читаются как ключи больше прежнего максимума.
+    Подходит, пока в таблицу пишет только этот процесс: если новых
+    ключей не столько, сколько вернул create(), их не с чем
+    сопоставить, и это ошибка.
+    """
+    before = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    created = create()
+    ids = list(
+        model.objects.filter(pk__gt=before)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+    if len(ids) != created:
+        raise RuntimeError(
+            f'{model._meta.label}: создано {created} строк, а новых '
+            f'ключей {len(ids)}; в таблицу писал кто-то ещё'
+        )
+    return ids
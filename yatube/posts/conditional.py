@@ -0,0 +1,66 @@
+"""ETag для условных GET-запросов страниц постов.
+
+ETag собирается из того, что уже поддерживается при записи, без
+агрегатов по постам и комментариям: версии кэша страниц
+(core.caching), которые сигналы сдвигают при любом изменении постов,
+групп, комментариев и имени автора, и счётчики UserStats. Из базы
+читается одна строка по уникальному индексу: она же говорит, есть
+ли объект. К этому добавляются зритель (шапка и кнопки владельца
+у каждого свои), адрес с курсором и, для авторизованного, cookie
+CSRF: формы на странице несут токен, а вход в систему меняет
+секрет, и копия со старым токеном не должна подтверждаться.
+Last-Modified не отдаём: по одной дате нельзя заметить удаление, и
+клиент с одним If-Modified-Since получил бы устаревшую страницу.
+"""
+import hashlib
+
+from django.conf import settings
+
+from core.caching import get_versions
+from .models import Group, Post, User
+
+
+def make_etag(request, *parts):
+    """None, если объекта нет: тогда view ответит 404 как обычно."""
+    if parts[0] is None:
+        return None
+    user = request.user
+    viewer, csrf = 'anon', ''
+    if user.is_authenticated:
+        viewer = user.pk
+        csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    source = '|'.join(map(str, (
+        viewer, csrf, request.get_full_path(), *parts
+    )))
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def group_etag(request, slug):
+    state = Group.objects.filter(slug=slug).values_list('pk').first()
+    return make_etag(
+        request, state, *get_versions('posts', 'groups', 'comments')
+    )
+
+
+def profile_etag(request, username):
+    state = (
+        User.objects.filter(username=username)
+        .values_list(
+            'pk', 'stats__followers_count', 'stats__following_count'
+        )
+        .first()
+    )
+    return make_etag(request, state, *get_versions('posts', 'comments'))
+
+
+def post_etag(request, post_id):
+    state = (
+        Post.objects.filter(pk=post_id)
+        .values_list('updated', 'author_id', 'author__stats__posts_count')
+        .first()
+    )
+    if state is None:
+        return None
+    return make_etag(request, state, *get_versions(
+        'groups', 'comments', f'user:{state[1]}'
+    ))
@@ -0,0 +1,92 @@
+"""Кэшированные счётчики постов для паджинаторов.
+
+Число постов ленты хранится в кэше и меняется на ±1 сигналами
+создания и удаления постов. Ключ живёт не дольше
+PAGINATOR_COUNT_TIMEOUT, после чего число пересчитывается:
+это ограничивает расхождение, если инкремент потерялся.
+Ленту подписок инкрементально не ведём: её счётчик просто
+пересчитывается по таймауту и сбрасывается при подписке и отписке.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+
+from yatube.settings import PAGINATOR_COUNT_TIMEOUT
+from .models import Post
+
+COUNT_KEY = 'feed_count:{}'
+
+
+def _group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def _follow_scope(user_id):
+    return f'follow:{user_id}'
+
+
+def cached_count(scope, posts):
+    """Число постов из кэша; при промахе - COUNT(*) и запись в кэш."""
+    key = COUNT_KEY.format(scope)
+    count = cache.get(key)
+    if count is None:
+        count = posts.count()
+        cache.add(key, count, PAGINATOR_COUNT_TIMEOUT)
+    return count
+
+
+def adjust(scope, delta):
+    """Сдвинуть счётчик, если он сейчас в кэше."""
+    try:
+        cache.incr(COUNT_KEY.format(scope), delta)
+    except ValueError:
+        pass
+
+
+def reset(scope):
+    cache.delete(COUNT_KEY.format(scope))
+
+
+def index_count():
+    return cached_count('all', Post.objects.all())
+
+
+def group_count(group):
+    return cached_count(
+        _group_scope(group.pk), Post.objects.filter(group=group)
+    )
+
+
+def follow_count(user, posts):
+    return cached_count(_follow_scope(user.pk), posts)
+
+
+def post_added(post):
+    adjust('all', 1)
+    if post.group_id:
+        adjust(_group_scope(post.group_id), 1)
+
+
+def post_removed(post):
+    adjust('all', -1)
+    if post.group_id:
+        adjust(_group_scope(post.group_id), -1)
+
+
+def posts_removed(group_ids):
+    """Массовое удаление: group_ids - группы удалённых постов."""
+    adjust('all', -len(group_ids))
+    for group_id, count in Counter(group_ids).items():
+        if group_id:
+            adjust(_group_scope(group_id), -count)
+
+
+def post_regrouped(old_group_id, new_group_id):
+    if old_group_id:
+        adjust(_group_scope(old_group_id), -1)
+    if new_group_id:
+        adjust(_group_scope(new_group_id), 1)
+
+
+def follow_changed(user_id):
+    reset(_follow_scope(user_id))
@@ -0,0 +1,186 @@
+"""Удаление постов и пользователей пачками.
+
+QuerySet.delete() сначала собирает в память все зависимые строки
+(комментарии, записи лент, подписки) и шлёт сигналы по каждой, а
+SQLite всё это время держит блокировку записи. Здесь строки
+удаляются пачками по DELETION_BATCH_SIZE, каждая в своей короткой
+транзакции и без сборщика: сначала то, что ссылается на посты, затем
+сами посты, затем подписки и пользователь. То, что делали сигналы
+(UserStats, счётчики лент, поисковый индекс, версии кэша),
+правится одним запросом на пачку. Файлы картинок и миниатюр
+удаляются после фиксации своей пачки, если их не использует другой
+пост.
+
+Прерванное удаление можно запустить заново: оно продолжит с того,
+что осталось. Ход работы передаётся в report(счётчики) после
+каждой пачки.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+
+from core.caching import bump_version
+from yatube.settings import DELETION_BATCH_SIZE
+from . import counters, search, thumbnails, timeline
+from .models import Comment, Follow, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+class Progress(Counter):
+    """Сколько строк и файлов удалено, по видам."""
+
+    def __init__(self, report=None):
+        super().__init__()
+        self.report = report
+
+    def add(self, kind, count):
+        self[kind] += count
+        if self.report is not None:
+            self.report(**self)
+
+
+def _raw_delete(model, pks):
+    """DELETE по первичным ключам без сборщика и сигналов."""
+    queryset = model.objects.filter(pk__in=pks)
+    return queryset._raw_delete(queryset.db)
+
+
+def _decrement(field, counts):
+    """Вычесть из счётчиков UserStats: counts - {user_id: n}."""
+    for user_id, count in counts.items():
+        UserStats.objects.filter(user_id=user_id).update(
+            **{field: F(field) - count}
+        )
+
+
+def _batches(queryset, fields, batch_size):
+    """Первые batch_size строк, пока они есть.
+
+    Смещение не нужно: каждая пачка удаляется до чтения следующей.
+    """
+    queryset = queryset.order_by('pk').values_list('pk', *fields)
+    while True:
+        batch = list(queryset[:batch_size])
+        if not batch:
+            return
+        yield batch
+
+
+def delete_comments(comments, progress, batch_size=DELETION_BATCH_SIZE):
+    deleted = 0
+    for batch in _batches(comments, ['author_id'], batch_size):
+        with transaction.atomic():
+            _raw_delete(Comment, [pk for pk, _ in batch])
+            _decrement('comments_count', Counter(
+                author_id for _, author_id in batch
+            ))
+        deleted += len(batch)
+        progress.add('comments', len(batch))
+    if deleted:
+        bump_version('comments')
+
+
+def delete_timeline(entries, progress, batch_size=DELETION_BATCH_SIZE):
+    for batch in _batches(entries, [], batch_size):
+        _raw_delete(TimelineEntry, [pk for pk, in batch])
+        progress.add('timeline', len(batch))
+
+
+def _delete_files(names, progress):
+    for name in names:
+        default_storage.delete(name)
+    progress.add('files', len(names))
+
+
+def _unused_files(batch):
+    """Файлы удалённых постов, на которые не ссылаются другие посты.
+
+    import_data даёт постам с одной исходной картинкой один файл, а
+    миниатюры называются по картинке, поэтому общие файлы остаются.
+    """
+    images = {row[3] for row in batch if row[3]}
+    shared = set(
+        Post.objects.filter(image__in=images)
+        .values_list('image', flat=True)
+    )
+    names = set()
+    for _, _, _, image, thumbnail_urls in batch:
+        if image in shared:
+            continue
+        if image:
+            names.add(image)
+        names.update(thumbnails.stored_names(thumbnail_urls))
+    return names
+
+
+def delete_posts(posts, report=None, batch_size=DELETION_BATCH_SIZE):
+    """Удаляет посты queryset вместе с комментариями и файлами."""
+    progress = Progress(report)
+    fields = ['author_id', 'group_id', 'image', 'thumbnails']
+    for batch in _batches(posts, fields, batch_size):
+        pks = [row[0] for row in batch]
+        delete_comments(
+            Comment.objects.filter(post_id__in=pks), progress, batch_size
+        )
+        delete_timeline(
+            TimelineEntry.objects.filter(post_id__in=pks),
+            progress, batch_size,
+        )
+        with transaction.atomic():
+            search.remove_posts(pks)
+            _raw_delete(Post, pks)
+            _decrement('posts_count', Counter(row[1] for row in batch))
+        counters.posts_removed([row[2] for row in batch])
+        bump_version('posts')
+        progress.add('posts', len(batch))
+
+        _delete_files(_unused_files(batch), progress)
+    return progress
+
+
+def delete_follows(follows, progress, batch_size=DELETION_BATCH_SIZE):
+    """Удаляет подписки; ленты подписчиков чистит вызывающий."""
+    for batch in _batches(follows, ['user_id', 'author_id'], batch_size):
+        removed = Counter(author_id for _, _, author_id in batch)
+        with transaction.atomic():
+            _raw_delete(Follow, [pk for pk, _, _ in batch])
+            _decrement('following_count', Counter(
+                user_id for _, user_id, _ in batch
+            ))
+            _decrement('followers_count', removed)
+            for author_id, count in removed.items():
+                timeline.followers_dropped(author_id, count)
+        for user_id in {user_id for _, user_id, _ in batch}:
+            counters.follow_changed(user_id)
+        progress.add('follows', len(batch))
+
+
+def delete_user(user_id, report=None, batch_size=DELETION_BATCH_SIZE):
+    """Удаляет пользователя со всеми постами, комментариями и подписками.
+
+    Когда тяжёлые связи удалены, сам пользователь удаляется обычным
+    delete(): оставшиеся зависимости (UserStats, журнал админки)
+    невелики.
+    """
+    progress = delete_posts(
+        Post.objects.filter(author_id=user_id), report, batch_size
+    )
+    delete_comments(
+        Comment.objects.filter(author_id=user_id), progress, batch_size
+    )
+    delete_follows(
+        Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id)),
+        progress, batch_size,
+    )
+    # Записей с постами пользователя в чужих лентах уже нет,
+    # остаётся его собственная лента.
+    delete_timeline(
+        TimelineEntry.objects.filter(user_id=user_id), progress, batch_size
+    )
+    User.objects.filter(pk=user_id).delete()
+    progress.add('users', 1)
+    return progress
@@ -0,0 +1,145 @@
+"""Потоковая выгрузка постов и комментариев в NDJSON или CSV.
+
+Строки читаются через values().iterator(chunk_size): база отдаёт их
+пачками, модели не создаются, и память не растёт с числом строк.
+Выгрузку в NDJSON принимает обратно manage.py import_data.
+"""
+import csv
+import json
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, Post
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Поле выгрузки: путь в values(). Автор и группа выгружаются
+# по username и slug, чтобы их можно было сопоставить при импорте.
+KINDS = {
+    'posts': (Post, {
+        'id': 'id',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'image': 'image',
+    }),
+    'comments': (Comment, {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'pub_date': 'pub_date',
+    }),
+}
+FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def parse_moment(value):
+    """Момент из ISO-строки; дата без времени - её полночь."""
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = day and datetime.combine(day, time.min)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ExportError(f'Неверная дата: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def rows(kind, author=None, group=None, since=None, until=None,
+         chunk_size=EXPORT_CHUNK_SIZE):
+    """Строки выгрузки одного вида по порядку первичного ключа.
+
+    since включительно, until - не включая; группа для комментариев -
+    группа их поста.
+    """
+    model, fields = KINDS[kind]
+    queryset = model.objects.order_by('pk')
+    if author:
+        queryset = queryset.filter(author__username=author)
+    if group:
+        group_path = 'group__slug' if model is Post else 'post__group__slug'
+        queryset = queryset.filter(**{group_path: group})
+    since, until = parse_moment(since), parse_moment(until)
+    if since:
+        queryset = queryset.filter(pub_date__gte=since)
+    if until:
+        queryset = queryset.filter(pub_date__lt=until)
+
+    names = list(fields)
+    for values in queryset.values_list(*fields.values()).iterator(
+        chunk_size=chunk_size
+    ):
+        yield dict(zip(names, values))
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def ndjson_lines(kinds, **filters):
+    for kind in kinds:
+        for row in rows(kind, **filters):
+            yield json.dumps(
+                {'type': kind, **row}, ensure_ascii=False, default=_text
+            ) + '\n'
+
+
+def csv_lines(kinds, **filters):
+    """CSV одного вида: у постов и комментариев разные колонки."""
+    kind, = kinds
+    writer = csv.writer(Echo())
+    yield writer.writerow(list(KINDS[kind][1]))
+    for row in rows(kind, **filters):
+        yield writer.writerow([_text(value) for value in row.values()])
+
+
+def lines(export_format, kinds=None, **filters):
+    """Генератор строк выгрузки; ошибки в параметрах - сразу.
+
+    Без kinds выгружается всё, а в CSV - посты.
+    """
+    if export_format not in FORMATS:
+        raise ExportError(f'Неизвестный формат: {export_format}')
+    if not kinds:
+        kinds = ['posts'] if export_format == 'csv' else list(KINDS)
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise ExportError(f'Неизвестный вид строк: {", ".join(unknown)}')
+    for moment in (filters.get('since'), filters.get('until')):
+        parse_moment(moment)
+    if export_format == 'csv':
+        if len(kinds) != 1:
+            raise ExportError(
+                'CSV выгружает один вид строк: posts или comments.'
+            )
+        return csv_lines(kinds, **filters)
+    return ndjson_lines(kinds, **filters)
@@ -0,0 +1,58 @@
+"""Запросы лент постов.
+
+Все ленты строятся через feed_queryset: автор и группа подтягиваются
+тем же запросом, загружаются только поля, нужные карточке поста,
+а число комментариев считается подзапросом только для постов
+текущей страницы. Ленту подписок листает TimelinePaginator по
+index_feed(): страницу отбирает материализованная лента.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Post
+
+FEED_FIELDS = (
+    'text',
+    'pub_date',
+    'updated',
+    'image',
+    'thumbnails',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__slug',
+    'group__title',
+)
+
+
+def comments_count():
+    """Подзапрос с числом комментариев поста."""
+    counts = (
+        Comment.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def feed_queryset(posts):
+    """Добавляет к постам проекцию и аннотации для карточек ленты."""
+    return (
+        posts.select_related('author', 'group')
+        .only(*FEED_FIELDS)
+        .annotate(comments_count=comments_count())
+    )
+
+
+def index_feed():
+    return feed_queryset(Post.objects.all())
+
+
+def group_feed(group):
+    return feed_queryset(Post.objects.filter(group=group))
+
+
+def profile_feed(author):
+    return feed_queryset(Post.objects.filter(author=author))
@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from yatube.settings import THUMBNAIL_WORKERS
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Нарезает миниатюры для уже загруженных картинок постов '
+        '(MEDIA_ROOT/posts/). По умолчанию только для постов без '
+        'миниатюр, с --all - для всех.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перерезать и уже готовые миниатюры.',
+        )
+        parser.add_argument('--workers', type=int, default=THUMBNAIL_WORKERS)
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(thumbnails='')
+        post_ids = posts.values_list('pk', flat=True)
+
+        started = time.perf_counter()
+        done = failed = 0
+        last_id = 0
+        with ThreadPoolExecutor(options['workers']) as pool:
+            # С одним потоком режем прямо в потоке команды.
+            generate_all = (
+                partial(pool.map, self.generate_in_pool)
+                if options['workers'] > 1 else partial(map, self.generate)
+            )
+            while True:
+                batch = list(
+                    post_ids.filter(pk__gt=last_id)[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1]
+                for ok in generate_all(batch):
+                    done += ok
+                    failed += not ok
+                self.stdout.write(
+                    f'Готово: {done}, ошибок: {failed}, '
+                    f'{done / (time.perf_counter() - started):.1f} поста/с'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры нарезаны для постов: {done}, ошибок: {failed}.'
+        ))
+
+    def generate(self, post_id):
+        try:
+            thumbnails.generate(post_id)
+            return True
+        except Exception as error:
+            self.stderr.write(f'Пост {post_id}: {error}')
+            return False
+
+    def generate_in_pool(self, post_id):
+        try:
+            return self.generate(post_id)
+        finally:
+            # У каждого потока пула своё соединение с базой.
+            connection.close()
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import deletion, tasks
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователя с постами, комментариями, подписками и '
+        'картинками пачками по DELETION_BATCH_SIZE. По умолчанию ставит '
+        'задачу в очередь run_worker, с --now удаляет сразу и печатает '
+        'ход работы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--now', action='store_true')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден'
+            )
+        if not options['now']:
+            task = tasks.delete_user.delay(user.pk)
+            self.stdout.write(self.style.SUCCESS(
+                f'Удаление поставлено в очередь, задача {task.pk}.'
+            ))
+            return
+
+        def report(**progress):
+            self.stdout.write(', '.join(
+                f'{kind}: {count}' for kind, count in progress.items()
+            ))
+
+        progress = deletion.delete_user(user.pk, report=report)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователь {user.username} удалён, '
+            f'постов: {progress["posts"]}, '
+            f'комментариев: {progress["comments"]}.'
+        ))
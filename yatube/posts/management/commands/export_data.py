@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты и комментарии в NDJSON или CSV. '
+        'CSV выгружает один вид строк за раз.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=export.FORMATS, default='ndjson'
+        )
+        parser.add_argument(
+            '--kind', choices=list(export.KINDS), action='append',
+            help='posts и/или comments, по умолчанию - всё, в CSV - posts.',
+        )
+        parser.add_argument('--author', help='username автора.')
+        parser.add_argument('--group', help='slug группы.')
+        parser.add_argument('--since', help='С даты (ISO), включительно.')
+        parser.add_argument('--until', help='По дату (ISO), не включая.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=export.EXPORT_CHUNK_SIZE
+        )
+        parser.add_argument('--output', help='Файл, по умолчанию stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            lines = export.lines(
+                options['format'],
+                options['kind'],
+                author=options['author'],
+                group=options['group'],
+                since=options['since'],
+                until=options['until'],
+                chunk_size=options['chunk_size'],
+            )
+        except export.ExportError as error:
+            raise CommandError(error)
+
+        if options['output']:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as file:
+                file.writelines(lines)
+        else:
+            self.stdout.ending = ''
+            for line in lines:
+                self.stdout.write(line)
@@ -0,0 +1,126 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from yatube.settings import LIMIT_POSTS
+from posts import feeds, timeline
+from posts.models import (
+    Comment, Follow, Group, Post, TimelineEntry, User,
+)
+from posts.paginator import CursorPaginator
+
+INDEXED_MODELS = (Post, Comment, Follow, TimelineEntry)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы и время запросов лент. С --compare те же '
+        'запросы выполняются ещё и без составных индексов (в '
+        'откатываемой транзакции). Большой набор данных для '
+        'сравнения создаёт manage.py generate_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--depth', type=int, default=500,
+            help='Номер страницы ленты, с которой читаем.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз выполнять запрос, берётся лучшее время.',
+        )
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='Сравнить с планами без составных индексов.',
+        )
+
+    def handle(self, *args, **options):
+        if not Post.objects.exists():
+            self.stderr.write('Нет постов: сначала создайте данные.')
+            return
+        queries = self.access_paths(options['depth'])
+        self.repeat = options['repeat']
+
+        self.report('С индексами', queries)
+        if options['compare']:
+            # Новое соединение: у SQLite EXPLAIN из кэша подготовленных
+            # запросов не замечает удалённых индексов.
+            connection.close()
+            try:
+                with transaction.atomic():
+                    self.drop_indexes()
+                    self.report('Без составных индексов', queries)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def access_paths(self, depth):
+        """Запросы, которые выполняют ленты и раскладка постов."""
+        anchor = (
+            Post.objects.order_by('-pub_date', '-pk')
+            .only('pk', 'pub_date')[(depth - 1) * LIMIT_POSTS:]
+            .first()
+        ) or Post.objects.order_by('pub_date', 'pk').first()
+        group = Group.objects.annotate(
+            posts_count=Count('posts')
+        ).order_by('-posts_count').first()
+        author = User.objects.annotate(
+            posts_count=Count('posts')
+        ).order_by('-posts_count').first()
+        commented = Comment.objects.values_list('post_id', flat=True).first()
+        reader = TimelineEntry.objects.values_list(
+            'user_id', flat=True
+        ).first()
+
+        def page(posts):
+            return CursorPaginator(posts, LIMIT_POSTS).forward_queryset(
+                anchor.pub_date, anchor.pk
+            )
+
+        queries = {
+            'index': page(feeds.index_feed()),
+            'profile': page(feeds.profile_feed(author)),
+            'follow fan-out': Follow.objects.filter(
+                author=author
+            ).values_list('user_id', flat=True),
+        }
+        if group is not None:
+            queries['group'] = page(feeds.group_feed(group))
+        if reader is not None:
+            queries['follow timeline'] = timeline.keyset(
+                TimelineEntry.objects.filter(user_id=reader), 'post_id',
+                anchor.pub_date, anchor.pk,
+            )[:LIMIT_POSTS + 1]
+        if commented is not None:
+            queries['comments'] = Comment.objects.filter(
+                post_id=commented
+            ).order_by('-pub_date')
+        return queries
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    cursor.execute(
+                        f'DROP INDEX {connection.ops.quote_name(index.name)}'
+                    )
+
+    def report(self, title, queries):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in queries.items():
+            elapsed = min(self.timed(queryset) for _ in range(self.repeat))
+            self.stdout.write(f'{name}: {elapsed * 1000:.2f} ms')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
+
+    @staticmethod
+    def timed(queryset):
+        started = time.perf_counter()
+        list(queryset.all())
+        return time.perf_counter() - started
@@ -0,0 +1,217 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import search, timeline
+from posts.bulk import created_ids, insert
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+WORDS = (
+    'утро вечер город река лес дорога книга письмо музыка кофе друг '
+    'работа отпуск поезд море небо солнце дождь снег ветер окно дом '
+    'сегодня вчера завтра снова опять наконец внезапно тихо громко '
+    'думаю помню вижу читаю пишу слушаю иду жду люблю знаю'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, '
+        'постами, подписками и комментариями для нагрузочных замеров. '
+        'Популярность авторов и постов распределена по степенному '
+        'закону, данные воспроизводимы при одинаковых --seed и --now.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок на пользователя.',
+        )
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель степенного закона популярности.',
+        )
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument(
+            '--now', default='2026-01-01T00:00:00+00:00',
+            help='Дата, от которой отсчитываются даты постов; '
+                 'по умолчанию постоянная, чтобы данные повторялись.',
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--no-timelines', action='store_true',
+            help='Не раскладывать посты по лентам подписок.',
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.skew = options['skew']
+        self.now = parse_datetime(options['now'])
+        if self.now is None:
+            raise CommandError(f'Неверная дата --now: {options["now"]}')
+        if timezone.is_naive(self.now):
+            self.now = timezone.make_aware(self.now)
+        self.period = timedelta(days=options['days']).total_seconds()
+
+        users = self.step('Пользователей', self.create_users,
+                          options['users'])
+        groups = self.step('Групп', self.create_groups, options['groups'])
+        self.step('Подписок', self.create_follows, users, options['follows'])
+        posts = self.step('Постов', self.create_posts,
+                          users, groups, options['posts'])
+        self.step('Комментариев', self.create_comments,
+                  users, posts, options['comments'])
+
+        call_command('rebuild_user_stats', stdout=self.stdout)
+        if not options['no_timelines']:
+            self.step('Записей лент', timeline.rebuild)
+        self.step('Постов в поиске', search.rebuild)
+        # Счётчики и закэшированные страницы собраны по старым данным.
+        cache.clear()
+
+    def step(self, title, create, *args):
+        started = time.perf_counter()
+        result = create(*args)
+        elapsed = time.perf_counter() - started
+        count = len(result) if isinstance(result, (list, dict)) else result
+        self.stdout.write(
+            f'{title}: {count} за {elapsed:.1f} с '
+            f'({count / max(elapsed, 1e-9):.0f}/с)'
+        )
+        return result
+
+    def weighted(self, population):
+        """Выбор элементов с популярностью по степенному закону.
+
+        Порядок популярности у каждого вызова свой: самые читаемые
+        авторы не обязаны быть и самыми плодовитыми.
+        """
+        population = list(population)
+        self.random.shuffle(population)
+        cum_weights = list(accumulate(
+            1 / (rank + 1) ** self.skew for rank in range(len(population))
+        ))
+
+        def choose(k):
+            return self.random.choices(
+                population, cum_weights=cum_weights, k=k
+            )
+        return choose
+
+    def pub_date(self):
+        return self.now - timedelta(
+            seconds=self.random.random() * self.period
+        )
+
+    def text(self, low, high):
+        return ' '.join(
+            self.random.choices(WORDS, k=self.random.randint(low, high))
+        ).capitalize()
+
+    def bulk(self, model, objects, **kwargs):
+        """Вставка пачками со своими датами, пачка - в своей транзакции."""
+        batch, created = [], 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                created += self.flush(model, batch, **kwargs)
+                batch = []
+        if batch:
+            created += self.flush(model, batch, **kwargs)
+        return created
+
+    @staticmethod
+    def flush(model, batch, **kwargs):
+        with transaction.atomic():
+            return insert(model, batch, **kwargs)
+
+    def create_users(self, count):
+        password = make_password('generated')
+        start = User.objects.aggregate(last=Max('pk'))['last'] or 0
+        return created_ids(User, lambda: self.bulk(User, (
+            User(username=f'gen_user_{start + number}', password=password)
+            for number in range(count)
+        )))
+
+    def create_groups(self, count):
+        start = Group.objects.aggregate(last=Max('pk'))['last'] or 0
+        return created_ids(Group, lambda: self.bulk(Group, (
+            Group(
+                title=f'Группа {start + number}',
+                slug=f'gen-group-{start + number}',
+                description=self.text(3, 10),
+            )
+            for number in range(count)
+        )))
+
+    def create_follows(self, users, average):
+        authors = self.weighted(users)
+
+        def follows():
+            for user_id in users:
+                count = min(
+                    int(self.random.expovariate(1 / average)), len(users) - 1
+                )
+                for author_id in set(authors(count)) - {user_id}:
+                    yield Follow(user_id=user_id, author_id=author_id)
+        return self.bulk(Follow, follows(), ignore_conflicts=True)
+
+    def create_posts(self, users, groups, count):
+        authors = self.weighted(users)
+        dates = []
+
+        def posts():
+            for author_id in authors(count):
+                pub_date = self.pub_date()
+                dates.append(pub_date)
+                yield Post(
+                    author_id=author_id,
+                    group_id=(
+                        self.random.choice(groups)
+                        if groups and self.random.random() < 0.7 else None
+                    ),
+                    text=self.text(5, 60),
+                    pub_date=pub_date,
+                    updated=pub_date,
+                )
+        ids = created_ids(Post, lambda: self.bulk(Post, posts()))
+        # Даты нужны комментариям: они пишутся после поста.
+        return dict(zip(ids, dates))
+
+    def create_comments(self, users, posts, count):
+        """posts - {id: дата публикации}."""
+        if not posts:
+            return 0
+        commented = self.weighted(posts)
+
+        def comments():
+            for post_id in commented(count):
+                posted = posts[post_id]
+                yield Comment(
+                    post_id=post_id,
+                    author_id=self.random.choice(users),
+                    text=self.text(2, 20),
+                    pub_date=posted + (self.now - posted) * (
+                        self.random.random()
+                    ),
+                )
+        return self.bulk(Comment, comments())
@@ -0,0 +1,291 @@
+import csv
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.dateparse import parse_datetime
+
+from posts import search, timeline
+from posts.bulk import created_ids, insert
+from posts.models import Comment, Follow, Group, ImportCheckpoint, Post
+
+User = get_user_model()
+
+KINDS = ('posts', 'comments', 'follows')
+
+
+class Checkpoint:
+    """Журнал импорта в таблице ImportCheckpoint.
+
+    После каждой пачки в её же транзакции пишется строка: номер
+    последней обработанной строки входа и соответствие id постов
+    источника новым id. По журналу повторный запуск пропускает уже
+    загруженное и находит посты для комментариев.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.position = 0
+        self.post_ids = {}
+        entries = ImportCheckpoint.objects.filter(
+            source=source
+        ).order_by('line').values_list('line', 'posts')
+        for line, posts in entries.iterator():
+            self.position = line
+            self.post_ids.update(json.loads(posts))
+
+    def save(self, position, post_ids):
+        """Вызывается внутри транзакции пачки."""
+        ImportCheckpoint.objects.create(
+            source=self.source, line=position, posts=json.dumps(post_ids)
+        )
+        self.position = position
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты, комментарии и подписки из NDJSON (как у '
+        'export_data, подписки - строки type=follows с полями user и '
+        'author) или CSV одного вида. Пишет пачками bulk_create, '
+        'недостающих пользователей и группы создаёт, картинки копирует '
+        'параллельно. Прерванный импорт продолжается с контрольной точки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('ndjson', 'csv'))
+        parser.add_argument(
+            '--kind', choices=KINDS, help='Вид строк CSV-файла.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя контрольной точки, по умолчанию абсолютный путь файла.',
+        )
+        parser.add_argument(
+            '--media-root',
+            help='Откуда копировать картинки постов.',
+        )
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поиск после импорта.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        export_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson'
+        )
+        if export_format == 'csv' and not options['kind']:
+            raise CommandError('Для CSV укажите --kind.')
+        self.media_root = options['media_root']
+        self.checkpoint = Checkpoint(
+            options['checkpoint'] or os.path.abspath(path)
+        )
+        self.user_ids, self.group_ids = {}, {}
+        self.totals = dict.fromkeys(KINDS + ('skipped',), 0)
+        if self.checkpoint.position:
+            self.stdout.write(
+                f'Продолжаем со строки {self.checkpoint.position + 1}.'
+            )
+
+        started = time.perf_counter()
+        rows = self.read(path, export_format, options['kind'])
+        with ThreadPoolExecutor(options['workers']) as self.pool:
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                self.import_batch(batch)
+                self.report(started)
+
+        if not options['no_rebuild']:
+            call_command('rebuild_user_stats', stdout=self.stdout)
+            timeline.rebuild()
+            search.rebuild()
+            cache.clear()
+        self.stdout.write(self.style.SUCCESS('Импорт завершён.'))
+
+    def read(self, path, export_format, kind):
+        """(номер строки, строка) после контрольной точки."""
+        with open(path, encoding='utf-8', newline='') as file:
+            if export_format == 'csv':
+                lines = (
+                    dict(row, type=kind) for row in csv.DictReader(file)
+                )
+            else:
+                lines = (json.loads(line) for line in file if line.strip())
+            for number, row in enumerate(lines, 1):
+                if number > self.checkpoint.position:
+                    yield number, row
+
+    def report(self, started):
+        elapsed = time.perf_counter() - started
+        total = sum(self.totals[kind] for kind in KINDS)
+        self.stdout.write(
+            f'Постов: {self.totals["posts"]}, '
+            f'комментариев: {self.totals["comments"]}, '
+            f'подписок: {self.totals["follows"]}, '
+            f'пропущено: {self.totals["skipped"]}; '
+            f'{total / max(elapsed, 1e-9):.0f} строк/с'
+        )
+
+    def import_batch(self, batch):
+        by_kind = {kind: [] for kind in KINDS}
+        for _, row in batch:
+            if row.get('type') in by_kind:
+                by_kind[row['type']].append(row)
+            else:
+                self.totals['skipped'] += 1
+
+        self.resolve_users(
+            {row['author'] for row in by_kind['posts'] + by_kind['comments']}
+            | {row[field] for row in by_kind['follows']
+               for field in ('user', 'author')}
+        )
+        self.resolve_groups(
+            {row['group'] for row in by_kind['posts'] if row.get('group')}
+        )
+        images = self.copy_images(
+            {row['image'] for row in by_kind['posts'] if row.get('image')}
+        )
+
+        with transaction.atomic():
+            post_ids = self.create_posts(by_kind['posts'], images)
+            self.create_comments(by_kind['comments'], post_ids)
+            self.create_follows(by_kind['follows'])
+            self.checkpoint.save(batch[-1][0], post_ids)
+        self.checkpoint.post_ids.update(post_ids)
+
+    def resolve_users(self, usernames):
+        """Словарь username -> id, недостающие пользователи создаются."""
+        missing = set(usernames) - set(self.user_ids)
+        if not missing:
+            return
+        found = dict(
+            User.objects.filter(username__in=missing)
+            .values_list('username', 'pk')
+        )
+        new = missing - set(found)
+        if new:
+            password = make_password(None)
+            User.objects.bulk_create(
+                User(username=username, password=password)
+                for username in new
+            )
+            found.update(
+                User.objects.filter(username__in=new)
+                .values_list('username', 'pk')
+            )
+        self.user_ids.update(found)
+
+    def resolve_groups(self, slugs):
+        missing = set(slugs) - set(self.group_ids)
+        if not missing:
+            return
+        found = dict(
+            Group.objects.filter(slug__in=missing).values_list('slug', 'pk')
+        )
+        new = missing - set(found)
+        if new:
+            Group.objects.bulk_create(
+                Group(title=slug, slug=slug, description='') for slug in new
+            )
+            found.update(
+                Group.objects.filter(slug__in=new).values_list('slug', 'pk')
+            )
+        self.group_ids.update(found)
+
+    def copy_images(self, names):
+        """Копирует картинки параллельно, возвращает {имя: новое имя}."""
+        if not self.media_root:
+            return {name: name for name in names}
+        return dict(zip(names, self.pool.map(self.copy_image, names)))
+
+    def copy_image(self, name):
+        """Пустое имя, если исходного файла нет."""
+        try:
+            source = safe_join(self.media_root, name)
+            target = safe_join(settings.MEDIA_ROOT, name)
+        except SuspiciousFileOperation:
+            return ''
+        if not os.path.isfile(source):
+            return ''
+        if not (
+            os.path.exists(target)
+            and os.path.getsize(target) == os.path.getsize(source)
+        ):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+        return name
+
+    def pub_date(self, row):
+        value = row.get('pub_date')
+        moment = parse_datetime(value) if value else None
+        if moment is None:
+            return timezone.now()
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def create_posts(self, rows, images):
+        posts = []
+        for row in rows:
+            pub_date = self.pub_date(row)
+            posts.append(Post(
+                author_id=self.user_ids[row['author']],
+                group_id=self.group_ids.get(row.get('group')),
+                text=row['text'],
+                image=images.get(row.get('image'), ''),
+                pub_date=pub_date,
+                updated=pub_date,
+            ))
+        new_ids = created_ids(Post, lambda: insert(Post, posts))
+        self.totals['posts'] += len(new_ids)
+        return {str(row['id']): pk for row, pk in zip(rows, new_ids)}
+
+    def create_comments(self, rows, batch_post_ids):
+        comments = []
+        for row in rows:
+            source_id = str(row['post'])
+            post_id = batch_post_ids.get(
+                source_id, self.checkpoint.post_ids.get(source_id)
+            )
+            if post_id is None:
+                self.totals['skipped'] += 1
+                continue
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=self.user_ids[row['author']],
+                text=row['text'],
+                pub_date=self.pub_date(row),
+            ))
+        insert(Comment, comments)
+        self.totals['comments'] += len(comments)
+
+    def create_follows(self, rows):
+        follows = [
+            Follow(
+                user_id=self.user_ids[row['user']],
+                author_id=self.user_ids[row['author']],
+            )
+            for row in rows
+            if row['user'] != row['author']
+        ]
+        self.totals['skipped'] += len(rows) - len(follows)
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        self.totals['follows'] += len(follows)
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает поисковый индекс постов: FTS5, если таблица есть, '
+        'иначе SearchToken.'
+    )
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        started = time.perf_counter()
+        indexed = backend.rebuild()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{type(backend).__name__}: проиндексировано постов {indexed} '
+            f'за {elapsed:.1f} с.'
+        ))
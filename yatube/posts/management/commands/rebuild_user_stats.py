@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import UserStats
+from posts.stats import COUNTED, count_stats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, подписок и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько пользователей пересчитывать за один проход.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        total = drifted = 0
+        last_id = 0
+
+        while True:
+            batch = list(user_ids.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            total += len(batch)
+            drifted += self.rebuild(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано пользователей: {total}, исправлено: {drifted}.'
+        ))
+
+    @transaction.atomic
+    def rebuild(self, user_ids):
+        """Перезаписывает разошедшиеся счётчики одной пачки."""
+        actual = count_stats(user_ids)
+        existing = UserStats.objects.select_for_update().in_bulk(
+            user_ids, field_name='user_id'
+        )
+        changed, created = [], []
+        for user_id, counts in actual.items():
+            stats = existing.get(user_id)
+            if stats is None:
+                created.append(UserStats(user_id=user_id, **counts))
+                continue
+            if any(getattr(stats, field) != counts[field]
+                   for field in COUNTED):
+                for field, value in counts.items():
+                    setattr(stats, field, value)
+                changed.append(stats)
+        UserStats.objects.bulk_create(created)
+        UserStats.objects.bulk_update(changed, list(COUNTED))
+        return len(changed)
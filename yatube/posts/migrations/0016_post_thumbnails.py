@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Адреса заготовленных миниатюр в JSON', verbose_name='Миниатюры'),
+        ),
+    ]
@@ -0,0 +1,221 @@
+# Generated by Django 2.2.28 on 2026-10-18 18:04
+
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.db import OperationalError, migrations, models
+import django.db.models.deletion
+
+
+# Копия posts.stemmer на момент миграции: индекс должен строиться
+# тем разбором, что был при её создании, а не нынешним кодом.
+WORD = re.compile(r'\w+')
+VOWELS = 'аеиоуыэюя'
+RUSSIAN = re.compile(r'^[а-я]+$')
+
+STOP_WORDS = frozenset('''
+    а без более бы был была были было быть в вам вас весь во вот все всё
+    всего всех вы где да даже для до его ее её ей если есть еще ещё же за
+    здесь и из или им их к как ко когда кто ли либо мне может мы на над
+    надо наш не него нее неё нет ни них но ну о об однако он она они оно
+    от очень по под при про с со так также такой там те тем то того тоже
+    той только том ты у уже хотя чего чей чем что чтобы чье чья эта эти
+    это этот я
+'''.split())
+
+# Окончания первой группы снимаются только после «а» или «я».
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    (),
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'),
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+
+def _longest_first(endings):
+    """Окончания группы с признаком «после а/я», длинные первыми."""
+    after_a, plain = endings
+    return sorted(
+        [(ending, True) for ending in after_a]
+        + [(ending, False) for ending in plain],
+        key=lambda item: len(item[0]),
+        reverse=True,
+    )
+
+
+PERFECTIVE_GERUND, ADJECTIVE, PARTICIPLE, REFLEXIVE, VERB, NOUN = map(
+    _longest_first,
+    (PERFECTIVE_GERUND, ADJECTIVE, PARTICIPLE, REFLEXIVE, VERB, NOUN),
+)
+
+
+def _remove(rv, candidates):
+    """rv без самого длинного подходящего окончания или None."""
+    for ending, needs_a in candidates:
+        if rv.endswith(ending):
+            rest = rv[:-len(ending)]
+            if needs_a and not rest.endswith(('а', 'я')):
+                continue
+            return rest
+    return None
+
+
+def _region(word, start=0):
+    """Начало области после первой согласной, идущей за гласной."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _inflection(rv):
+    """Шаг 1: деепричастие, иначе возвратная частица и одно из окончаний
+    прилагательного (с причастием), глагола или существительного."""
+    rest = _remove(rv, PERFECTIVE_GERUND)
+    if rest is not None:
+        return rest
+    rv = _remove(rv, REFLEXIVE) or rv
+    adjective = _remove(rv, ADJECTIVE)
+    if adjective is not None:
+        participle = _remove(adjective, PARTICIPLE)
+        return adjective if participle is None else participle
+    for endings in (VERB, NOUN):
+        rest = _remove(rv, endings)
+        if rest is not None:
+            return rest
+    return rv
+
+
+def _tidy(rv):
+    """Шаг 4: двойная «н», превосходная степень, мягкий знак."""
+    if rv.endswith('нн'):
+        return rv[:-1]
+    for suffix in SUPERLATIVE:
+        if rv.endswith(suffix):
+            rv = rv[:-len(suffix)]
+            return rv[:-1] if rv.endswith('нн') else rv
+    return rv[:-1] if rv.endswith('ь') else rv
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not RUSSIAN.match(word):
+        return word
+    first_vowel = next(
+        (index for index, letter in enumerate(word) if letter in VOWELS),
+        None,
+    )
+    if first_vowel is None:
+        return word
+    prefix, rv = word[:first_vowel + 1], word[first_vowel + 1:]
+
+    rv = _inflection(rv)
+    # Шаг 2.
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательный суффикс в R2.
+    word = prefix + rv
+    r2 = _region(word, _region(word))
+    for suffix in DERIVATIONAL:
+        if word.endswith(suffix) and len(word) - len(suffix) >= r2:
+            rv = rv[:-len(suffix)]
+            break
+
+    return prefix + _tidy(rv)
+
+
+def tokenize(text):
+    """Основы значимых слов текста в порядке появления."""
+    return [
+        stem(word) for word in WORD.findall(text.lower())
+        if word not in STOP_WORDS
+    ]
+
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def create_index(apps, schema_editor):
+    """Таблица FTS5, если SQLite собран с ней, иначе SearchToken."""
+    Post = apps.get_model('posts', 'Post')
+    SearchToken = apps.get_model('posts', 'SearchToken')
+    posts = Post.objects.order_by().values_list('pk', 'text').iterator()
+    if schema_editor.connection.vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+                f'terms, tokenize="unicode61 remove_diacritics 0")'
+            )
+        except OperationalError:
+            pass
+        else:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, terms) VALUES (%s, %s)',
+                    ((pk, ' '.join(tokenize(text))) for pk, text in posts),
+                )
+            return
+    SearchToken.objects.bulk_create([
+        SearchToken(term=term, post_id=pk, count=count)
+        for pk, text in posts
+        for term, count in Counter(
+            word[:64] for word in tokenize(text)
+        ).items()
+    ])
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='Пост')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchtoken',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_token'),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
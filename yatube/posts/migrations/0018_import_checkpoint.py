@@ -0,0 +1,22 @@
+# Generated by Django 2.2.28 on 2026-10-18 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(db_index=True, max_length=255, verbose_name='Источник')),
+                ('line', models.PositiveIntegerField(verbose_name='Последняя строка пачки')),
+                ('posts', models.TextField(help_text='Соответствие id постов источника новым id в JSON', verbose_name='id постов')),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelineentry',
+            name='pub_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата публикации'),
+            preserve_default=False,
+        ),
+        # Уже разложенные записи получают дату своего поста.
+        migrations.RunSQL(
+            'UPDATE posts_timelineentry SET pub_date = ('
+            'SELECT pub_date FROM posts_post '
+            'WHERE posts_post.id = posts_timelineentry.post_id)',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_feed_idx'),
+        ),
+    ]
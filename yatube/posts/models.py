@@ -1,5 +1,8 @@
+import json
+
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
 
 from yatube.settings import POST_SYMBOLS, COMMENT_SYMBOLS
 from core.models import CreatedModel
@@ -46,13 +49,42 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+    thumbnails = models.TextField(
+        'Миниатюры',
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Адреса заготовленных миниатюр в JSON'
+    )
 
     class Meta:
         ordering = ['-pub_date', ]
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_feed_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:POST_SYMBOLS]
 
+    @cached_property
+    def thumbnail_urls(self):
+        return json.loads(self.thumbnails) if self.thumbnails else {}
+
 
 class Comment(CreatedModel):
     post = models.ForeignKey(
@@ -74,6 +106,12 @@ class Comment(CreatedModel):
 
     class Meta:
         ordering = ['-pub_date', ]
+        indexes = [
+            models.Index(
+                fields=['post', '-pub_date'],
+                name='comment_post_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:COMMENT_SYMBOLS]
@@ -100,3 +138,110 @@ class Follow(models.Model):
                 name='unique_following'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_idx'
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: пост в ленте подписчика."""
+    # Отдельные индексы по user и author не нужны: их покрывают
+    # составные индексы (user, post) и (user, author).
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        related_name='timeline',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Пост',
+        related_name='timeline_entries',
+        on_delete=models.CASCADE
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        related_name='+',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    # Копия Post.pub_date: лента сортируется и листается по своему
+    # индексу, а посты читаются только для страницы.
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx'
+            ),
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_feed_idx'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        verbose_name='Пользователь',
+        related_name='stats',
+        on_delete=models.CASCADE
+    )
+    posts_count = models.IntegerField('Постов', default=0)
+    followers_count = models.IntegerField('Подписчиков', default=0)
+    following_count = models.IntegerField('Подписок', default=0)
+    comments_count = models.IntegerField('Комментариев', default=0)
+
+    def __str__(self):
+        return f'Статистика {self.user}'
+
+
+class SearchToken(models.Model):
+    """Запись обратного индекса поиска: основа слова в посте."""
+    term = models.CharField('Основа', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Пост',
+        related_name='+',
+        on_delete=models.CASCADE
+    )
+    count = models.PositiveIntegerField('Вхождений', default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'],
+                name='unique_search_token'
+            )
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """Пачка, загруженная import_data.
+
+    Пишется в той же транзакции, что и строки пачки, поэтому
+    повторный запуск после сбоя не загрузит пачку дважды.
+    """
+    source = models.CharField('Источник', max_length=255, db_index=True)
+    line = models.PositiveIntegerField('Последняя строка пачки')
+    posts = models.TextField(
+        'id постов',
+        help_text='Соответствие id постов источника новым id в JSON',
+    )
+
+    def __str__(self):
+        return f'{self.source}: {self.line}'
@@ -0,0 +1,211 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from . import timeline
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+def encode_cursor(direction, number, obj):
+    """Непрозрачный токен курсора: направление, номер страницы и ключ."""
+    raw = f'{direction}|{number}|{obj.pub_date.isoformat()}|{obj.pk}'
+    token = base64.urlsafe_b64encode(raw.encode())
+    return token.decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Разбирает токен курсора, при любой ошибке - InvalidCursor."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, number, pub_date, pk = raw.split('|')
+        if direction not in (FORWARD, BACKWARD):
+            raise ValueError(direction)
+        return (
+            direction,
+            max(int(number), 1),
+            datetime.fromisoformat(pub_date),
+            int(pk),
+        )
+    except (binascii.Error, UnicodeError, ValueError) as error:
+        raise InvalidCursor('Неверный курсор.') from error
+
+
+class CursorPage(Page):
+    """Страница ленты без OFFSET: соседние страницы адресуются курсором."""
+
+    def __init__(self, object_list, number, paginator,
+                 has_next, has_previous):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage {self.number}>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.paginator.per_page * (self.number - 1)) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return encode_cursor(
+            FORWARD, self.number + 1, self.object_list[-1]
+        )
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(
+            BACKWARD, self.number - 1, self.object_list[0]
+        )
+
+
+class CursorPaginator(Paginator):
+    """Keyset-паджинатор по (pub_date, id).
+
+    Вместо OFFSET и COUNT(*) каждая страница выбирается условием
+    «строго старше/новее граничной записи», поэтому глубокие страницы
+    стоят столько же, сколько первая, а новые посты не сдвигают
+    уже открытую ленту.
+
+    Общее число записей нужно только для подписи «страница N из M»,
+    поэтому его можно передать готовым: числом или функцией,
+    которая читает кэшированный счётчик.
+    """
+
+    def __init__(self, object_list, per_page, count=None):
+        super().__init__(object_list, per_page)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is None:
+            return self.object_list.count()
+        if callable(self._count):
+            return self._count()
+        return self._count
+
+    def page(self, cursor):
+        """Страница по токену курсора; пустой курсор - первая страница."""
+        if not cursor:
+            return self._forward_page(1)
+        direction, number, pub_date, pk = decode_cursor(cursor)
+        if direction == FORWARD:
+            return self._forward_page(number, pub_date, pk)
+        return self._backward_page(number, pub_date, pk)
+
+    def get_page(self, cursor):
+        """Как page(), но неверный курсор открывает первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def forward_queryset(self, pub_date=None, pk=None):
+        """Запрос страницы после граничной записи (или первой страницы)."""
+        posts = self.object_list.order_by('-pub_date', '-pk')
+        if pub_date is not None:
+            posts = posts.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        return posts[:self.per_page + 1]
+
+    def forward_rows(self, pub_date=None, pk=None):
+        """До per_page + 1 записей после граничной, от новых к старым."""
+        return list(self.forward_queryset(pub_date, pk))
+
+    def backward_rows(self, pub_date, pk):
+        """До per_page + 1 записей перед граничной, от старых к новым."""
+        posts = self.object_list.order_by('pub_date', 'pk').filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        )
+        return list(posts[:self.per_page + 1])
+
+    def _forward_page(self, number, pub_date=None, pk=None):
+        rows = self.forward_rows(pub_date, pk)
+        return CursorPage(
+            rows[:self.per_page],
+            number,
+            self,
+            has_next=len(rows) > self.per_page,
+            has_previous=pub_date is not None,
+        )
+
+    def _backward_page(self, number, pub_date, pk):
+        rows = self.backward_rows(pub_date, pk)
+        if len(rows) <= self.per_page:
+            # Дошли до начала ленты: отдаём полноценную первую страницу.
+            return self._forward_page(1)
+        return CursorPage(
+            rows[self.per_page - 1::-1],
+            max(number, 2),
+            self,
+            has_next=True,
+            has_previous=True,
+        )
+
+
+class TimelinePaginator(CursorPaginator):
+    """Keyset-паджинатор ленты подписок пользователя.
+
+    Ключи страницы берутся из материализованной ленты
+    (timeline.page_keys), а object_list - посты с проекцией ленты -
+    читается только для них. Без готового числа записей считается
+    вся лента.
+    """
+
+    def __init__(self, user, object_list, per_page, count=None):
+        super().__init__(object_list, per_page, count)
+        self.user = user
+
+    @cached_property
+    def count(self):
+        if self._count is None:
+            return timeline.follow_feed(self.user).count()
+        return super().count
+
+    def _rows(self, pub_date, pk, descending):
+        keys = timeline.page_keys(
+            self.user, self.per_page + 1, pub_date, pk, descending
+        )
+        sign = '-' if descending else ''
+        return list(
+            self.object_list.filter(pk__in=[pk for _, pk in keys])
+            .order_by(f'{sign}pub_date', f'{sign}pk')
+        )
+
+    def forward_rows(self, pub_date=None, pk=None):
+        return self._rows(pub_date, pk, descending=True)
+
+    def backward_rows(self, pub_date, pk):
+        return self._rows(pub_date, pk, descending=False)
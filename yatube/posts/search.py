@@ -0,0 +1,261 @@
+"""Полнотекстовый поиск по постам.
+
+Текст поста разбирается stemmer.tokenize в основы слов, и основы
+попадают в обратный индекс: основа -> посты, где она встречается.
+Индекс обновляется сигналами сохранения и удаления поста, массовые
+загрузки пересобирают его целиком через rebuild().
+
+Индексов два. На SQLite с FTS5 основы лежат в виртуальной таблице
+posts_post_fts (rowid - id поста), поиск и ранжирование по BM25
+делает сама база. Без FTS5 индекс - таблица SearchToken с числом
+вхождений основы в пост: списки постов всех основ запроса читаются
+одним запросом, а пересечение и TF-IDF считаются в Python. В обоих
+случаях пост находится, только если в нём есть все слова запроса.
+"""
+import math
+from collections import Counter
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils.functional import cached_property
+
+from yatube.settings import (
+    SEARCH_BACKEND, SEARCH_BATCH_SIZE, SEARCH_MAX_QUERY,
+)
+from . import counters, feeds
+from .models import Post, SearchToken
+from .stemmer import tokenize
+
+FTS_TABLE = 'posts_post_fts'
+
+_fts5_tables = {}
+
+
+def has_fts_table():
+    """Есть ли таблица FTS5 в текущей базе; проверяется один раз."""
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _fts5_tables:
+        _fts5_tables[name] = (
+            FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts5_tables[name]
+
+
+def _batches(rows):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, SEARCH_BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+class Fts5Backend:
+    def _match(self, terms):
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def index(self, post_id, text):
+        self.remove(post_id)
+        terms = tokenize(text)
+        if terms:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, terms) VALUES (%s, %s)',
+                    [post_id, ' '.join(terms)],
+                )
+
+    def remove(self, post_id):
+        self.remove_many([post_id])
+
+    def remove_many(self, post_ids):
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+                list(post_ids),
+            )
+
+    @transaction.atomic
+    def rebuild(self):
+        # В одной транзакции FTS5 пишет сегменты индекса один раз,
+        # а не после каждой строки.
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            posts = Post.objects.order_by().values_list('pk', 'text')
+            indexed = 0
+            for batch in _batches(posts.iterator(SEARCH_BATCH_SIZE)):
+                rows = [
+                    (pk, ' '.join(terms)) for pk, terms in
+                    ((pk, tokenize(text)) for pk, text in batch)
+                    if terms
+                ]
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, terms) VALUES (%s, %s)',
+                    rows,
+                )
+                indexed += len(rows)
+        return indexed
+
+    def count(self, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                [self._match(terms)],
+            )
+            return cursor.fetchone()[0]
+
+    def ids(self, terms, offset, limit):
+        """id постов по убыванию релевантности (bm25), затем новизны."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+                [self._match(terms), limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class TableBackend:
+    """Обратный индекс в SearchToken; ранжирование в Python.
+
+    Ранжированный список считается один раз на экземпляр: view
+    создаёт бэкенд на каждый запрос, и число и страница берутся
+    из одного списка.
+    """
+
+    def __init__(self):
+        self._ranked = {}
+
+    def _rows(self, post_id, text):
+        # Обрезаем до подсчёта: две длинные основы с общим началом
+        # дали бы две строки с одной парой (term, post).
+        terms = Counter(term[:64] for term in tokenize(text))
+        return [(term, post_id, count) for term, count in terms.items()]
+
+    def _insert(self, rows):
+        """executemany без создания моделей: при пересборке индекса
+        строк в десятки раз больше, чем постов."""
+        table = connection.ops.quote_name(SearchToken._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {table} (term, post_id, count) '
+                f'VALUES (%s, %s, %s)',
+                rows,
+            )
+
+    def index(self, post_id, text):
+        self.remove(post_id)
+        self._insert(self._rows(post_id, text))
+
+    def remove(self, post_id):
+        self.remove_many([post_id])
+
+    def remove_many(self, post_ids):
+        SearchToken.objects.filter(post_id__in=post_ids).delete()
+
+    @transaction.atomic
+    def rebuild(self):
+        SearchToken.objects.all().delete()
+        posts = Post.objects.order_by().values_list('pk', 'text')
+        indexed = 0
+        for batch in _batches(posts.iterator(SEARCH_BATCH_SIZE)):
+            self._insert([
+                row for pk, text in batch for row in self._rows(pk, text)
+            ])
+            indexed += len(batch)
+        return indexed
+
+    def rank(self, terms):
+        """[(id поста, вес)] по убыванию веса, затем новизны."""
+        key = tuple(terms)
+        if key not in self._ranked:
+            self._ranked[key] = self._rank([term[:64] for term in terms])
+        return self._ranked[key]
+
+    def _rank(self, terms):
+        postings = {term: {} for term in terms}
+        tokens = SearchToken.objects.filter(term__in=terms)
+        for term, post_id, count in tokens.values_list(
+            'term', 'post_id', 'count'
+        ).iterator():
+            postings[term][post_id] = count
+        # Пересечение от самого короткого списка: дальше только
+        # проверки вхождения в словари.
+        lists = sorted(postings.values(), key=len)
+        found = set(lists[0]).intersection(*lists[1:])
+        total = max(counters.index_count(), 1)
+        scores = dict.fromkeys(found, 0)
+        for posts in lists:
+            idf = math.log(1 + total / len(posts)) if posts else 0
+            for post_id in found:
+                scores[post_id] += (1 + math.log(posts[post_id])) * idf
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+    def count(self, terms):
+        return len(self.rank(terms))
+
+    def ids(self, terms, offset, limit):
+        return [
+            post_id for post_id, _ in self.rank(terms)[offset:offset + limit]
+        ]
+
+
+def get_backend():
+    if SEARCH_BACKEND == 'table':
+        return TableBackend()
+    if SEARCH_BACKEND == 'fts5' or has_fts_table():
+        return Fts5Backend()
+    return TableBackend()
+
+
+def index_post(post):
+    get_backend().index(post.pk, post.text)
+
+
+def remove_post(post_id):
+    get_backend().remove(post_id)
+
+
+def remove_posts(post_ids):
+    if post_ids:
+        get_backend().remove_many(post_ids)
+
+
+def rebuild():
+    """Пересобрать индекс по всем постам, вернуть число постов."""
+    return get_backend().rebuild()
+
+
+class SearchResults:
+    """Найденные посты для Paginator: число и срезы в порядке ранга.
+
+    Посты страницы загружаются одним запросом ленты, как карточки
+    на остальных страницах.
+    """
+
+    def __init__(self, query, backend=None):
+        self.terms = list(dict.fromkeys(tokenize(query[:SEARCH_MAX_QUERY])))
+        self.backend = backend or get_backend()
+
+    @cached_property
+    def _count(self):
+        return self.backend.count(self.terms) if self.terms else 0
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = self._count if index.stop is None else index.stop
+        if not self.terms or stop <= start:
+            return []
+        ids = self.backend.ids(self.terms, start, stop - start)
+        posts = feeds.feed_queryset(Post.objects.all()).in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
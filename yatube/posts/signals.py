@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.caching import bump_version
+from . import counters, search, stats, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    """Запоминаем прежние группу, текст и миниатюры поста.
+
+    Группа нужна счётчикам групп, текст - чтобы не переиндексировать
+    пост для поиска, если текст не менялся, миниатюры - чтобы удалить
+    их файлы, когда они сброшены.
+    """
+    instance._old_group_id = instance._old_text = None
+    instance._old_thumbnails = ''
+    if instance.pk and not raw:
+        (
+            instance._old_group_id, instance._old_text,
+            instance._old_thumbnails,
+        ) = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'text', 'thumbnails')
+            .first()
+        ) or (None, None, '')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Новый пост попадает в ленты подписчиков и в поиск."""
+    bump_version('posts')
+    if raw:
+        return
+    if instance._old_text != instance.text:
+        search.index_post(instance)
+    if created:
+        stats.increment(instance.author_id, 'posts_count')
+        counters.post_added(instance)
+        timeline.fan_out(instance)
+    elif instance._old_group_id != instance.group_id:
+        counters.post_regrouped(instance._old_group_id, instance.group_id)
+    if instance._old_thumbnails != instance.thumbnails:
+        old, new = instance._old_thumbnails, instance.thumbnails
+        transaction.on_commit(lambda: thumbnails.delete_stale(old, new))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Удалённый пост пропадает из закэшированных страниц и поиска."""
+    bump_version('posts')
+    search.remove_post(instance.pk)
+    stats.increment(instance.author_id, 'posts_count', -1)
+    counters.post_removed(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """Изменения групп видны на закэшированных страницах."""
+    bump_version('groups')
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    """Счётчики комментариев на закэшированных страницах актуальны."""
+    bump_version('comments')
+    if created and not raw:
+        stats.increment(instance.author_id, 'comments_count')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Удалённый комментарий вычитается из счётчиков."""
+    bump_version('comments')
+    stats.increment(instance.author_id, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    """Подписка заполняет ленту постами автора."""
+    if created and not raw:
+        stats.increment(instance.author_id, 'followers_count')
+        stats.increment(instance.user_id, 'following_count')
+        timeline.backfill(instance.user_id, instance.author_id)
+        counters.follow_changed(instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Отписка очищает ленту от постов автора."""
+    stats.increment(instance.author_id, 'followers_count', -1)
+    stats.increment(instance.user_id, 'following_count', -1)
+    timeline.unfollow(instance.user_id, instance.author_id)
+    timeline.followers_dropped(instance.author_id, 1)
+    counters.follow_changed(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, update_fields=None,
+               **kwargs):
+    """У нового пользователя сразу есть нулевые счётчики.
+
+    Имя автора видно на закэшированных страницах и в карточках его
+    постов; вход в систему меняет только last_login и их не трогает.
+    """
+    if update_fields != frozenset(['last_login']):
+        bump_version('posts')
+        bump_version(f'user:{instance.pk}')
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
@@ -0,0 +1,55 @@
+"""Денормализованные счётчики пользователей.
+
+Запись UserStats заводится вместе с пользователем, а для уже
+существующих пользователей - при первом чтении с полным пересчётом.
+Дальше она поддерживается атомарными UPDATE ... SET n = n + 1 из
+сигналов создания и удаления постов, подписок и комментариев.
+Пока записи нет, изменения счётчиков ничего не делают: её всё равно
+создаст пересчёт.
+"""
+from django.db.models import Count, F
+
+from .models import Comment, Follow, Post, UserStats
+
+COUNTED = {
+    'posts_count': (Post, 'author_id'),
+    'followers_count': (Follow, 'author_id'),
+    'following_count': (Follow, 'user_id'),
+    'comments_count': (Comment, 'author_id'),
+}
+
+
+def count_stats(user_ids):
+    """Честный пересчёт счётчиков по таблицам: {user_id: {поле: n}}."""
+    stats = {
+        user_id: dict.fromkeys(COUNTED, 0) for user_id in user_ids
+    }
+    for field, (model, column) in COUNTED.items():
+        rows = (
+            model.objects.filter(**{f'{column}__in': user_ids})
+            .order_by()
+            .values(column)
+            .annotate(count=Count('pk'))
+            .values_list(column, 'count')
+        )
+        for user_id, count in rows:
+            stats[user_id][field] = count
+    return stats
+
+
+def get_stats(user):
+    """Счётчики пользователя, при первом обращении - с пересчётом."""
+    try:
+        return UserStats.objects.get(user=user)
+    except UserStats.DoesNotExist:
+        stats, _ = UserStats.objects.get_or_create(
+            user=user, defaults=count_stats([user.pk])[user.pk]
+        )
+        return stats
+
+
+def increment(user_id, field, delta=1):
+    """Атомарно изменить счётчик пользователя."""
+    UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta}
+    )
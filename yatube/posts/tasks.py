@@ -0,0 +1,29 @@
+"""Фоновые задачи постов, их выполняет manage.py run_worker."""
+from core.tasks import report_progress, task
+from . import deletion, thumbnails
+from .models import Post
+
+
+@task
+def generate_thumbnails(post_id):
+    thumbnails.generate(post_id)
+
+
+def schedule_thumbnails(post):
+    """Поставить нарезку миниатюр в очередь, если есть картинка."""
+    if post.image:
+        generate_thumbnails.delay(post.pk)
+
+
+@task
+def delete_post(post_id):
+    """Удаляет пост со всем, что на него ссылается."""
+    deletion.delete_posts(
+        Post.objects.filter(pk=post_id), report=report_progress
+    )
+
+
+@task
+def delete_user(user_id):
+    """Удаляет пользователя, его посты, комментарии и подписки."""
+    deletion.delete_user(user_id, report=report_progress)
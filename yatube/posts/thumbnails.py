@@ -0,0 +1,142 @@
+"""Миниатюры картинок постов, заготовленные заранее.
+
+После сохранения поста с новой картинкой все размеры из
+THUMBNAIL_SIZES режет фоновая задача (posts.tasks), каждый в нескольких
+ширинах (THUMBNAIL_SCALES) и форматах (THUMBNAIL_FORMATS), а их
+адреса записываются в Post.thumbnails. Шаблоны берут готовые адреса
+и выводят их через <picture> и srcset, так что браузер сам выбирает
+формат и ширину под экран. Пока миниатюр нет, выводится исходная
+картинка. Старые картинки догоняет manage.py backfill_thumbnails.
+"""
+import hashlib
+import json
+import os
+from io import BytesIO
+from urllib.parse import unquote
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.caching import bump_version
+from yatube.settings import (
+    THUMBNAIL_FORMATS, THUMBNAIL_SCALES, THUMBNAIL_SIZES
+)
+from .models import Post
+
+
+def formats():
+    """Форматы из THUMBNAIL_FORMATS, которые умеет сохранять Pillow."""
+    Image.init()
+    return [
+        (name, quality) for name, quality in THUMBNAIL_FORMATS.items()
+        if name.upper() in Image.SAVE
+    ]
+
+
+def save(image, stem, image_format, quality):
+    """Сохраняет миниатюру под именем с хэшем содержимого.
+
+    Такое имя никогда не меняет содержимое, поэтому core.media
+    отдаёт его с Cache-Control: immutable.
+    """
+    buffer = BytesIO()
+    image.save(buffer, image_format.upper(), quality=quality)
+    content = buffer.getvalue()
+    digest = hashlib.md5(content).hexdigest()[:12]
+    name = f'{stem}.{digest}.{image_format}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return default_storage.url(name)
+
+
+def variants(source, geometry, stem):
+    """Все ширины и форматы одного размера.
+
+    Обрезка по центру, как crop="center" у sorl. Последний формат
+    из THUMBNAIL_FORMATS - запасной: его полноразмерная версия
+    попадает в src, остальные выводятся через <source>.
+    """
+    width, height = map(int, geometry.split('x'))
+    supported = formats()
+    srcsets = {name: [] for name, _ in supported}
+    src = None
+    for scale in sorted(THUMBNAIL_SCALES):
+        size = (round(width * scale), round(height * scale))
+        image = ImageOps.fit(source, size, Image.LANCZOS)
+        for image_format, quality in supported:
+            url = save(
+                image, f'{stem}_{size[0]}', image_format, quality
+            )
+            srcsets[image_format].append(f'{url} {size[0]}w')
+            src = url
+    fallback = supported[-1][0]
+    return {
+        'src': src,
+        'width': width,
+        'height': height,
+        'srcset': ', '.join(srcsets.pop(fallback)),
+        'sources': [
+            (f'image/{image_format}', ', '.join(srcset))
+            for image_format, srcset in srcsets.items()
+        ],
+    }
+
+
+def render(image):
+    """Режет все размеры: {имя размера: варианты миниатюры}."""
+    stem = os.path.splitext(image.name)[0]
+    with image.open('rb'), Image.open(image) as source:
+        source = source.convert('RGB')
+        return {
+            name: variants(source, geometry, f'thumbnails/{stem}_{name}')
+            for name, geometry in THUMBNAIL_SIZES.items()
+        }
+
+
+def generate(post_id):
+    """Режет миниатюры поста и сохраняет их адреса.
+
+    Если картинку успели заменить, пока шла нарезка, результат
+    отбрасывается: миниатюры новой картинки режет своя задача.
+    """
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    rendered = json.dumps(render(post.image))
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=rendered,
+        # Карточка поста кэшируется по дате изменения.
+        updated=timezone.now(),
+    )
+    if updated:
+        bump_version('posts')
+    else:
+        delete_stale(rendered)
+
+
+def stored_names(thumbnails):
+    """Имена файлов миниатюр в хранилище по значению Post.thumbnails."""
+    urls = set()
+    for variant in (json.loads(thumbnails) if thumbnails else {}).values():
+        srcsets = [variant['srcset']] + [
+            srcset for _, srcset in variant['sources']
+        ]
+        urls.add(variant['src'])
+        for srcset in srcsets:
+            urls.update(
+                candidate.rsplit(' ', 1)[0]
+                for candidate in srcset.split(', ') if candidate
+            )
+    base_url = default_storage.base_url
+    return {
+        unquote(url[len(base_url):]) for url in urls
+        if url.startswith(base_url)
+    }
+
+
+def delete_stale(old, new=''):
+    """Удаляет файлы миниатюр из old, на которые не ссылается new."""
+    for name in stored_names(old) - stored_names(new):
+        default_storage.delete(name)
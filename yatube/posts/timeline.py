@@ -0,0 +1,182 @@
+"""Материализованные ленты подписок (fan-out-on-write).
+
+Новый пост сразу раскладывается по лентам подписчиков автора, и
+follow_index листает готовую ленту по индексу (user, -pub_date,
+-post) вместо соединения Follow и Post: запись хранит копию даты
+поста, а сами посты читаются только для страницы. Авторы, у
+которых подписчиков больше TIMELINE_FANOUT_LIMIT, в ленты не
+раскладываются: их посты подмешиваются при чтении
+(fan-out-on-read), чтобы один пост не превращался в тысячи
+вставок. Число подписчиков берётся из UserStats. Когда автор
+снова опускается до лимита, его посты раскладываются по лентам
+оставшихся подписчиков: иначе посты, написанные, пока он был
+«тяжёлым», пропали бы из лент.
+"""
+from itertools import islice
+
+from django.db import connection
+from django.db.models import Q
+
+from yatube.settings import TIMELINE_FANOUT_LIMIT, TIMELINE_BATCH_SIZE
+from .models import Follow, Post, TimelineEntry, UserStats
+
+
+def _bulk_insert(entries):
+    entries = iter(entries)
+    inserted = 0
+    while True:
+        batch = list(islice(entries, TIMELINE_BATCH_SIZE))
+        if not batch:
+            return inserted
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        inserted += len(batch)
+
+
+def _insert_select(select, params):
+    """INSERT ... SELECT в ленты без создания объектов в Python."""
+    ops = connection.ops
+    table = ops.quote_name(TimelineEntry._meta.db_table)
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} {table} '
+        f'(user_id, post_id, author_id, pub_date) {select} '
+        f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _copy_posts(user_id, author_id):
+    posts = connection.ops.quote_name(Post._meta.db_table)
+    return _insert_select(
+        f'SELECT %s, id, author_id, pub_date FROM {posts} '
+        f'WHERE author_id = %s',
+        [user_id, author_id],
+    )
+
+
+def is_heavy_author(author_id):
+    """Слишком много подписчиков для раскладки по лентам."""
+    return UserStats.objects.filter(
+        user_id=author_id, followers_count__gt=TIMELINE_FANOUT_LIMIT
+    ).exists()
+
+
+def heavy_author_ids(user):
+    """Авторы из подписок пользователя, читаемые через fan-out-on-read."""
+    return Follow.objects.filter(
+        user=user, author__stats__followers_count__gt=TIMELINE_FANOUT_LIMIT
+    ).values_list('author_id', flat=True)
+
+
+def fan_out(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    if is_heavy_author(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id, post=post, author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in follower_ids
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавить в ленту нового подписчика уже написанные посты автора."""
+    if not is_heavy_author(author_id):
+        _copy_posts(user_id, author_id)
+
+
+def unfollow(user_id, author_id):
+    """Убрать посты автора из ленты отписавшегося пользователя."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def _copy_to_followers(where, params):
+    """Разложить посты авторов, отобранных условием where, по лентам."""
+    quote = connection.ops.quote_name
+    posts = quote(Post._meta.db_table)
+    follows = quote(Follow._meta.db_table)
+    return _insert_select(
+        f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+        f'FROM {follows} f INNER JOIN {posts} p '
+        f'ON p.author_id = f.author_id WHERE {where}',
+        params,
+    )
+
+
+def followers_dropped(author_id, removed):
+    """Автор потерял removed подписчиков (UserStats уже уменьшен).
+
+    Если он только что опустился до TIMELINE_FANOUT_LIMIT, его посты
+    раскладываются по лентам оставшихся подписчиков.
+    """
+    followers = UserStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    if followers is None:
+        return
+    if followers <= TIMELINE_FANOUT_LIMIT < followers + removed:
+        _copy_to_followers('f.author_id = %s', [author_id])
+
+
+def rebuild():
+    """Пересобрать все ленты заново, например после массовой загрузки.
+
+    Счётчики UserStats к этому моменту должны быть пересчитаны.
+    """
+    TimelineEntry.objects.all().delete()
+    stats = connection.ops.quote_name(UserStats._meta.db_table)
+    return _copy_to_followers(
+        f'f.author_id NOT IN (SELECT user_id FROM {stats} '
+        f'WHERE followers_count > %s)',
+        [TIMELINE_FANOUT_LIMIT],
+    )
+
+
+def keyset(queryset, key, pub_date=None, pk=None, descending=True):
+    """Ключи (pub_date, key) за граничной записью в порядке ленты."""
+    sign, op = ('-', 'lt') if descending else ('', 'gt')
+    queryset = queryset.order_by(f'{sign}pub_date', f'{sign}{key}')
+    if pub_date is not None:
+        queryset = queryset.filter(
+            Q(**{f'pub_date__{op}': pub_date})
+            | Q(pub_date=pub_date, **{f'{key}__{op}': pk})
+        )
+    return queryset.values_list('pub_date', key)
+
+
+def page_keys(user, limit, pub_date=None, pk=None, descending=True):
+    """Ключи (pub_date, id) до limit постов ленты за граничной записью.
+
+    Готовая лента читается по индексу (user, -pub_date, -post), посты
+    каждого «тяжёлого» автора - по индексу (author, -pub_date, -id).
+    Списки сливаются; пост, разложенный, пока автор был лёгким,
+    берётся один раз.
+    """
+    keys = set(keyset(
+        TimelineEntry.objects.filter(user=user), 'post_id',
+        pub_date, pk, descending,
+    )[:limit])
+    for author_id in heavy_author_ids(user):
+        keys.update(keyset(
+            Post.objects.filter(author_id=author_id), 'id',
+            pub_date, pk, descending,
+        )[:limit])
+    return sorted(keys, reverse=descending)[:limit]
+
+
+def follow_feed(user):
+    """Посты ленты подписок: готовая лента плюс «тяжёлые» авторы.
+
+    Нужен для подсчёта; страницы читаются через page_keys.
+    """
+    query = Q(pk__in=TimelineEntry.objects.filter(user=user).values('post_id'))
+    heavy_ids = list(heavy_author_ids(user))
+    if heavy_ids:
+        query |= Q(author_id__in=heavy_ids)
+    return Post.objects.filter(query)
@@ -8,6 +8,7 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path('search/', views.post_search, name='search'),
     path('create/', views.post_create, name='post_create'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('follow/', views.follow_index, name='follow_index'),
@@ -20,4 +21,5 @@ urlpatterns = [
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
     path('posts/<int:post_id>/delete/', views.delete_post, name='delete'),
+    path('export/', views.export_data, name='export'),
 ]
@@ -1,22 +1,33 @@
+from functools import partial
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.core.paginator import Paginator
 from django.contrib.auth.models import User
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden
-from django.views.decorators.cache import cache_page
+from django.core.paginator import Paginator
+from django.http import (
+    HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse,
+)
+from django.views.decorators.http import condition, require_POST
 
+from core.caching import cache_page_versioned
 from yatube.settings import LIMIT_POSTS, CACHE_TIMEOUT
+from . import (
+    conditional, counters, export, feeds, search, stats, tasks, timeline,
+)
 from .models import Post, Group, Follow
 from .forms import PostForm, CommentForm
+from .paginator import CursorPaginator, TimelinePaginator
 
 
-@cache_page(CACHE_TIMEOUT, key_prefix='index_page')
+@cache_page_versioned(
+    'posts', 'groups', 'comments', timeout=CACHE_TIMEOUT
+)
 def index(request):
     """Главная страница, отображающая общие посты."""
-    posts = Post.objects.all()
-    paginator = Paginator(posts, LIMIT_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = feeds.index_feed()
+    paginator = CursorPaginator(posts, LIMIT_POSTS, counters.index_count)
+    page = paginator.get_page(request.GET.get('cursor'))
 
     context = {
         'page_obj': page,
@@ -27,13 +38,15 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=conditional.group_etag)
 def group_posts(request, slug):
     """Страница с постами определённой группы."""
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
-    paginator = Paginator(posts, LIMIT_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = feeds.group_feed(group)
+    paginator = CursorPaginator(
+        posts, LIMIT_POSTS, partial(counters.group_count, group)
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
 
     context = {
         'group': group,
@@ -45,18 +58,20 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=conditional.profile_etag)
 def profile(request, username):
     """Все посты в профиле пользователя."""
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, LIMIT_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author_stats = stats.get_stats(author)
+    posts = feeds.profile_feed(author)
+    paginator = CursorPaginator(posts, LIMIT_POSTS, author_stats.posts_count)
+    page = paginator.get_page(request.GET.get('cursor'))
 
     context = {
         'author': author,
         'page_obj': page,
-        'posts_count': author.posts.count(),
+        'stats': author_stats,
+        'posts_count': author_stats.posts_count,
         'posts': posts,
         'paginator': paginator,
     }
@@ -68,16 +83,19 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=conditional.post_etag)
 def post_detail(request, post_id):
     """Раскрыть пост полностью."""
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comment.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    comments = post.comment.select_related('author')
     comment_form = CommentForm(request.POST or None)
 
     context = {
         'post': post,
         'author': post.author,
-        'posts_count': post.author.posts.count(),
+        'posts_count': stats.get_stats(post.author).posts_count,
         'comment_form': comment_form,
         'comments': comments,
     }
@@ -85,6 +103,22 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_search(request):
+    """Поиск постов по словам, результаты по релевантности."""
+    query = request.GET.get('q', '').strip()
+    results = search.SearchResults(query)
+    paginator = Paginator(results, LIMIT_POSTS)
+    page = paginator.get_page(request.GET.get('page'))
+
+    context = {
+        'query': query,
+        'page_obj': page,
+        'paginator': paginator,
+    }
+
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     """Создать новый пост."""
@@ -99,6 +133,7 @@ def post_create(request):
         post = form.save(False)
         post.author = user
         post.save()
+        tasks.schedule_thumbnails(post)
         return redirect('posts:profile', user.username)
 
     context = {
@@ -120,7 +155,11 @@ def post_edit(request, post_id):
             instance=post,
         )
         if form.is_valid():
+            if 'image' in form.changed_data:
+                post.thumbnails = ''
             form.save()
+            if 'image' in form.changed_data:
+                tasks.schedule_thumbnails(post)
             return redirect('posts:post_detail', post_id=post_id)
 
         context = {
@@ -134,11 +173,15 @@ def post_edit(request, post_id):
 
 
 @login_required
+@require_POST
 def delete_post(request, post_id):
-    """Удалить пост."""
-    remove_post = Post.objects.filter(pk=post_id)
-    remove_post.delete()
+    """Удалить пост: удаление выполнит фоновая задача."""
+    post = get_object_or_404(Post, pk=post_id)
 
+    if request.user != post.author:
+        return HttpResponseForbidden()
+
+    tasks.delete_post.delay(post.pk)
     return redirect('posts:index')
 
 
@@ -160,10 +203,17 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     """Все подписки."""
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, LIMIT_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    # Страницу отбирает лента подписок, посты читаются только для неё.
+    paginator = TimelinePaginator(
+        request.user,
+        feeds.index_feed(),
+        LIMIT_POSTS,
+        partial(
+            counters.follow_count, request.user,
+            timeline.follow_feed(request.user),
+        ),
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
 
     context = {
         'page_obj': page,
@@ -193,3 +243,28 @@ def profile_unfollow(request, username):
     if following:
         following.delete()
     return redirect('posts:profile', username=username)
+
+
+@staff_member_required
+def export_data(request):
+    """Потоковая выгрузка постов и комментариев для персонала."""
+    export_format = request.GET.get('format', 'ndjson')
+    try:
+        lines = export.lines(
+            export_format,
+            request.GET.getlist('kind'),
+            author=request.GET.get('author'),
+            group=request.GET.get('group'),
+            since=request.GET.get('since'),
+            until=request.GET.get('until'),
+        )
+    except export.ExportError as error:
+        return HttpResponseBadRequest(str(error))
+
+    response = StreamingHttpResponse(
+        lines, content_type=export.CONTENT_TYPES[export_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="yatube.{export_format}"'
+    )
+    return response
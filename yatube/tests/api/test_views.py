@@ -0,0 +1,111 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from yatube.settings import LIMIT_POSTS
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='api_author')
+        cls.reader = User.objects.create_user(username='api_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='api_group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(LIMIT_POSTS + 3)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(post=cls.post, author=cls.reader, text='!')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get_all(self, url, client=None):
+        """Проходит ленту по ссылкам next, возвращает все id."""
+        client = client or self.client
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            ids += [item['id'] for item in response.json()['results']]
+            url = response.json()['next']
+        return ids
+
+    def test_feeds_paginate_by_cursor(self):
+        """Все ленты отдают посты от новых к старым без повторов."""
+        expected = [post.pk for post in reversed(self.posts)]
+        for url, client in (
+            (reverse('api:v1:index'), self.client),
+            (reverse('api:v1:group_posts', args=[self.group.slug]),
+             self.client),
+            (reverse('api:v1:profile_posts', args=[self.author]),
+             self.client),
+            (reverse('api:v1:follow_posts'), self.reader_client),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.get_all(url, client), expected)
+
+    def test_post_fields(self):
+        """Пост отдаётся с автором, группой и числом комментариев."""
+        response = self.client.get(
+            reverse('api:v1:post_detail', args=[self.post.pk])
+        )
+        item = response.json()
+        self.assertEqual(item['id'], self.post.pk)
+        self.assertEqual(item['author'], 'api_author')
+        self.assertEqual(item['group'], 'api_group')
+        self.assertEqual(item['comments_count'], 1)
+        self.assertEqual(item['image'], None)
+        self.assertEqual(item['pub_date'], self.post.pub_date.isoformat())
+
+    def test_comments(self):
+        response = self.client.get(
+            reverse('api:v1:post_comments', args=[self.post.pk])
+        )
+        self.assertEqual(
+            [item['text'] for item in response.json()['results']], ['!']
+        )
+
+    def test_limit_and_group_info(self):
+        response = self.client.get(
+            reverse('api:v1:group_posts', args=[self.group.slug]),
+            {'limit': 2},
+        )
+        payload = response.json()
+        self.assertEqual(len(payload['results']), 2)
+        self.assertEqual(payload['group']['title'], 'Группа')
+
+    def test_errors(self):
+        """Ошибки отдаются JSON с кодом и полем detail."""
+        cases = {
+            reverse('api:v1:post_detail', args=[0]): HTTPStatus.NOT_FOUND,
+            reverse('api:v1:profile_posts', args=['nope']):
+                HTTPStatus.NOT_FOUND,
+            reverse('api:v1:follow_posts'): HTTPStatus.UNAUTHORIZED,
+            reverse('api:v1:index') + '?cursor=broken': HTTPStatus.BAD_REQUEST,
+            reverse('api:v1:index') + '?limit=0': HTTPStatus.BAD_REQUEST,
+        }
+        for url, status in cases.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
+
+    def test_feed_queries(self):
+        """Страница ленты - один запрос, без моделей и подзапросов на пост."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:v1:index'))
@@ -0,0 +1,207 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from core import benchmark
+from core.asgi import ASGIHandler, build_environ
+from core.benchmark import Route
+
+
+def echo_app(environ, start_response):
+    """Отвечает телом запроса и путём."""
+    body = environ['wsgi.input'].read()
+    start_response('201 Created', [('X-Path', environ['PATH_INFO'])])
+    return [body, b'|', environ['QUERY_STRING'].encode()]
+
+
+class Streaming(list):
+    streaming = True
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def scope(path='/', method='GET', headers=(), query=b''):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query,
+        'headers': list(headers),
+    }
+
+
+def call(application, scope, messages=None):
+    """Выполняет ASGI-приложение, возвращает отправленные сообщения."""
+    incoming = list(messages or [{'type': 'http.request'}])
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class ASGIHandlerTests(SimpleTestCase):
+    def setUp(self):
+        self.handler = ASGIHandler(echo_app, threads=2)
+        self.addCleanup(self.handler.executor.shutdown)
+
+    def test_environ(self):
+        """Заголовки, путь и cookie переводятся в WSGI environ."""
+        environ = build_environ(scope(
+            '/группа/',
+            headers=[
+                (b'content-type', b'text/plain'),
+                (b'x-forwarded-for', b'1.1.1.1'),
+                (b'cookie', b'a=1'),
+                (b'cookie', b'b=2'),
+            ],
+            query=b'q=1',
+        ), None)
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/группа/'
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'q=1')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_X_FORWARDED_FOR'], '1.1.1.1')
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+
+    def test_body_read_in_parts(self):
+        """Тело собирается из нескольких сообщений до вызова view."""
+        sent = call(self.handler, scope('/echo/', 'POST', query=b'x=1'), [
+            {'type': 'http.request', 'body': b'he', 'more_body': True},
+            {'type': 'http.request', 'body': b'llo'},
+        ])
+        self.assertEqual(sent[0]['status'], HTTPStatus.CREATED)
+        self.assertIn((b'x-path', b'/echo/'), sent[0]['headers'])
+        self.assertEqual(sent[1]['body'], b'hello|x=1')
+
+    def test_disconnect_before_body(self):
+        """Если клиент ушёл, не дослав тело, view не вызывается."""
+        sent = call(self.handler, scope(), [{'type': 'http.disconnect'}])
+        self.assertEqual(sent, [])
+
+    def test_streaming_response(self):
+        """Потоковый ответ отправляется по частям и закрывается."""
+        result = Streaming([b'a', b'b'])
+
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return result
+
+        handler = ASGIHandler(app, threads=1)
+        self.addCleanup(handler.executor.shutdown)
+        sent = call(handler, scope())
+        self.assertEqual(
+            [message.get('body') for message in sent[1:]],
+            [b'a', b'b', None],
+        )
+        self.assertTrue(sent[1]['more_body'])
+        self.assertTrue(result.closed)
+
+    def test_streaming_body_read_in_view_thread(self):
+        """Все части потокового ответа читаются в потоке view."""
+        threads = []
+
+        def chunks():
+            for chunk in (b'a', b'b', b'c'):
+                threads.append(threading.get_ident())
+                yield chunk
+
+        class Result:
+            streaming = True
+
+            def __iter__(self):
+                return chunks()
+
+        def app(environ, start_response):
+            threads.append(threading.get_ident())
+            start_response('200 OK', [])
+            return Result()
+
+        handler = ASGIHandler(app, threads=4)
+        self.addCleanup(handler.executor.shutdown)
+        sent = call(handler, scope())
+        self.assertEqual(len(sent), 5)
+        self.assertEqual(len(set(threads)), 1)
+
+    def test_disconnect_stops_streaming(self):
+        """Если клиент ушёл, чтение ответа прекращается и он закрыт."""
+        result = Streaming([b'part'] * 100)
+
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return result
+
+        async def receive():
+            return {'type': 'http.request'}
+
+        async def send(message):
+            if message.get('more_body'):
+                raise OSError('клиент отключился')
+
+        handler = ASGIHandler(app, threads=1)
+        self.addCleanup(handler.executor.shutdown)
+        with self.assertRaises(OSError):
+            asyncio.run(handler(scope(), receive, send))
+        self.assertTrue(result.closed)
+
+    def test_lifespan(self):
+        sent = call(self.handler, {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'},
+        ])
+        self.assertEqual(
+            [message['type'] for message in sent],
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete'],
+        )
+
+    def test_django_page(self):
+        """Страница Django отдаётся через ASGI целиком."""
+        handler = ASGIHandler(WSGIHandler(), threads=1)
+        self.addCleanup(handler.executor.shutdown)
+        sent = call(handler, scope(
+            reverse('about:author'), headers=[(b'host', b'localhost')]
+        ))
+        self.assertEqual(sent[0]['status'], HTTPStatus.OK)
+        self.assertIn('Об авторе', sent[1]['body'].decode())
+
+
+class ServerBenchmarkTests(SimpleTestCase):
+    route = Route('echo', 'GET', '/echo/?q=1')
+
+    def test_run_wsgi_and_asgi(self):
+        """Оба режима выполняют все запросы и считают перцентили."""
+        handler = ASGIHandler(echo_app, threads=2)
+        self.addCleanup(handler.executor.shutdown)
+        wsgi = benchmark.run_wsgi(
+            echo_app, self.route, 4, 10, 2, {'Host': 'localhost'}
+        )
+        asgi = benchmark.run_asgi(
+            handler, self.route, 4, 10, {'Host': 'localhost'}
+        )
+        for summary in (wsgi, asgi):
+            self.assertEqual(summary['requests'], 10)
+            self.assertLessEqual(summary['p50'], summary['p99'])
+            self.assertNotIn('queries', summary)
+
+    def test_slow_clients_do_not_hold_asgi_threads(self):
+        """Медленные клиенты держат WSGI-потоки, но не пул ASGI."""
+        handler = ASGIHandler(echo_app, threads=1)
+        self.addCleanup(handler.executor.shutdown)
+        wsgi = benchmark.run_wsgi(
+            echo_app, self.route, 8, 8, 1, {}, client_delay=0.05
+        )
+        asgi = benchmark.run_asgi(
+            handler, self.route, 8, 8, {}, client_delay=0.05
+        )
+        self.assertGreater(asgi['throughput'], wsgi['throughput'] * 2)
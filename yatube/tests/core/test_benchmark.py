@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from core.benchmark import find_regressions, percentile
+from posts.models import Comment, Group, Post, User
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='bench_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='bench-group', description='Описание'
+        )
+        Post.objects.create(
+            text='Пост для замеров', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'run.json')
+
+    def test_percentile(self):
+        """Перцентиль интерполируется между соседними значениями."""
+        values = [4, 1, 3, 2]
+        self.assertEqual(percentile(values, 50), 2.5)
+        self.assertEqual(percentile(values, 100), 4)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_find_regressions(self):
+        """Регрессией считается рост метрики больше порога."""
+        baseline = {'index': {'1': {'p95': 10.0, 'queries': 4}}}
+        results = {
+            'index': {'1': {'p95': 13.0, 'queries': 4}},
+            'group': {'1': {'p95': 50.0, 'queries': 9}},
+        }
+        self.assertEqual(find_regressions(results, baseline, 0.5), [])
+        regressions = find_regressions(results, baseline, 0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('index x1 p95', regressions[0])
+
+    def test_command_saves_results(self):
+        """Прогон сохраняет сводку по каждому маршруту и уровню."""
+        call_command(
+            'benchmark', '--requests', '3', '--concurrency', '1',
+            '--output', self.output, stdout=StringIO(),
+        )
+        with open(self.output) as file:
+            routes = json.load(file)['routes']
+        self.assertEqual(set(routes), {
+            'index', 'group', 'profile', 'follow', 'post_detail',
+            'post_create', 'add_comment', 'api_index', 'api_follow',
+            'api_post_detail',
+        })
+        for name, levels in routes.items():
+            with self.subTest(route=name):
+                summary = levels['1']
+                self.assertEqual(summary['requests'], 3)
+                self.assertLessEqual(summary['p50'], summary['p99'])
+                self.assertGreater(summary['queries'], 0)
+        # Созданные прогоном посты и комментарии удаляются.
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_command_fails_on_regression(self):
+        """С базой, которую не догнать, команда завершается ошибкой."""
+        with open(self.output, 'w') as file:
+            json.dump({'routes': {'index': {'1': {'queries': 0.5}}}}, file)
+        with self.assertRaises(CommandError):
+            call_command(
+                'benchmark', '--requests', '2', '--concurrency', '1',
+                '--routes', 'index', '--baseline', self.output,
+                stdout=StringIO(),
+            )
@@ -0,0 +1,215 @@
+import threading
+import time
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.cache_backends import LRU, RespCache, TieredCache
+from core.cache_server import CacheServer
+from core.resp import Client, RespError
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class CacheServerTestCase(SimpleTestCase):
+    """Поднимает cache_server на свободном порту на время класса."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = CacheServer(('127.0.0.1', 0))
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        host, port = cls.server.server_address
+        cls.location = f'redis://{host}:{port}/0'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.store.flushdb()
+
+
+class RespCacheTests(CacheServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = RespCache(self.location, {})
+
+    def test_values_round_trip(self):
+        """Строки, числа и объекты читаются в исходном виде."""
+        values = {'text': 'Привет', 'number': 42, 'data': {'a': [1, 2]}}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many(['text', 'number', 'data',
+                                              'nothing']), values)
+        self.assertIsNone(self.cache.get('nothing'))
+        self.assertEqual(self.cache.get('nothing', 'default'), 'default')
+
+    def test_timeout(self):
+        self.cache.set('short', 1, timeout=0.05)
+        self.cache.set('forever', 1, timeout=None)
+        self.cache.set('expired', 1, timeout=0)
+        self.assertFalse(self.cache.has_key('expired'))
+        self.assertTrue(wait_until(lambda: not self.cache.has_key('short')))
+        self.assertTrue(self.cache.has_key('forever'))
+
+    def test_add_and_incr(self):
+        """add не перезаписывает ключ, incr без ключа - ValueError."""
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.cache.decr('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_keeps_timeout(self):
+        """incr не продлевает ключ и не воскрешает истёкший."""
+        self.cache.set('counter', 1, timeout=0.1)
+        self.assertEqual(self.cache.incr('counter'), 2)
+        self.assertTrue(wait_until(lambda: not self.cache.has_key('counter')))
+        with self.assertRaises(ValueError):
+            self.cache.incr('counter')
+        self.assertFalse(self.cache.has_key('counter'))
+
+    def test_watched_key_change_aborts_exec(self):
+        """EXEC не выполняется, если ключ из WATCH изменился."""
+        client, other = Client(self.location), Client(self.location)
+        client.execute('SET', 'key', 1)
+        client.execute('WATCH', 'key')
+        other.execute('DEL', 'key')
+        self.assertEqual(client.pipeline(
+            [('MULTI',), ('INCRBY', 'key', 1), ('EXEC',)]
+        ), ['OK', 'QUEUED', None])
+        self.assertIsNone(other.execute('GET', 'key'))
+
+        client.execute('SET', 'key', 1)
+        client.execute('WATCH', 'key')
+        self.assertEqual(client.pipeline(
+            [('MULTI',), ('INCRBY', 'key', 1), ('EXEC',)]
+        ), ['OK', 'QUEUED', [2]])
+
+    def test_delete_and_clear(self):
+        self.cache.set_many({'a': 1, 'b': 2, 'c': 3})
+        self.assertTrue(self.cache.delete('a'))
+        self.cache.delete_many(['b'])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'c': 3})
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('c'))
+
+    def test_touch(self):
+        self.cache.set('key', 1, timeout=0.05)
+        self.assertTrue(self.cache.touch('key', None))
+        time.sleep(0.1)
+        self.assertEqual(self.cache.get('key'), 1)
+        self.assertFalse(self.cache.touch('missing'))
+
+    def test_reconnects_after_server_drops_connection(self):
+        self.cache.set('key', 1)
+        self.cache.client._local.connection.sock.close()
+        self.assertEqual(self.cache.get('key'), 1)
+
+    def test_server_errors(self):
+        client = Client(self.location)
+        with self.assertRaises(RespError):
+            client.execute('NOSUCHCOMMAND')
+        self.assertEqual(client.execute('PING'), 'OK')
+
+
+class LRUTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LRU(2)
+        lru.set('a', 1, 10)
+        lru.set('b', 2, 10)
+        lru.get('a')
+        lru.set('c', 3, 10)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+
+    def test_entries_expire(self):
+        lru = LRU(10)
+        lru.set('a', 1, 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(lru.get('a'))
+
+    def test_returns_copies(self):
+        lru = LRU(10)
+        lru.set('a', [1], 10)
+        lru.get('a').append(2)
+        self.assertEqual(lru.get('a'), [1])
+
+
+class TieredCacheTests(CacheServerTestCase):
+    def setUp(self):
+        super().setUp()
+        settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'shared': {
+                'BACKEND': 'core.cache_backends.RespCache',
+                'LOCATION': self.location,
+            },
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+        options = {'OPTIONS': {
+            'L2': 'shared', 'L1_TIMEOUT': 60, 'CHANNEL': self.id(),
+        }}
+        # Два L1 с разными именами - как два процесса над одним L2.
+        self.first = TieredCache(f'first-{self.id()}', options)
+        self.second = TieredCache(f'second-{self.id()}', options)
+        for cache in (self.first, self.second):
+            self.addCleanup(cache.tier.stop.set)
+        # Подписчики успели подключиться к каналу.
+        self.assertTrue(wait_until(
+            lambda: len(self.server.subscribers[
+                self.first.channel.encode()
+            ]) >= 2
+        ))
+
+    def test_reads_from_l1_after_first_get(self):
+        """Повторное чтение не обращается к L2."""
+        caches['shared'].set('key', 'value')
+        self.assertEqual(self.first.get('key'), 'value')
+        caches['shared'].set('key', 'changed behind the cache')
+        self.assertEqual(self.first.get('key'), 'value')
+        self.assertEqual(self.first.get_many(['key']), {'key': 'value'})
+
+    def test_set_invalidates_other_processes(self):
+        self.first.set('key', 'old')
+        self.assertEqual(self.second.get('key'), 'old')
+        self.first.set('key', 'new')
+        self.assertTrue(wait_until(lambda: self.second.get('key') == 'new'))
+
+    def test_incr_and_delete_invalidate(self):
+        self.first.set('version', 1)
+        self.assertEqual(self.second.get_many(['version']), {'version': 1})
+        self.assertEqual(self.first.incr('version'), 2)
+        self.assertTrue(wait_until(lambda: self.second.get('version') == 2))
+        self.first.delete('version')
+        self.assertTrue(wait_until(
+            lambda: self.second.get('version') is None
+        ))
+        with self.assertRaises(ValueError):
+            self.second.incr('version')
+
+    def test_clear_invalidates_everything(self):
+        self.first.set_many({'a': 1, 'b': 2})
+        self.assertEqual(self.second.get_many(['a', 'b']), {'a': 1, 'b': 2})
+        self.first.clear()
+        self.assertTrue(wait_until(
+            lambda: self.second.get_many(['a', 'b']) == {}
+        ))
+
+    def test_add(self):
+        self.assertTrue(self.first.add('key', 1))
+        self.assertFalse(self.second.add('key', 2))
+        self.assertEqual(self.second.get('key'), 1)
@@ -0,0 +1,126 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from core import caching
+from core.caching import Entry, cache_page_versioned, get_or_rebuild
+
+
+class Builder:
+    """Считает вызовы и собирает значение с задержкой."""
+
+    def __init__(self, value='page', delay=0.0, cacheable=True):
+        self.value = value
+        self.delay = delay
+        self.cacheable = cacheable
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.value, self.cacheable
+
+
+def in_threads(count, target):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(target()))
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class GetOrRebuildTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cold_key_built_once(self):
+        """Одновременные промахи пересобирают значение один раз."""
+        build = Builder(delay=0.2)
+        results = in_threads(
+            8, lambda: get_or_rebuild('key', [1], build, 60)
+        )
+        self.assertEqual(build.calls, 1)
+        self.assertEqual(results, ['page'] * 8)
+
+    def test_stale_served_while_rebuilding(self):
+        """Пока идёт пересборка, отдаётся старая копия."""
+        cache.set('key', Entry('old', [1], 60, 0))
+        cache.add(caching.LOCK_KEY.format('key'), 'other', 60)
+        build = Builder('new')
+        self.assertEqual(get_or_rebuild('key', [2], build, 60), 'old')
+        self.assertEqual(build.calls, 0)
+
+    def test_new_version_rebuilds(self):
+        cache.set('key', Entry('old', [1], 60, 0))
+        build = Builder('new')
+        self.assertEqual(get_or_rebuild('key', [2], build, 60), 'new')
+        self.assertEqual(get_or_rebuild('key', [2], build, 60), 'new')
+        self.assertEqual(build.calls, 1)
+        self.assertIsNone(cache.get(caching.LOCK_KEY.format('key')))
+
+    def test_early_expiry(self):
+        """Долгая сборка близко к сроку обновляется досрочно."""
+        cache.set('key', Entry('old', [1], 10, 5))
+        build = Builder('new')
+        with mock.patch.object(caching.random, 'random', return_value=0):
+            self.assertEqual(get_or_rebuild('key', [1], build, 10), 'old')
+        with mock.patch.object(caching.random, 'random', return_value=0.9):
+            self.assertEqual(get_or_rebuild('key', [1], build, 10), 'new')
+        self.assertEqual(build.calls, 1)
+
+    def test_without_timeout_never_expires_early(self):
+        cache.set('key', Entry('old', [1], None, 5))
+        with mock.patch.object(caching.random, 'random', return_value=0.99):
+            self.assertEqual(get_or_rebuild('key', [1], Builder()), 'old')
+
+    def test_uncacheable_value_releases_lock(self):
+        build = Builder(cacheable=False)
+        self.assertEqual(get_or_rebuild('key', [1], build, 60), 'page')
+        self.assertIsNone(cache.get('key'))
+        self.assertIsNone(cache.get(caching.LOCK_KEY.format('key')))
+
+    def test_lock_released_on_error(self):
+        def fail():
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            get_or_rebuild('key', [1], fail, 60)
+        self.assertIsNone(cache.get(caching.LOCK_KEY.format('key')))
+
+
+class CachePageVersionedTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_requests_render_page_once(self):
+        """Холодная популярная страница собирается одним запросом."""
+        calls = []
+
+        @cache_page_versioned('posts', timeout=60)
+        def view(request):
+            calls.append(request)
+            time.sleep(0.2)
+            return HttpResponse('страница')
+
+        def get():
+            request = RequestFactory().get('/')
+            request.user = AnonymousUser()
+            return view(request).content.decode()
+
+        self.assertEqual(in_threads(8, get), ['страница'] * 8)
+        self.assertEqual(len(calls), 1)
+        caching.bump_version('posts')
+        get()
+        self.assertEqual(len(calls), 2)
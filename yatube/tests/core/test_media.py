@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.media import serve_media
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=tempfile.gettempdir())
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        for name in ('posts/photo.jpg', 'posts/photo.0123456789ab.jpg'):
+            with open(os.path.join(TEMP_MEDIA_ROOT, name), 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    url = '/media/posts/photo.jpg'
+
+    def test_full_file_with_validators(self):
+        """Файл отдаётся целиком с ETag, Last-Modified и кэшем."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_hashed_name_is_immutable(self):
+        """Имя с хэшем содержимого кэшируется навсегда."""
+        response = self.client.get('/media/posts/photo.0123456789ab.jpg')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_conditional_requests(self):
+        """Совпавший ETag или свежая дата дают 304 без тела."""
+        first = self.client.get(self.url)
+        by_etag = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        by_date = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']
+        )
+        other_etag = self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(by_etag.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(by_date.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(by_etag['ETag'], first['ETag'])
+        self.assertEqual(other_etag.status_code, HTTPStatus.OK)
+
+    def test_byte_ranges(self):
+        """Диапазоны байт отдаются с кодом 206 и Content-Range."""
+        cases = {
+            'bytes=0-9': (0, 9),
+            'bytes=1000-': (1000, 1023),
+            'bytes=-24': (1000, 1023),
+            'bytes=1020-5000': (1020, 1023),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(range=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.PARTIAL_CONTENT
+                )
+                self.assertEqual(
+                    response['Content-Range'], f'bytes {start}-{end}/1024'
+                )
+                self.assertEqual(
+                    b''.join(response.streaming_content),
+                    CONTENT[start:end + 1],
+                )
+
+    def test_unsatisfiable_and_stale_ranges(self):
+        """Диапазон за концом файла - 416, устаревший If-Range - весь файл."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2000-')
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_missing_and_outside_root(self):
+        """Несуществующий файл - 404, путь вне MEDIA_ROOT отклоняется."""
+        for url in ('/media/posts/nope.jpg', '/media/posts/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        with self.assertRaises(SuspiciousFileOperation):
+            serve_media(RequestFactory().get('/'), '../settings.py')
+
+    def test_offload_headers(self):
+        """В режиме offload тело отдаёт веб-сервер."""
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/photo.jpg'
+        )
+        self.assertEqual(response.content, b'')
+
+        with self.settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(TEMP_MEDIA_ROOT, 'posts', 'photo.jpg'),
+        )
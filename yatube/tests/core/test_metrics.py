@@ -0,0 +1,82 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import metrics
+from core.metrics import Histogram, TIME_BUCKETS, registry
+from posts.models import Post, User
+
+
+class HistogramTests(TestCase):
+    def test_percentiles_by_bucket(self):
+        """Перцентиль - верхняя граница корзины, но не больше максимума."""
+        histogram = Histogram(TIME_BUCKETS)
+        for value in [1.0] * 98 + [50.0, 900.0]:
+            histogram.add(value)
+        summary = histogram.summary()
+        self.assertEqual(summary['p50'], min(
+            bound for bound in TIME_BUCKETS if bound >= 1.0
+        ))
+        self.assertLess(summary['p95'], 1.25)
+        self.assertEqual(summary['max'], 900.0)
+        self.assertEqual(histogram.count, 100)
+
+
+class RequestStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='metrics_author')
+        cls.staff = User.objects.create_user(
+            username='metrics_staff', is_staff=True
+        )
+        Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_records_view_metrics(self):
+        """Для view записываются SQL, шаблоны и обращения к кэшу."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        stats = registry.snapshot()['posts:index']
+        self.assertEqual(stats['requests'], 2)
+        self.assertGreater(stats['sql_queries']['max'], 0)
+        self.assertGreater(stats['template_ms']['max'], 0)
+        self.assertGreater(stats['cache_misses']['max'], 0)
+        # Второй запрос отдан из кэша страниц.
+        self.assertGreater(stats['cache_hits']['max'], 0)
+        self.assertGreaterEqual(
+            stats['wall_ms']['max'], stats['sql_ms']['max']
+        )
+
+    def test_stats_endpoint_for_staff_only(self):
+        """Статистику видит только персонал."""
+        url = reverse('core:request_stats')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+        self.client.get(reverse('posts:profile', args=[self.author]))
+        response = self.staff_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('posts:profile', response.json()['views'])
+
+    def test_stats_follow_context_to_other_thread(self):
+        """Кэш, прочитанный в потоке пула с контекстом запроса, учтён."""
+        stats = metrics.start()
+        try:
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(1) as pool:
+                pool.submit(context.run, cache.get, 'missing').result()
+        finally:
+            metrics.finish()
+        self.assertEqual(stats.cache_misses, 1)
+        self.assertIsNone(metrics.current())
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=tempfile.gettempdir())
+
+
+class StaticFilesStorageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    @override_settings(STATIC_ROOT=os.path.join(TEMP_STATIC_ROOT, 'none'))
+    def test_not_collected_falls_back(self):
+        """Без collectstatic ссылка ведёт на исходное имя."""
+        self.assertEqual(
+            static('css/bootstrap.min.css'), '/static/css/bootstrap.min.css'
+        )
+
+    @override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+    def test_collected_files_are_hashed_and_compressed(self):
+        """collectstatic пишет имена с хэшем и сжатые копии."""
+        call_command('collectstatic', '--noinput', stdout=StringIO())
+        url = static('css/bootstrap.min.css')
+        self.assertRegex(
+            url, r'^/static/css/bootstrap\.min\.[0-9a-f]{12}\.css$'
+        )
+        path = os.path.join(TEMP_STATIC_ROOT, url[len('/static/'):])
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(os.path.exists(path + '.gz'))
+
+    @override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+    def test_missing_from_manifest_fails_without_debug(self):
+        """Файл не из манифеста - ошибка, с DEBUG - исходное имя."""
+        call_command('collectstatic', '--noinput', stdout=StringIO())
+        with self.assertRaises(ValueError):
+            static('css/missing.css')
+        with self.settings(DEBUG=True):
+            self.assertEqual(
+                static('css/missing.css'), '/static/css/missing.css'
+            )
@@ -0,0 +1,161 @@
+from datetime import timedelta
+
+from django.db.models import F
+from django.contrib.admin import site
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from core import tasks
+from core.admin import TaskAdmin
+from core.models import Task
+
+calls = []
+
+
+@tasks.task(name='tests.record')
+def record(value, times=1):
+    calls.extend([value] * times)
+
+
+@tasks.task(name='tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('не вышло')
+
+
+@tasks.task(name='tests.secret', sensitive=True)
+def secret(value):
+    calls.append(value)
+
+
+class TaskTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_next(self):
+        [pk] = tasks.claim(1)
+        return tasks.run(pk)
+
+    def test_delay_and_run(self):
+        """delay пишет задачу в очередь, run выполняет её."""
+        record.delay('a', times=2)
+        self.assertEqual(calls, [])
+        self.assertTrue(self.run_next())
+        self.assertEqual(calls, ['a', 'a'])
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(task.attempts, 1)
+        self.assertIsNotNone(task.duration)
+
+    def test_claimed_once(self):
+        record.delay('a')
+        self.assertEqual(len(tasks.claim(10)), 1)
+        self.assertEqual(tasks.claim(10), [])
+
+    def test_retry_then_fail(self):
+        """Упавшая задача повторяется позже, пока есть попытки."""
+        fail.delay()
+        self.assertFalse(self.run_next())
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertIn('не вышло', task.error)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertEqual(tasks.claim(1), [])
+
+        Task.objects.update(run_at=timezone.now())
+        self.assertFalse(self.run_next())
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    def test_unknown_task_fails(self):
+        tasks.enqueue('tests.missing', max_attempts=1)
+        self.assertFalse(self.run_next())
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_requeue_stale_and_purge(self):
+        long_ago = timezone.now() - timedelta(days=30)
+        Task.objects.create(
+            name='tests.record', status=Task.RUNNING, started=long_ago
+        )
+        Task.objects.create(
+            name='tests.record', status=Task.DONE, finished=long_ago
+        )
+        self.assertEqual(tasks.requeue_stale(), 1)
+        self.assertEqual(tasks.purge(), 1)
+        self.assertEqual(Task.objects.get().status, Task.QUEUED)
+
+    def test_stale_task_fails_after_last_attempt(self):
+        """Задача, уронившая воркер на последней попытке, не повторяется."""
+        long_ago = timezone.now() - timedelta(days=30)
+        retried = Task.objects.create(
+            name='tests.record', status=Task.RUNNING, started=long_ago,
+            attempts=1, max_attempts=2,
+        )
+        exhausted = Task.objects.create(
+            name='tests.secret', arguments='[["token"], {}]',
+            status=Task.RUNNING, started=long_ago,
+            attempts=2, max_attempts=2,
+        )
+        self.assertEqual(tasks.requeue_stale(), 1)
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(retried.status, Task.QUEUED)
+        self.assertEqual(exhausted.status, Task.FAILED)
+        self.assertIsNotNone(exhausted.finished)
+        self.assertEqual(exhausted.arguments, '[[], {}]')
+
+    def test_sensitive_row_deleted(self):
+        """Выполненная секретная задача не остаётся в базе."""
+        secret.delay('token')
+        self.assertTrue(self.run_next())
+        self.assertEqual(calls, ['token'])
+        self.assertFalse(Task.objects.exists())
+
+        Task.objects.create(
+            name='tests.secret', arguments='[["token"], {}]',
+            status=Task.DONE, finished=timezone.now(),
+        )
+        self.assertEqual(tasks.purge(), 1)
+
+    def test_arguments_hidden_in_admin(self):
+        request = RequestFactory().get('/')
+        self.assertNotIn(
+            'arguments', TaskAdmin(Task, site).get_fields(request)
+        )
+
+    def test_stats(self):
+        record.delay('a')
+        fail.delay()
+        self.run_next()
+        stats = tasks.stats()
+        self.assertEqual(stats['tests.record']['done'], 1)
+        self.assertIn('p50', stats['tests.record']['wall_ms'])
+        for _ in range(3):
+            record.delay('b')
+            self.run_next()
+        Task.objects.filter(name='tests.record').update(duration=F('id'))
+        durations = sorted(
+            Task.objects.filter(
+                name='tests.record', status=Task.DONE
+            ).values_list('duration', flat=True)
+        )
+        wall_ms = tasks.stats()['tests.record']['wall_ms']
+        self.assertEqual(wall_ms['p50'], durations[1])
+        self.assertEqual(wall_ms['p99'], durations[-1])
+        self.assertEqual(wall_ms['max'], durations[-1])
+        self.assertEqual(stats['tests.fail'], {'queued': 1})
+
+
+class WorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_work_once(self):
+        """Воркер выполняет все готовые задачи и выходит."""
+        for value in range(5):
+            record.delay(value)
+        worker = tasks.Worker(threads=2, poll_interval=0.01)
+        worker.work(once=True)
+        self.assertEqual(sorted(calls), list(range(5)))
+        self.assertEqual(worker.done, 5)
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
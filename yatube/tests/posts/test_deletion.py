@@ -0,0 +1,145 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core import tasks
+from core.models import Task
+from posts import counters, deletion, search, stats, thumbnails
+from posts.models import (
+    Comment, Follow, Group, Post, TimelineEntry, User, UserStats,
+)
+from posts.tasks import delete_post
+from tests.posts.test_thumbnails import gif
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=tempfile.gettempdir())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DeletionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(title='Группа', slug='deletion')
+        self.author = User.objects.create_user(username='prolific')
+        self.reader = User.objects.create_user(username='reader')
+        self.other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.other)
+        self.posts = [
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Удаляемый {n}'
+            )
+            for n in range(5)
+        ]
+        self.picture = Post.objects.create(
+            author=self.author, text='С картинкой', image=gif()
+        )
+        thumbnails.generate(self.picture.pk)
+        self.picture.refresh_from_db()
+        self.kept = Post.objects.create(author=self.other, text='Останется')
+        for post in self.posts:
+            Comment.objects.create(post=post, author=self.reader, text='Да')
+        Comment.objects.create(post=self.kept, author=self.author, text='Я')
+        Comment.objects.create(post=self.kept, author=self.reader, text='Мы')
+
+    def files(self):
+        return {self.picture.image.name} | thumbnails.stored_names(
+            self.picture.thumbnails
+        )
+
+    def assert_stats_consistent(self):
+        """Счётчики совпадают с честным пересчётом по таблицам."""
+        users = list(User.objects.values_list('pk', flat=True))
+        expected = stats.count_stats(users)
+        for user_stats in UserStats.objects.filter(user_id__in=users):
+            self.assertEqual(
+                {field: getattr(user_stats, field) for field in expected[
+                    user_stats.user_id
+                ]},
+                expected[user_stats.user_id],
+            )
+
+    def test_delete_user(self):
+        """Пользователь удаляется пачками со всем, что с ним связано."""
+        files = self.files()
+        self.assertTrue(all(map(default_storage.exists, files)))
+        self.assertEqual(counters.index_count(), 7)
+        reports = []
+
+        progress = deletion.delete_user(
+            self.author.pk,
+            report=lambda **values: reports.append(values),
+            batch_size=2,
+        )
+
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Post.objects.all()), [self.kept])
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Мы']
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertFalse(any(map(default_storage.exists, files)))
+        self.assertEqual(counters.index_count(), 1)
+        self.assertEqual(len(search.SearchResults('удаляемый')), 0)
+        self.assert_stats_consistent()
+
+        self.assertEqual(progress['posts'], 6)
+        self.assertEqual(progress['comments'], 6)
+        self.assertEqual(progress['follows'], 2)
+        self.assertEqual(progress['files'], len(files))
+        # Отчёт после каждой пачки, а не один в конце.
+        self.assertGreater(len(reports), 5)
+        self.assertEqual(reports[-1], dict(progress))
+
+    def test_delete_posts_keeps_author(self):
+        deletion.delete_posts(
+            Post.objects.filter(pk__in=[self.posts[0].pk, self.kept.pk])
+        )
+        self.assertTrue(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(self.reader.timeline.count(), len(self.posts))
+        self.assert_stats_consistent()
+
+    def test_shared_image_kept(self):
+        """Файлы, общие с оставшимся постом, не удаляются."""
+        Post.objects.filter(pk=self.kept.pk).update(
+            image=self.picture.image.name,
+            thumbnails=self.picture.thumbnails,
+        )
+        progress = deletion.delete_posts(
+            Post.objects.filter(pk=self.picture.pk)
+        )
+        self.assertTrue(all(map(default_storage.exists, self.files())))
+        self.assertEqual(progress['files'], 0)
+
+        deletion.delete_posts(Post.objects.filter(pk=self.kept.pk))
+        self.assertFalse(any(map(default_storage.exists, self.files())))
+
+    def test_delete_post_task_reports_progress(self):
+        delete_post.delay(self.picture.pk)
+        [pk] = tasks.claim(1)
+        self.assertTrue(tasks.run(pk))
+        progress = json.loads(Task.objects.get(pk=pk).progress)
+        self.assertEqual(progress['posts'], 1)
+        self.assertEqual(progress['files'], len(self.files()))
+
+    def test_command(self):
+        call_command('delete_user', self.author.username, stdout=StringIO())
+        self.assertEqual(
+            json.loads(Task.objects.get().arguments), [[self.author.pk], {}]
+        )
+        out = StringIO()
+        call_command('delete_user', self.author.username, '--now', stdout=out)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertIn('постов: 6', out.getvalue())
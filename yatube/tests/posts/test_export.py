@@ -0,0 +1,129 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.management.commands import export_data
+from posts.models import Comment, Group, Post, User
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='export_author')
+        cls.other = User.objects.create_user(username='export_other')
+        cls.staff = User.objects.create_user(
+            username='export_staff', is_staff=True
+        )
+        cls.group = Group.objects.create(title='Группа', slug='export_group')
+        cls.post = Post.objects.create(
+            text='Пост, с "кавычками"', author=cls.author, group=cls.group
+        )
+        cls.other_post = Post.objects.create(text='Другой', author=cls.other)
+        Post.objects.filter(pk=cls.other_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.other, text='Комментарий'
+        )
+
+    def export(self, *args):
+        out = StringIO()
+        call_command('export_data', *args, stdout=out)
+        return out.getvalue()
+
+    def test_ndjson_all_rows(self):
+        """NDJSON содержит посты и комментарии с типом строки."""
+        rows = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(
+            [(row['type'], row['id']) for row in rows],
+            [('posts', self.post.pk), ('posts', self.other_post.pk),
+             ('comments', self.comment.pk)],
+        )
+        self.assertEqual(rows[0]['author'], 'export_author')
+        self.assertEqual(rows[0]['group'], 'export_group')
+        self.assertEqual(rows[0]['pub_date'], self.post.pub_date.isoformat())
+        self.assertEqual(rows[2]['post'], self.post.pk)
+
+    def test_filters(self):
+        """Фильтры по автору, группе и датам."""
+        cases = {
+            ('--author', 'export_other'): {self.other_post.pk,
+                                           self.comment.pk},
+            ('--group', 'export_group'): {self.post.pk, self.comment.pk},
+            ('--since', str(timezone.localdate())): {self.post.pk,
+                                                     self.comment.pk},
+            ('--until', str(timezone.localdate())): {self.other_post.pk},
+        }
+        for args, ids in cases.items():
+            with self.subTest(args=args):
+                rows = self.export(*args).splitlines()
+                self.assertEqual({json.loads(row)['id'] for row in rows}, ids)
+
+    def test_csv(self):
+        """CSV выгружает один вид строк с заголовком."""
+        rows = list(csv.reader(StringIO(
+            self.export('--format', 'csv', '--kind', 'posts')
+        )))
+        self.assertEqual(
+            rows[0], ['id', 'author', 'group', 'text', 'pub_date', 'image']
+        )
+        self.assertEqual(rows[1][3], 'Пост, с "кавычками"')
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            self.export('--format', 'csv'),
+            self.export('--format', 'csv', '--kind', 'posts'),
+        )
+        with self.assertRaises(CommandError):
+            self.export(
+                '--format', 'csv', '--kind', 'posts', '--kind', 'comments'
+            )
+        with self.assertRaises(CommandError):
+            self.export('--since', 'вчера')
+
+    def test_output_file_in_utf8(self):
+        """Файл выгрузки пишется в UTF-8 независимо от локали."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.csv')
+            with mock.patch.object(
+                export_data, 'open', side_effect=open, create=True
+            ) as opened:
+                self.export('--format', 'csv', '--output', path)
+            self.assertEqual(opened.call_args[1]['encoding'], 'utf-8')
+            with open(path, encoding='utf-8') as file:
+                self.assertIn('Пост, с ""кавычками""', file.read())
+
+    def test_endpoint_streams_for_staff(self):
+        """Выгрузка по адресу доступна персоналу и отдаётся потоком."""
+        url = reverse('posts:export')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+        staff = Client()
+        staff.force_login(self.staff)
+        response = staff.get(url, {'kind': 'comments'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(rows[0])['text'], 'Комментарий')
+
+        response = staff.get(url, {'format': 'csv'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            next(iter(response.streaming_content)).decode().strip(),
+            'id,author,group,text,pub_date,image',
+        )
+
+        response = staff.get(url, {'format': 'xml'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
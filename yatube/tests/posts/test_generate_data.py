@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import (Comment, Follow, Group, Post, TimelineEntry, User,
+                          UserStats)
+
+
+class GenerateDataTests(TestCase):
+    def generate(self, seed=7, **options):
+        call_command(
+            'generate_data',
+            users=20, groups=3, posts=200, follows=3, comments=50,
+            batch_size=64, seed=seed, stdout=StringIO(), **options,
+        )
+
+    def test_creates_requested_rows(self):
+        """Команда создаёт заданное число строк."""
+        self.generate()
+
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(
+            Post.objects.values('pub_date').distinct().count(), 200
+        )
+
+    def test_derived_data_rebuilt(self):
+        """Счётчики и ленты подписок соответствуют данным."""
+        self.generate()
+
+        follow = Follow.objects.first()
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user=follow.user, author=follow.author
+            ).count(),
+            Post.objects.filter(author=follow.author).count(),
+        )
+        stats = UserStats.objects.get(user=follow.author)
+        self.assertEqual(stats.posts_count, follow.author.posts.count())
+        self.assertEqual(
+            stats.followers_count, follow.author.following.count()
+        )
+
+    def test_same_seed_same_data(self):
+        """Одинаковый seed даёт одинаковые данные, включая даты."""
+        self.generate()
+        first = list(
+            Post.objects.order_by('pk').values_list('text', 'pub_date')
+        )
+        Post.objects.all().delete()
+        self.generate()
+        second = list(
+            Post.objects.order_by('pk').values_list('text', 'pub_date')
+        )
+        self.assertEqual(first, second)
+
+    def test_comments_after_post(self):
+        """Комментарий написан после поста и не позже --now."""
+        self.generate(now='2020-06-01T00:00:00+00:00')
+        now = datetime(2020, 6, 1, tzinfo=timezone.utc)
+        for comment in Comment.objects.select_related('post'):
+            self.assertGreaterEqual(comment.pub_date, comment.post.pub_date)
+            self.assertLessEqual(comment.pub_date, now)
+        self.assertLessEqual(Post.objects.latest('pub_date').pub_date, now)
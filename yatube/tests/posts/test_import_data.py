@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.bulk import insert
+from posts.management.commands import import_data
+from posts.models import (
+    Comment, Follow, Group, ImportCheckpoint, Post, User, UserStats,
+)
+
+TEMP_DIR = tempfile.mkdtemp(dir=tempfile.gettempdir())
+SOURCE_MEDIA = os.path.join(TEMP_DIR, 'source')
+TARGET_MEDIA = os.path.join(TEMP_DIR, 'media')
+
+
+@override_settings(MEDIA_ROOT=TARGET_MEDIA)
+class ImportDataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        os.makedirs(os.path.join(SOURCE_MEDIA, 'posts'))
+        with open(os.path.join(SOURCE_MEDIA, 'posts', 'cat.gif'), 'wb') as f:
+            f.write(b'GIF89a')
+        cls.existing = User.objects.create_user(username='existing')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        directory = tempfile.mkdtemp(dir=TEMP_DIR)
+        self.path = os.path.join(directory, 'data.ndjson')
+        self.rows = [
+            {'type': 'posts', 'id': 10, 'author': 'existing',
+             'group': 'cats', 'text': 'Про котов',
+             'pub_date': '2020-01-02T03:04:05+00:00',
+             'image': 'posts/cat.gif'},
+            {'type': 'posts', 'id': 11, 'author': 'newcomer',
+             'group': None, 'text': 'Без группы', 'image': 'posts/nope.gif'},
+            {'type': 'comments', 'id': 1, 'post': 10, 'author': 'newcomer',
+             'text': 'Мяу'},
+            {'type': 'follows', 'user': 'newcomer', 'author': 'existing'},
+            {'type': 'comments', 'id': 2, 'post': 999, 'author': 'newcomer',
+             'text': 'К неизвестному посту'},
+        ]
+
+    def write(self, lines):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.writelines(line + '\n' for line in lines)
+
+    def import_data(self, *args):
+        call_command(
+            'import_data', self.path, '--media-root', SOURCE_MEDIA,
+            *args, stdout=StringIO(),
+        )
+
+    def test_import(self):
+        """Строки загружаются с автором, группой, датами и картинками."""
+        self.write(json.dumps(row) for row in self.rows)
+        self.import_data()
+
+        post = Post.objects.get(text='Про котов')
+        self.assertEqual(post.author, self.existing)
+        self.assertEqual(post.group, Group.objects.get(slug='cats'))
+        self.assertEqual(
+            post.pub_date.isoformat(), '2020-01-02T03:04:05+00:00'
+        )
+        self.assertEqual(post.updated, post.pub_date)
+        self.assertEqual(post.image.name, 'posts/cat.gif')
+        self.assertTrue(
+            os.path.exists(os.path.join(TARGET_MEDIA, 'posts', 'cat.gif'))
+        )
+        self.assertEqual(Post.objects.get(text='Без группы').image.name, '')
+
+        newcomer = User.objects.get(username='newcomer')
+        self.assertEqual(
+            list(Comment.objects.values_list('post', 'author')),
+            [(post.pk, newcomer.pk)],
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=newcomer, author=self.existing).exists()
+        )
+        # Счётчики пересчитаны после импорта.
+        self.assertEqual(UserStats.objects.get(user=newcomer).posts_count, 1)
+
+    def test_resume_from_checkpoint(self):
+        """После сбоя импорт продолжается с контрольной точки."""
+        lines = [json.dumps(row) for row in self.rows]
+        self.write(lines[:2] + ['{broken'] + lines[3:])
+        with self.assertRaises(ValueError):
+            self.import_data('--batch-size', '2')
+        self.assertEqual(Post.objects.count(), 2)
+
+        self.write(lines)
+        self.import_data('--batch-size', '2')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_failed_batch_leaves_no_checkpoint(self):
+        """Упавшая пачка откатывается вместе со своей контрольной точкой."""
+        self.write(json.dumps(row) for row in self.rows)
+        with mock.patch(
+            'posts.management.commands.import_data.Command.create_follows',
+            side_effect=RuntimeError('сбой'),
+        ):
+            with self.assertRaises(RuntimeError):
+                self.import_data('--batch-size', '4')
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+        self.import_data('--batch-size', '4')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(ImportCheckpoint.objects.count(), 2)
+
+    def test_reads_utf8(self):
+        """Файл читается в UTF-8 независимо от локали."""
+        self.write(json.dumps(row, ensure_ascii=False) for row in self.rows)
+        with mock.patch.object(
+            import_data, 'open', side_effect=open, create=True
+        ) as spy:
+            self.import_data()
+        self.assertEqual(spy.call_args[1]['encoding'], 'utf-8')
+        self.assertTrue(Post.objects.filter(text='Про котов').exists())
+
+    def test_foreign_insert_detected(self):
+        """Чужая вставка постов не даёт привязать комментарии наугад."""
+        def insert_with_race(model, objs, **kwargs):
+            if model is Post:
+                Post.objects.create(author=self.existing, text='Чужой')
+            return insert(model, objs, **kwargs)
+
+        self.write(json.dumps(row) for row in self.rows)
+        with mock.patch.object(
+            import_data, 'insert', side_effect=insert_with_race
+        ):
+            with self.assertRaises(RuntimeError):
+                self.import_data()
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_export_round_trip(self):
+        """Выгрузка export_data загружается обратно."""
+        post = Post.objects.create(text='Туда и обратно', author=self.existing)
+        Comment.objects.create(post=post, author=self.existing, text='!')
+        with open(self.path, 'w') as file:
+            call_command('export_data', stdout=file)
+        Post.objects.all().delete()
+
+        self.import_data()
+        post = Post.objects.get()
+        self.assertEqual(post.text, 'Туда и обратно')
+        self.assertEqual(post.comment.get().text, '!')
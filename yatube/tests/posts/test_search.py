@@ -0,0 +1,176 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Post, SearchToken, User
+from posts.stemmer import stem, tokenize
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        forms = (
+            ('кошка', 'кошки', 'кошкой', 'кошками'),
+            ('город', 'города', 'городе', 'городов'),
+            ('читать', 'читали', 'читала'),
+            ('красивый', 'красивая', 'красивые'),
+        )
+        for words in forms:
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+    def test_tokenize_drops_stop_words_and_keeps_latin(self):
+        self.assertEqual(
+            tokenize('Кот и ёлки на Python, 2020!'),
+            ['кот', 'елк', 'python', '2020'],
+        )
+
+
+class SearchBackendTests:
+    """Общие проверки обоих индексов, backend задаёт подкласс."""
+    backend_class = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='search_author')
+        cls.cats = Post.objects.create(
+            text='Кошки спят. Кошка спит, кошкам снятся сны.',
+            author=cls.author,
+        )
+        cls.cat_dog = Post.objects.create(
+            text='Кошка и собака гуляли по городу.', author=cls.author
+        )
+        cls.dogs = Post.objects.create(
+            text='Собаки лают на прохожих.', author=cls.author
+        )
+        cls.backend_class().rebuild()
+
+    def found(self, query):
+        results = search.SearchResults(query, self.backend_class())
+        return [post.pk for post in results[:10]]
+
+    def test_ranks_by_term_frequency(self):
+        self.assertEqual(
+            self.found('кошками'), [self.cats.pk, self.cat_dog.pk]
+        )
+
+    def test_requires_all_terms(self):
+        self.assertEqual(self.found('собаку кошки'), [self.cat_dog.pk])
+        self.assertEqual(self.found('кошки прохожие'), [])
+
+    def test_stop_words_only_finds_nothing(self):
+        results = search.SearchResults('и на по', self.backend_class())
+        self.assertEqual(results.count(), 0)
+        self.assertEqual(list(results[:10]), [])
+
+    def test_count_and_pages(self):
+        results = search.SearchResults('собака', self.backend_class())
+        self.assertEqual(results.count(), 2)
+        self.assertEqual(len(results[0:1] + results[1:2]), 2)
+
+    def test_index_and_remove(self):
+        backend = self.backend_class()
+        post = Post.objects.create(text='Попугаи', author=self.author)
+        backend.index(post.pk, post.text)
+        self.assertEqual(self.found('попугай'), [post.pk])
+        backend.remove(post.pk)
+        self.assertEqual(self.found('попугай'), [])
+
+
+class Fts5BackendTests(SearchBackendTests, TestCase):
+    backend_class = search.Fts5Backend
+
+
+class TableBackendTests(SearchBackendTests, TestCase):
+    backend_class = search.TableBackend
+
+    def test_tokens_count_occurrences(self):
+        token = SearchToken.objects.get(post=self.cats, term=stem('кошки'))
+        self.assertEqual(token.count, 3)
+
+    def test_long_terms_with_common_prefix(self):
+        """Основы, совпадающие в первых 64 символах, - одна строка."""
+        text = f'{"x" * 64}a {"x" * 64}b'
+        post = Post.objects.create(text=text, author=self.author)
+        self.backend_class().index(post.pk, text)
+        token = SearchToken.objects.get(post=post)
+        self.assertEqual((token.term, token.count), ('x' * 64, 2))
+
+
+class SearchIndexSignalsTests(TestCase):
+    """Индекс по умолчанию (FTS5 в тестовой SQLite) следует за постами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='search_signals')
+
+    def found(self, query):
+        return [post.pk for post in search.SearchResults(query)[:10]]
+
+    def test_fts5_is_used_on_sqlite(self):
+        self.assertIsInstance(search.get_backend(), search.Fts5Backend)
+
+    def test_new_post_is_searchable(self):
+        post = Post.objects.create(text='Жирафы', author=self.author)
+        self.assertEqual(self.found('жираф'), [post.pk])
+
+    def test_edited_post_is_reindexed(self):
+        post = Post.objects.create(text='Жирафы', author=self.author)
+        post.text = 'Слоны'
+        post.save()
+        self.assertEqual(self.found('жираф'), [])
+        self.assertEqual(self.found('слон'), [post.pk])
+
+    def test_deleted_post_is_not_found(self):
+        post = Post.objects.create(text='Жирафы', author=self.author)
+        post.delete()
+        self.assertEqual(self.found('жираф'), [])
+
+    def test_rebuild_command(self):
+        post = Post.objects.create(text='Жирафы', author=self.author)
+        search.remove_post(post.pk)
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('проиндексировано постов 1', out.getvalue())
+        self.assertEqual(self.found('жирафы'), [post.pk])
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='search_view')
+        Post.objects.bulk_create(
+            Post(text=f'Пост номер {number} про котов', author=cls.author)
+            for number in range(15)
+        )
+        search.rebuild()
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_search_page(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'коты'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(response.context['paginator'].count, 15)
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82%D1%8B&page=2')
+
+    def test_second_page(self):
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'коты', 'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj']), 5)
+
+    def test_newer_posts_first_on_equal_rank(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'коты'})
+        ids = [post.pk for post in response.context['page_obj']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_empty_query(self):
+        response = self.client.get(reverse('posts:search'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context['paginator'].count, 0)
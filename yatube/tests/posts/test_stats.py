@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, User, UserStats
+from posts.stats import get_stats
+
+
+class UserStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='stats_author')
+        cls.reader = User.objects.create_user(username='stats_reader')
+        cls.post = Post.objects.create(text='Первый пост', author=cls.author)
+
+    def assertStats(self, user, **expected):
+        stats = UserStats.objects.get(user=user)
+        for field, value in expected.items():
+            with self.subTest(user=user, field=field):
+                self.assertEqual(getattr(stats, field), value)
+
+    def test_first_read_counts_from_tables(self):
+        """Первое чтение пересчитывает счётчики по таблицам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserStats.objects.filter(user=self.author).delete()
+
+        stats = get_stats(self.author)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertTrue(UserStats.objects.filter(user=self.author).exists())
+
+    def test_counters_follow_changes(self):
+        """Счётчики меняются вместе с постами, подписками и комментариями."""
+        get_stats(self.author)
+        get_stats(self.reader)
+
+        post = Post.objects.create(text='Второй пост', author=self.author)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        self.assertStats(self.author, posts_count=2, followers_count=1)
+        self.assertStats(self.reader, following_count=1, comments_count=1)
+
+        comment.delete()
+        follow.delete()
+        post.delete()
+        self.assertStats(self.author, posts_count=1, followers_count=0)
+        self.assertStats(self.reader, following_count=0, comments_count=0)
+
+    def test_rebuild_command_fixes_drift(self):
+        """Команда пересчёта исправляет разошедшиеся счётчики."""
+        get_stats(self.author)
+        UserStats.objects.filter(user=self.author).update(
+            posts_count=100, followers_count=-3
+        )
+        out = StringIO()
+        call_command('rebuild_user_stats', stdout=out)
+
+        self.assertStats(self.author, posts_count=1, followers_count=0)
+        self.assertStats(self.reader, posts_count=0)
+        self.assertIn('исправлено: 1', out.getvalue())
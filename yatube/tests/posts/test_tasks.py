@@ -0,0 +1,78 @@
+import json
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+from posts.models import Comment, Post, User
+from posts.tasks import delete_post, generate_thumbnails
+from tests.posts.test_thumbnails import gif
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=tempfile.gettempdir())
+
+
+def run_queued():
+    for pk in tasks.claim(100):
+        tasks.run(pk)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostTasksTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='tasks_author')
+        cls.other = User.objects.create_user(username='tasks_other')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.author)
+
+    def test_create_with_image_queues_thumbnails(self):
+        """Миниатюры режет задача, а не запрос."""
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': gif()},
+        )
+        post = Post.objects.get()
+        task = Task.objects.get()
+        self.assertEqual(task.name, generate_thumbnails.task_name)
+        self.assertEqual(json.loads(task.arguments), [[post.pk], {}])
+        self.assertEqual(post.thumbnails, '')
+
+        run_queued()
+        post.refresh_from_db()
+        self.assertEqual(set(post.thumbnail_urls), {'card', 'detail'})
+
+    def test_delete_post_queued(self):
+        """Пост с комментариями удаляет задача."""
+        post = Post.objects.create(text='Удалить', author=self.author)
+        Comment.objects.create(post=post, author=self.other, text='Ответ')
+        response = self.client.post(
+            reverse('posts:delete', args=[post.pk])
+        )
+        self.assertRedirects(response, reverse('posts:index'))
+        self.assertEqual(Task.objects.get().name, delete_post.task_name)
+
+        run_queued()
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_delete_post_by_other_user_forbidden(self):
+        post = Post.objects.create(text='Чужой пост', author=self.other)
+        response = self.client.post(
+            reverse('posts:delete', args=[post.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertFalse(Task.objects.exists())
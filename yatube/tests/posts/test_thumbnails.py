@@ -0,0 +1,150 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import signals, thumbnails
+from posts.management.commands import backfill_thumbnails
+from posts.models import Post, User
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=tempfile.gettempdir())
+
+
+def gif(name='small.gif'):
+    return SimpleUploadedFile(name, SMALL_GIF, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='thumbs_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Пост с картинкой', author=self.author, image=gif()
+        )
+        self.client.force_login(self.author)
+
+    def test_generate_stores_urls(self):
+        """Адреса всех размеров сохраняются, дата изменения сдвигается."""
+        updated = self.post.updated
+        thumbnails.generate(self.post.pk)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(set(post.thumbnail_urls), {'card', 'detail'})
+        self.assertGreater(post.updated, updated)
+
+        card = post.thumbnail_urls['card']
+        hashed = r'\.[0-9a-f]{12}\.'
+        self.assertRegex(card['src'], rf'_660{hashed}jpeg$')
+        self.assertRegex(card['srcset'], rf'_330{hashed}jpeg 330w')
+        self.assertRegex(card['srcset'], rf'_660{hashed}jpeg 660w')
+        sources = dict(card['sources'])
+        self.assertIn('image/webp', sources)
+        self.assertRegex(sources['image/webp'], rf'_330{hashed}webp 330w')
+
+    def test_templates_use_stored_urls(self):
+        """Страницы выводят заготовленные миниатюры, не нарезая их."""
+        self.client.get(reverse('posts:index'))
+        thumbnails.generate(self.post.pk)
+        urls = Post.objects.get(pk=self.post.pk).thumbnail_urls
+
+        with mock.patch.object(thumbnails, 'render') as render:
+            index = self.client.get(reverse('posts:index'))
+            detail = self.client.get(
+                reverse('posts:post_detail', args=[self.post.pk])
+            )
+        render.assert_not_called()
+        self.assertContains(index, urls['card']['src'])
+        self.assertContains(index, urls['card']['srcset'])
+        self.assertContains(detail, urls['detail']['srcset'])
+        self.assertContains(detail, 'type="image/webp"')
+
+    def test_replaced_image_result_discarded(self):
+        """Миниатюры заменённой во время нарезки картинки не сохраняются."""
+        def render(image):
+            Post.objects.filter(pk=self.post.pk).update(image='posts/new.gif')
+            return {'card': {'src': '/media/old.jpg'}}
+
+        with mock.patch.object(thumbnails, 'render', render), \
+                mock.patch.object(thumbnails, 'delete_stale') as delete:
+            thumbnails.generate(self.post.pk)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).thumbnails, '')
+        delete.assert_called_once_with('{"card": {"src": "/media/old.jpg"}}')
+
+    def test_edit_with_new_image_resets_thumbnails(self):
+        """Новая картинка в посте сбрасывает старые миниатюры."""
+        thumbnails.generate(self.post.pk)
+        self.client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': 'Новый текст', 'image': gif('other.gif')},
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.thumbnails, '')
+        self.assertContains(
+            self.client.get(reverse('posts:post_detail', args=[post.pk])),
+            post.image.url,
+        )
+
+    def test_new_image_deletes_old_thumbnail_files(self):
+        """Файлы миниатюр прежней картинки удаляются."""
+        thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        old_names = thumbnails.stored_names(self.post.thumbnails)
+        self.assertTrue(old_names)
+
+        with mock.patch.object(
+            signals.transaction, 'on_commit', lambda callback: callback()
+        ):
+            self.client.post(
+                reverse('posts:post_edit', args=[self.post.pk]),
+                {'text': 'Новый текст', 'image': gif('other.gif')},
+            )
+        for name in old_names:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_backfill_command(self):
+        """Команда нарезает миниатюры постам, у которых их нет."""
+        call_command(
+            'backfill_thumbnails', '--workers', '1', stdout=StringIO()
+        )
+        self.assertIn(
+            'image/webp',
+            dict(Post.objects.get(pk=self.post.pk).thumbnail_urls[
+                'detail'
+            ]['sources']),
+        )
+
+    def test_backfill_pool_worker_closes_connection(self):
+        """Поток пула закрывает своё соединение, даже если нарезка упала."""
+        command = backfill_thumbnails.Command(stderr=StringIO())
+        with mock.patch.object(
+            backfill_thumbnails, 'connection'
+        ) as connection, mock.patch.object(
+            thumbnails, 'generate', side_effect=OSError('битый файл')
+        ):
+            self.assertFalse(command.generate_in_pool(self.post.pk))
+        connection.close.assert_called_once_with()
@@ -0,0 +1,139 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.core.cache import cache
+
+from core import tasks
+from posts import feeds, timeline
+from posts.models import User, Follow, Post, TimelineEntry
+from posts.paginator import TimelinePaginator
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='timeline_author')
+        cls.old_post = Post.objects.create(
+            text='Пост до подписки',
+            author=cls.author,
+        )
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='timeline_user')
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_timeline(self):
+        """Подписка добавляет в ленту уже написанные посты."""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertTrue(
+            self.user.timeline.filter(post=self.old_post).exists()
+        )
+        self.assertEqual(self.feed(), [self.old_post])
+
+    def test_new_post_fanned_out(self):
+        """Новый пост раскладывается по лентам подписчиков."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+
+        self.assertTrue(self.user.timeline.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    def test_unfollow_and_delete_clean_timeline(self):
+        """Отписка и удаление поста чистят ленту."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Удаляемый пост', author=self.author)
+        self.client.force_login(self.author)
+        self.client.post(reverse('posts:delete', kwargs={'post_id': post.id}))
+        # Пост удаляет фоновая задача.
+        for pk in tasks.claim(10):
+            tasks.run(pk)
+        self.assertFalse(TimelineEntry.objects.filter(post_id=post.id))
+
+        self.client.force_login(self.user)
+        self.client.get(
+            reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': self.author.username}
+            )
+        )
+        self.assertFalse(self.user.timeline.exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_heavy_author_read_on_demand(self):
+        """Посты автора с большой аудиторией читаются без раскладки."""
+        with mock.patch.object(timeline, 'TIMELINE_FANOUT_LIMIT', 0):
+            Follow.objects.create(user=self.user, author=self.author)
+            post = Post.objects.create(text='Для всех', author=self.author)
+
+            self.assertFalse(self.user.timeline.exists())
+            self.assertEqual(self.feed(), [post, self.old_post])
+
+    def test_author_back_under_limit_keeps_posts(self):
+        """Посты «тяжёлого» автора остаются в лентах после отписок."""
+        followers = [
+            User.objects.create_user(username=f'follower_{i}')
+            for i in range(3)
+        ]
+        with mock.patch.object(timeline, 'TIMELINE_FANOUT_LIMIT', 2):
+            for follower in followers:
+                Follow.objects.create(user=follower, author=self.author)
+            post = Post.objects.create(text='while heavy', author=self.author)
+            self.assertFalse(TimelineEntry.objects.filter(post=post))
+
+            Follow.objects.get(user=followers[1]).delete()
+            self.client.force_login(followers[0])
+            self.assertEqual(self.feed(), [post, self.old_post])
+            self.assertEqual(
+                set(TimelineEntry.objects.filter(post=post).values_list(
+                    'user_id', flat=True
+                )),
+                {followers[0].pk, followers[2].pk},
+            )
+
+    def test_entries_copy_pub_date(self):
+        """Записи ленты хранят дату своего поста."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.create(text='Новый пост', author=self.author)
+        timeline.rebuild()
+        Post.objects.create(text='Ещё пост', author=self.author)
+        for entry in TimelineEntry.objects.select_related('post'):
+            self.assertEqual(entry.pub_date, entry.post.pub_date)
+
+    def test_pages_merge_timeline_and_heavy_authors(self):
+        """Страницы идут по дате без пропусков и повторов."""
+        heavy = User.objects.create_user(username='heavy_author')
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=heavy)
+        # Разложен, пока автор был лёгким: есть и в ленте, и в его постах.
+        Post.objects.create(text='Лёгкий', author=heavy)
+        with mock.patch.object(timeline, 'TIMELINE_FANOUT_LIMIT', 1):
+            Follow.objects.create(user=self.author, author=heavy)
+            for number in range(4):
+                Post.objects.create(text=f'Автор {number}', author=self.author)
+                Post.objects.create(text=f'Тяжёлый {number}', author=heavy)
+            self.assertFalse(
+                self.user.timeline.filter(post__text__startswith='Тяжёлый')
+            )
+            expected = list(
+                Post.objects.filter(author__in=[self.author, heavy])
+                .order_by('-pub_date', '-pk')
+            )
+
+            paginator = TimelinePaginator(self.user, feeds.index_feed(), 3)
+            self.assertEqual(paginator.count, len(expected))
+            pages = [paginator.page(None)]
+            while pages[-1].next_cursor:
+                pages.append(paginator.page(pages[-1].next_cursor))
+            self.assertEqual(
+                [post for page in pages for post in page], expected
+            )
+            previous = paginator.page(pages[-1].previous_cursor)
+            self.assertEqual(list(previous), list(pages[-2]))
@@ -1,9 +1,14 @@
+import re
+
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
 from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 
-from posts.models import Post
+from core.caching import get_versions
+from core.models import Task
+from posts.models import Group, Post
 
 User = get_user_model()
 
@@ -16,17 +21,187 @@ class PostCreateFormTests(TestCase):
         cls.authorized_client = Client()
         cls.user = User.objects.create(username='cache_test')
 
+    def setUp(self):
+        cache.clear()
+
     def test_cache_index_page(self):
         """Тест работы кэша."""
+        Post.objects.create(author=self.user, text="Тестим кэш")
+
+        url = reverse("posts:index")
+
+        response = self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            cached_response = self.authorized_client.get(url)
+        self.assertEqual(response.content, cached_response.content)
+
+    def test_cache_invalidated_by_post_changes(self):
+        """Создание и удаление поста сразу сбрасывают кэш."""
         post = Post.objects.create(author=self.user, text="Тестим кэш")
 
         url = reverse("posts:index")
 
         response = self.authorized_client.get(url)
         post.delete()
-        old_response = self.authorized_client.get(url)
-        self.assertEqual(response.content, old_response.content)
+        new_response = self.authorized_client.get(url)
+        self.assertNotEqual(response.content, new_response.content)
+
+        Post.objects.create(author=self.user, text="Новый пост")
+        self.assertIn(
+            "Новый пост",
+            self.authorized_client.get(url).content.decode(),
+        )
+
+    def test_cache_invalidated_by_group_changes(self):
+        """Изменение группы сбрасывает кэш."""
+        group = Group.objects.create(title='Группа', slug='cache_group')
+        Post.objects.create(author=self.user, text="Пост", group=group)
+
+        url = reverse("posts:index")
+
+        self.authorized_client.get(url)
+        group.slug = 'renamed_group'
+        group.save()
+        self.assertIn(
+            'renamed_group',
+            self.authorized_client.get(url).content.decode(),
+        )
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='card_author')
+        cls.group = Group.objects.create(title='Карточки', slug='cards')
 
+    def setUp(self):
         cache.clear()
-        new_response = self.authorized_client.get(url)
-        self.assertNotEqual(old_response.content, new_response.content)
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Карточка'
+        )
+
+    def card_key(self, post):
+        author_version, = get_versions(f'user:{post.author_id}')
+        return make_template_fragment_key('post_card', [
+            post.pk, post.updated.timestamp(), post.group.slug,
+            author_version,
+        ])
+
+    def test_card_shared_between_feeds(self):
+        """Карточка, отрисованная на главной, берётся из кэша в группе."""
+        self.client.get(reverse('posts:index'))
+        self.assertIsNotNone(cache.get(self.card_key(self.post)))
+
+        cache.set(self.card_key(self.post), 'закэшированная карточка')
+        response = self.client.get(
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        )
+        self.assertContains(response, 'закэшированная карточка')
+
+    def test_edit_invalidates_card(self):
+        """Правка поста даёт карточке новый ключ."""
+        self.client.force_login(self.author)
+        self.client.get(reverse('posts:profile', args=[self.author.username]))
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            {'text': 'Исправленная карточка', 'group': self.group.id},
+        )
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertContains(response, 'Исправленная карточка')
+
+    def test_owner_buttons_rendered_per_viewer(self):
+        """Кнопки владельца видит только автор поста."""
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': self.post.id})
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, edit_url)
+
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, edit_url)
+
+    def test_author_rename_invalidates_card(self):
+        """Новое имя автора сразу видно в карточках."""
+        self.client.get(reverse('posts:index'))
+        self.author.first_name, self.author.last_name = 'Новое', 'Имя'
+        self.author.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новое Имя')
+
+    def test_delete_requires_post(self):
+        self.client.force_login(self.author)
+        url = reverse('posts:delete', kwargs={'post_id': self.post.id})
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertContains(self.client.get(reverse('posts:index')), url)
+
+    def test_delete_form_from_cached_card(self):
+        """Токен формы удаления не попадает в кэш карточки."""
+        first = Client(enforce_csrf_checks=True)
+        first.force_login(self.author)
+        first.get(reverse('posts:index'))
+        self.assertIsNotNone(cache.get(self.card_key(self.post)))
+
+        second = Client(enforce_csrf_checks=True)
+        second.force_login(self.author)
+        response = second.get(
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        )
+        response = second.post(
+            reverse('posts:delete', kwargs={'post_id': self.post.id}),
+            {'csrfmiddlewaretoken': csrf_token(response)},
+        )
+        self.assertRedirects(response, reverse('posts:index'))
+
+
+def csrf_token(response):
+    return re.search(
+        r'name="csrfmiddlewaretoken" value="([^"]+)"',
+        response.content.decode(),
+    ).group(1)
+
+
+class CsrfCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='csrf_author', password='secret'
+        )
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.client = Client(enforce_csrf_checks=True)
+
+    def log_in(self):
+        url = reverse('users:login')
+        response = self.client.post(url, {
+            'username': 'csrf_author',
+            'password': 'secret',
+            'csrfmiddlewaretoken': csrf_token(self.client.get(url)),
+        })
+        self.assertEqual(response.status_code, 302)
+
+    def test_relogin_gets_fresh_token(self):
+        """После повторного входа кнопка удаления на главной работает."""
+        self.log_in()
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('users:logout'))
+        self.log_in()
+
+        token = csrf_token(self.client.get(reverse('posts:index')))
+        response = self.client.post(
+            reverse('posts:delete', kwargs={'post_id': self.post.id}),
+            {'csrfmiddlewaretoken': token},
+        )
+        self.assertRedirects(response, reverse('posts:index'))
+        self.assertEqual(Task.objects.get().name, 'posts.tasks.delete_post')
+
+    def test_page_cached_per_csrf_secret(self):
+        """С тем же секретом CSRF страница берётся из кэша."""
+        self.log_in()
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        # Только сессия и пользователь.
+        with self.assertNumQueries(2):
+            cached_response = self.client.get(url)
+        self.assertEqual(response.content, cached_response.content)
@@ -0,0 +1,178 @@
+import re
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='etag_author')
+        cls.reader = User.objects.create_user(username='etag_reader')
+        cls.group = Group.objects.create(title='Группа', slug='etag_group')
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = {
+            'group': reverse('posts:group_posts', args=[self.group.slug]),
+            'profile': reverse('posts:profile', args=[self.author]),
+            'detail': reverse('posts:post_detail', args=[self.post.pk]),
+        }
+
+    def assertRevalidates(self, url, client=None):
+        """Повторный запрос с ETag получает 304; возвращает ETag."""
+        client = client or self.client
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        return etag
+
+    def assertChanged(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_not_modified_with_one_query(self):
+        """Актуальная копия подтверждается одним запросом без отрисовки."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_etag_without_aggregates(self):
+        """ETag не пересчитывает посты и комментарии агрегатами."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.head(url, HTTP_IF_NONE_MATCH='"stale"')
+                sql = queries.captured_queries[0]['sql']
+                self.assertNotIn('COUNT(', sql)
+                self.assertNotIn('MAX(', sql)
+
+    def test_author_rename(self):
+        """Новое имя автора меняет ETag профиля и поста."""
+        etags = {
+            name: self.assertRevalidates(self.urls[name])
+            for name in ('profile', 'detail')
+        }
+        self.author.first_name = 'Переименованный'
+        self.author.save()
+        for name, etag in etags.items():
+            with self.subTest(page=name):
+                self.assertChanged(self.urls[name], etag)
+
+    def test_viewer_and_cursor_change_etag(self):
+        """У разных зрителей и страниц ленты разные ETag."""
+        url = self.urls['profile']
+        anonymous = self.assertRevalidates(url)
+        self.assertNotEqual(
+            anonymous, self.assertRevalidates(url, self.reader_client)
+        )
+        self.assertChanged(url + '?cursor=abc', anonymous)
+
+    def test_relogin_changes_etag(self):
+        """После повторного входа страница с формами отдаётся заново."""
+        User.objects.filter(pk=self.reader.pk).update(
+            password=make_password('secret')
+        )
+        client = Client(enforce_csrf_checks=True)
+        login_url = reverse('users:login')
+        credentials = {'username': self.reader.username, 'password': 'secret'}
+
+        def log_in():
+            client.get(login_url)
+            client.post(login_url, {
+                **credentials,
+                'csrfmiddlewaretoken': client.cookies['csrftoken'].value,
+            })
+
+        log_in()
+        url = self.urls['detail']
+        client.get(url)
+        etag = self.assertRevalidates(url, client)
+        client.get(reverse('users:logout'))
+        log_in()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        token = re.search(
+            r'name="csrfmiddlewaretoken" value="([^"]+)"',
+            response.content.decode(),
+        ).group(1)
+        client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий', 'csrfmiddlewaretoken': token},
+        )
+        self.assertTrue(
+            Comment.objects.filter(post=self.post, text='Комментарий')
+        )
+
+    def test_new_edited_and_deleted_posts(self):
+        """Новый, изменённый и удалённый пост меняют ETag лент."""
+        for change in (
+            lambda: Post.objects.create(
+                text='Новый', author=self.author, group=self.group
+            ),
+            lambda: self.post.save(),
+            lambda: self.old_post.delete(),
+        ):
+            etags = {
+                name: self.assertRevalidates(url)
+                for name, url in self.urls.items()
+                if name != 'detail'
+            }
+            change()
+            for name, etag in etags.items():
+                with self.subTest(page=name):
+                    self.assertChanged(self.urls[name], etag)
+
+    def test_comments_and_follows(self):
+        """Комментарий меняет пост и ленты, подписка - профиль."""
+        etags = {
+            name: self.assertRevalidates(url)
+            for name, url in self.urls.items()
+        }
+        Comment.objects.create(post=self.post, author=self.reader, text='!')
+        for name, etag in etags.items():
+            with self.subTest(page=name):
+                self.assertChanged(self.urls[name], etag)
+
+        etag = self.assertRevalidates(self.urls['profile'])
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertChanged(self.urls['profile'], etag)
+
+    def test_missing_objects_still_404(self):
+        """Для несуществующих объектов ETag нет, ответ 404."""
+        for url in (
+            reverse('posts:group_posts', args=['nope']),
+            reverse('posts:profile', args=['nope']),
+            reverse('posts:post_detail', args=[0]),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                self.assertNotIn('ETag', response)
@@ -4,6 +4,7 @@ from django.test import TestCase
 from django.core.cache import cache
 
 from yatube.settings import LIMIT_POSTS
+from posts.counters import group_count
 from posts.models import Group, Post, Comment
 
 User = get_user_model()
@@ -49,3 +50,73 @@ class PaginatorViewsTest(TestCase):
         """Паджинатор отображает не более 10 постов."""
         response = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(len(response.context['page_obj']), LIMIT_POSTS)
+
+    def test_cursor_pages_cover_whole_feed(self):
+        """Курсоры следующей страницы проходят ленту без пропусков."""
+        url = reverse('posts:index')
+        seen = []
+        page = self.authorized_client.get(url).context['page_obj']
+        seen.extend(page.object_list)
+        while page.has_next():
+            response = self.authorized_client.get(
+                url, {'cursor': page.next_cursor}
+            )
+            page = response.context['page_obj']
+            seen.extend(page.object_list)
+
+        self.assertEqual(page.number, 3)
+        self.assertEqual(len(page), len(self.posts) - 2 * LIMIT_POSTS)
+        self.assertEqual(
+            [post.pk for post in seen],
+            list(Post.objects.order_by('-pub_date', '-pk')
+                 .values_list('pk', flat=True)),
+        )
+
+    def test_cursor_page_is_stable_for_new_posts(self):
+        """Новые посты не сдвигают уже открытую вторую страницу."""
+        url = reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        first_page = self.authorized_client.get(url).context['page_obj']
+        second_page = self.authorized_client.get(
+            url, {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+
+        previous = self.authorized_client.get(
+            url, {'cursor': second_page.previous_cursor}
+        ).context['page_obj']
+        self.assertFalse(previous.has_previous())
+        self.assertEqual(list(previous), list(first_page))
+
+        Post.objects.create(author=self.author, group=self.group, text='new')
+        cache.clear()
+        again = self.authorized_client.get(
+            url, {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(again), list(second_page))
+
+    def test_invalid_cursor_opens_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'cursor': 'not-a-cursor'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_page_count_comes_from_cached_counter(self):
+        """Число страниц берётся из кэшированного счётчика."""
+        url = reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        response = self.authorized_client.get(url)
+        self.assertEqual(
+            response.context['page_obj'].paginator.num_pages, 3
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(group_count(self.group), len(self.posts))
+
+        Post.objects.create(author=self.author, group=self.group, text='+1')
+        other_group = Group.objects.create(title='Другая', slug='other')
+        moved = Post.objects.filter(group=self.group).first()
+        moved.group = other_group
+        moved.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(group_count(self.group), len(self.posts))
+        self.assertEqual(group_count(other_group), 1)
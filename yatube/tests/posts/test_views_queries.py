@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from yatube.settings import LIMIT_POSTS
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Запросов на страницу ленты при любом числе постов:
+# сессия, пользователь, сама лента и служебные запросы страницы.
+FEED_QUERY_BUDGET = 7
+
+
+class FeedQueriesTests(TestCase):
+    """Число SQL-запросов ленты не зависит от числа постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.reader = User.objects.create_user(username='feed_reader')
+        cls.author = User.objects.create_user(
+            username='feed_author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(title='Лента', slug='feed_group')
+        for number in range(LIMIT_POSTS + 1):
+            author = User.objects.create_user(username=f'feed_{number}')
+            group = Group.objects.create(
+                title=f'Группа {number}', slug=f'feed_group_{number}'
+            )
+            Post.objects.create(author=author, group=group, text=str(number))
+            post = Post.objects.create(
+                author=cls.author, group=cls.group, text=str(number)
+            )
+            Comment.objects.create(post=post, author=author, text='!')
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def test_feeds_fit_query_budget(self):
+        """Ленты укладываются в бюджет запросов."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'feed_author'}),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(len(response.context['page_obj']),
+                                 LIMIT_POSTS)
+                self.assertLessEqual(
+                    len(queries), FEED_QUERY_BUDGET,
+                    '\n'.join(query['sql'] for query in queries),
+                )
+
+    def test_feed_has_comments_count(self):
+        """Карточки ленты получают число комментариев без запросов."""
+        response = self.client.get(
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        )
+        post = response.context['page_obj'][0]
+        with self.assertNumQueries(0):
+            self.assertEqual(post.comments_count, 1)
+            self.assertEqual(post.author.get_full_name(), 'Имя Фамилия')
+            self.assertEqual(post.group.slug, self.group.slug)
@@ -0,0 +1,63 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+from users.tasks import send_password_reset
+
+User = get_user_model()
+
+
+class PasswordResetTaskTests(TestCase):
+    def test_email_sent_by_task(self):
+        """Письмо для сброса пароля уходит из фоновой задачи."""
+        User.objects.create_user(
+            username='reset', email='reset@example.com', password='secret'
+        )
+        response = self.client.post(
+            reverse('users:password_reset'), {'email': 'reset@example.com'}
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(mail.outbox, [])
+        task = Task.objects.get()
+        self.assertEqual(task.name, 'users.tasks.send_password_reset')
+        self.assertNotIn('password_reset_confirm', task.arguments)
+
+        [pk] = tasks.claim(1)
+        self.assertTrue(tasks.run(pk))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reset@example.com'])
+        self.assertIn('/auth/password_reset_confirm/', mail.outbox[0].body)
+        self.assertFalse(Task.objects.exists())
+
+    def test_link_in_email_works(self):
+        """Токен из письма, созданный воркером, принимается."""
+        user = User.objects.create_user(
+            username='reset', email='reset@example.com', password='secret'
+        )
+        send_password_reset(
+            user.pk, 'reset@example.com', 'testserver', 'testserver',
+            'http', 'registration/password_reset_subject.txt',
+            'users/password_reset_email.html',
+        )
+        [link] = re.findall(
+            r'/auth/password_reset_confirm/\S+/', mail.outbox[0].body
+        )
+        response = self.client.get(link, follow=True)
+        self.assertTrue(response.context['validlink'])
+
+    def test_changed_email_not_sent(self):
+        """Если адрес сменился, старый адрес письмо не получает."""
+        user = User.objects.create_user(
+            username='reset', email='new@example.com', password='secret'
+        )
+        send_password_reset(
+            user.pk, 'old@example.com', 'testserver', 'testserver',
+            'http', 'registration/password_reset_subject.txt',
+            'users/password_reset_email.html',
+        )
+        self.assertEqual(mail.outbox, [])
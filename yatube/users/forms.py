@@ -1,6 +1,8 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from .tasks import send_password_reset
+
 
 User = get_user_model()
 
@@ -13,3 +15,20 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """
+    Письмо для сброса пароля отрисовывается и отправляется фоновой
+    задачей. В очередь попадают только id пользователя, адрес и домен:
+    токен создаётся в воркере и в базе не хранится.
+    """
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        send_password_reset.delay(
+            context['user'].pk, to_email, context['domain'],
+            context['site_name'], context['protocol'],
+            subject_template_name, email_template_name, from_email,
+            html_email_template_name,
+        )
@@ -0,0 +1,50 @@
+"""Фоновые задачи пользователей, их выполняет manage.py run_worker."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.tasks import task
+
+User = get_user_model()
+
+
+@task(sensitive=True)
+def send_email(subject, body, from_email, to, html_body=None):
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html_body is not None:
+        message.attach_alternative(html_body, 'text/html')
+    message.send()
+
+
+@task(sensitive=True)
+def send_password_reset(user_id, email, domain, site_name, protocol,
+                        subject_template_name, email_template_name,
+                        from_email=None, html_email_template_name=None):
+    """Письмо для сброса пароля; токен создаётся здесь, а не в запросе.
+
+    Если пользователя нет или его адрес сменился, письмо не
+    отправляется.
+    """
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None or getattr(user, User.get_email_field_name()) != email:
+        return
+    context = {
+        'email': email,
+        'domain': domain,
+        'site_name': site_name,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': protocol,
+    }
+    subject = loader.render_to_string(subject_template_name, context)
+    # Как в PasswordResetForm: тема письма - одна строка.
+    subject = ''.join(subject.splitlines())
+    body = loader.render_to_string(email_template_name, context)
+    html_body = None
+    if html_email_template_name is not None:
+        html_body = loader.render_to_string(html_email_template_name, context)
+    send_email(subject, body, from_email, [email], html_body)
@@ -6,7 +6,7 @@ from django.contrib.auth.views import PasswordResetView
 from django.contrib.auth.views import PasswordResetConfirmView
 from django.contrib.auth.views import PasswordChangeView
 
-from .forms import CreationForm
+from .forms import CreationForm, QueuedPasswordResetForm
 
 
 class SignUp(CreateView):
@@ -28,6 +28,7 @@ class CustomLogoutView(LogoutView):
 
 class CustomPasswordResetView(PasswordResetView):
     """При сбросе пароля."""
+    form_class = QueuedPasswordResetForm
     success_url = reverse_lazy("users:password_reset_done")
     email_template_name = "users/password_reset_email.html"
     template_name = "users/password_reset_form.html"
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'about.apps.AboutConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'whitenoise.runserver_nostatic',
     'django.contrib.admin',
     'django.contrib.auth',
@@ -54,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -89,6 +91,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Views behind yatube.asgi run in a pool of this many threads
+ASGI_THREADS = 8
+# Chunks of a streaming response read ahead of a slow client
+ASGI_STREAM_BUFFER = 8
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -150,10 +157,24 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# collectstatic writes content-hashed names with .gz and .br copies,
+# whitenoise serves them with far-future cache headers
+STATICFILES_STORAGE = 'core.storage.StaticFilesStorage'
+
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media files without a content hash in the name are cached for a day
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24
+
+# '' - serve media from Django, 'x-sendfile' or 'x-accel-redirect' -
+# only check the request and let the web server send the file
+MEDIA_SENDFILE = ''
+
+# nginx internal location that maps to MEDIA_ROOT
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
 
 # User authentication and authorisation
 
@@ -177,6 +198,27 @@ CACHES = {
     }
 }
 
+# Set to redis://host:port/db (Redis or `manage.py cache_server`) to share
+# the cache between worker processes: each process keeps a small L1 in
+# front of it and drops L1 entries that other processes change
+SHARED_CACHE_LOCATION = ''
+
+if SHARED_CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.TieredCache',
+            'OPTIONS': {
+                'L2': 'shared',
+                'L1_TIMEOUT': 5,
+                'L1_MAX_ENTRIES': 1000,
+            },
+        },
+        'shared': {
+            'BACKEND': 'core.cache_backends.RespCache',
+            'LOCATION': SHARED_CACHE_LOCATION,
+        },
+    }
+
 
 # Custom Errors
 
@@ -187,8 +229,75 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 LIMIT_POSTS = 10
 
+# Largest page the JSON API returns for ?limit=
+API_MAX_LIMIT = 100
+
 POST_SYMBOLS = 15
 
 COMMENT_SYMBOLS = 60
 
-CACHE_TIMEOUT = 20
+# Cached pages are invalidated by model signals, the timeout is a safety net
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Only one request rebuilds an outdated page, holding a lease this long
+CACHE_LOCK_TIMEOUT = 10
+
+# How long an expired page may still be served while it is being rebuilt
+CACHE_STALE_TIMEOUT = 60
+
+# Probabilistic early expiry (XFetch): larger values refresh pages sooner
+CACHE_XFETCH_BETA = 1.0
+
+# Upper bound on how stale a cached paginator count may get
+PAGINATOR_COUNT_TIMEOUT = 60 * 5
+
+TIMELINE_FANOUT_LIMIT = 1000
+
+TIMELINE_BATCH_SIZE = 500
+
+# Thumbnails are cut by the task worker right after upload
+THUMBNAIL_SIZES = {
+    'card': '660x259',
+    'detail': '960x339',
+}
+
+# Each size is also cut at smaller widths for srcset
+THUMBNAIL_SCALES = (0.5, 1)
+
+# Format and quality; the last one is the fallback for old browsers
+THUMBNAIL_FORMATS = {
+    'avif': 60,
+    'webp': 80,
+    'jpeg': 85,
+}
+
+THUMBNAIL_WORKERS = 2
+
+# Background tasks (core.tasks) are run by `manage.py run_worker`
+TASK_WORKERS = 4
+
+# Seconds an idle worker waits before looking at the queue again
+TASK_POLL_INTERVAL = 1
+
+TASK_MAX_ATTEMPTS = 3
+
+# Attempt n + 1 starts TASK_RETRY_DELAY * 2 ** (n - 1) seconds after n fails
+TASK_RETRY_DELAY = 10
+
+# A task running longer than this is assumed lost with its worker
+TASK_STALE_AFTER = 60 * 30
+
+# Finished tasks are kept this many seconds for stats, then purged
+TASK_KEEP_FINISHED = 60 * 60 * 24 * 7
+
+# Posts and users are deleted this many rows per statement and transaction
+DELETION_BATCH_SIZE = 500
+
+# 'auto' uses SQLite FTS5 when the table exists, 'table' forces the
+# inverted index in posts_searchtoken
+SEARCH_BACKEND = 'auto'
+
+SEARCH_BATCH_SIZE = 1000
+
+# Longer queries are cut before tokenizing
+SEARCH_MAX_QUERY = 200
@@ -18,13 +18,16 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path, re_path
-from django.views.static import serve
+
+from core.media import serve_media
 
 urlpatterns = [
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path('internal/', include('core.urls', namespace='core')),
+    path('api/', include('api.urls', namespace='api')),
     path('', include('posts.urls')),
 ]
 
@@ -43,11 +46,8 @@ if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL,
                           document_root=settings.STATIC_ROOT)
 else:
-
+    # Статику отдаёт WhiteNoiseMiddleware из STATIC_ROOT.
     urlpatterns += [
-        re_path(r'^static/(?P<path>.*)$', serve,
-                kwargs={'document_root': settings.STATIC_ROOT, }),
-        re_path(r'^media/(?P<path>.*)$', serve,
-                kwargs={'document_root': settings.MEDIA_ROOT, }),
+        re_path(r'^media/(?P<path>.*)$', serve_media),
     ]
 